@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Compares the old alignment, which calculated the bounding box up to six
+times per alignment, with `align_shape()` on a large imported STL mesh and
+on a generated extension.
+
+Usage: python benchmarks/bench_align.py [--tolerance 0.0005] [--runs 5]
+"""
+
+import argparse
+import tempfile
+
+from pathlib import Path
+from typing import Any, Tuple, cast
+
+import build123d as bd
+
+from OCP.BRep import BRep_Tool
+from OCP.TopLoc import TopLoc_Location
+
+from timing import time_func
+from tp_extension_builder.tp_extensions import TrackPointExtensionRedT460S
+from tp_extension_builder.utils import (
+    ALIGN_CENTER_BOTTOM,
+    AlignT,
+    align_shape,
+)
+
+
+def align_shape_legacy(shape: bd.Shape[Any], align: AlignT) -> bd.Shape[Any]:
+    """
+    The alignment before bounding boxes were reused.
+    """
+    align_tuple = cast(
+        Tuple[bd.Align, bd.Align, bd.Align],
+        bd.tuplify(align, 3),
+    )
+
+    align_offset = []
+    for i in range(3):
+        if align_tuple[i] == bd.Align.MIN:
+            align_offset.append(-shape.bounding_box().min.to_tuple()[i])
+        elif align_tuple[i] == bd.Align.CENTER:
+            align_offset.append(
+                -(
+                    shape.bounding_box().min.to_tuple()[i]
+                    + shape.bounding_box().max.to_tuple()[i]
+                )
+                / 2
+            )
+        elif align_tuple[i] == bd.Align.MAX:
+            align_offset.append(-shape.bounding_box().max.to_tuple()[i])
+
+    return shape.moved(bd.Location(tuple(align_offset)))
+
+
+def load_mesh(tolerance: float) -> Tuple[bd.Shape[Any], int]:
+    """
+    Exports an extension as a finely tessellated STL and imports it again.
+    """
+    extension = TrackPointExtensionRedT460S(
+        adapter_hole_incr=0.2,
+        desired_cap_height=10.5,
+        tp_mounting_distance=0.0,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        stl_path = Path(tmp_dir) / 'extension.stl'
+        bd.export_stl(
+            extension,
+            str(stl_path),
+            tolerance=tolerance,
+            angular_tolerance=tolerance * 10,
+        )
+        mesh = bd.import_stl(str(stl_path))
+
+    # Imported STL files are a single face with a triangulation
+    triangle_count = sum(
+        BRep_Tool.Triangulation_s(
+            face.wrapped, TopLoc_Location()
+        ).NbTriangles()
+        for face in mesh.faces()
+    )
+
+    return (mesh, triangle_count)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tolerance', type=float, default=0.0002)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    mesh, triangle_count = load_mesh(args.tolerance)
+    extension = TrackPointExtensionRedT460S(
+        adapter_hole_incr=0.2,
+        desired_cap_height=10.5,
+        tp_mounting_distance=0.0,
+    )
+
+    cases = [
+        (f'STL mesh ({triangle_count} triangles)', mesh),
+        ('Generated extension', extension),
+    ]
+
+    print(f'{"Shape":<36} {"legacy":>10} {"align_shape":>12} {"speedup":>8}')
+    for name, shape in cases:
+        legacy_ms = 1000 * time_func(
+            lambda: align_shape_legacy(shape, ALIGN_CENTER_BOTTOM),
+            args.runs,
+        )
+        new_ms = 1000 * time_func(
+            lambda: align_shape(shape, ALIGN_CENTER_BOTTOM),
+            args.runs,
+        )
+        print(
+            f'{name:<36} {legacy_ms:>8.2f}ms {new_ms:>10.2f}ms '
+            f'{legacy_ms / new_ms:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
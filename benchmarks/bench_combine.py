@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compares combining extensions by fusing every shape into the plate with
+assembling them as a compound that only fuses the sprue contacts.
+
+Usage: python benchmarks/bench_combine.py [--counts 5 20 50] [--no-fuse-all]
+"""
+
+import argparse
+
+from typing import Any, List
+
+import build123d as bd
+
+from timing import time_func
+from tp_extension_builder.tp_extensions import TrackPointExtensionRedT460S
+from tp_extension_builder.utils import combine_shapes
+
+
+def make_shapes(count: int) -> List[bd.Shape[Any]]:
+    """
+    Builds one extension and returns copies of it, so only the combining
+    is measured.
+    """
+    extension = TrackPointExtensionRedT460S(
+        adapter_hole_incr=0.2,
+        desired_cap_height=10.5,
+        tp_mounting_distance=0.0,
+    )
+    shape = bd.Compound(extension.wrapped)
+
+    return [shape.moved(bd.Location()) for _ in range(count)]
+
+
+def time_combine(shapes: List[bd.Shape[Any]], fuse_all: bool) -> float:
+    """
+    Returns the time it took to combine the shapes in seconds.
+    """
+    return time_func(
+        lambda: combine_shapes(
+            shapes,
+            distance=0.5,
+            add_sprue=True,
+            sprue_radius=0.75,
+            fuse_all=fuse_all,
+        ),
+        runs=1,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--counts', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument(
+        '--no-fuse-all',
+        action='store_true',
+        help='Skips the slow fuse all mode.',
+    )
+    args = parser.parse_args()
+
+    print(f'{"Parts":>5} {"fuse all":>10} {"compound":>10} {"speedup":>8}')
+    for count in args.counts:
+        shapes = make_shapes(count)
+
+        compound_s = time_combine(shapes, fuse_all=False)
+        if args.no_fuse_all is True:
+            print(f'{count:>5} {"-":>10} {compound_s:>9.2f}s {"-":>8}')
+            continue
+
+        fuse_all_s = time_combine(shapes, fuse_all=True)
+        print(
+            f'{count:>5} {fuse_all_s:>9.2f}s {compound_s:>9.2f}s '
+            f'{fuse_all_s / compound_s:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
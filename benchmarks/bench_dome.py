@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Compares the old dome construction, which revolved the profile and
+extruded a sketch with one circle per dot, with `_build_dome()`, which
+fuses a cached dot pattern with a dome made of toroidal faces.
+
+Usage: python benchmarks/bench_dome.py [--runs 3]
+"""
+
+import argparse
+
+from typing import Any, Sequence, TypedDict, cast
+
+import build123d as bd
+
+from timing import time_func
+from tp_extension_builder.tp_caps import (
+    TrackPointCapBase,
+    TrackPointCapBlueX1Carbon,
+    TrackPointCapGreenT430,
+    TrackPointCapRedT460S,
+)
+
+
+class DomeParams(TypedDict):
+    """
+    The dome dimensions of a cap, as passed to both constructions.
+    """
+
+    diameter: float
+    height: float
+    dot_height: float
+    dot_radius: float
+    dot_spacing: float
+    dot_rows: Sequence[int]
+
+
+def build_dome_legacy(
+    diameter: float,
+    height: float,
+    dot_height: float,
+    dot_radius: float,
+    dot_spacing: float,
+    dot_rows: Sequence[int],
+) -> bd.Shape[Any]:
+    """
+    The dome construction before the dot pattern was cached.
+    """
+    radius = diameter / 2
+
+    with bd.BuildPart() as dome:
+        with bd.BuildSketch(bd.Plane.XZ):
+            with bd.BuildLine():
+                l_side = bd.Line((0, 0), (0, height / 2))
+                l_bottom = bd.Line(l_side @ 0, (radius, 0))
+                l_top = bd.Line(l_side @ 1, (radius * 0.4, height / 2))
+
+                arc_mid_point = (
+                    (l_top.end_point().X + l_bottom.end_point().X) / 2,
+                    (l_top.end_point().Y + l_bottom.end_point().Y) / 2 * 1.5,
+                )
+                bd.ThreePointArc(l_top @ 1, arc_mid_point, l_bottom @ 1)
+
+            bd.make_face()
+            bd.mirror(about=bd.Plane.XZ)
+
+        bd.revolve(axis=bd.Axis.Z)
+
+        with bd.BuildSketch(bd.Plane.XY):
+            for row_num, dot_num in enumerate(dot_rows):
+                row_offset = (
+                    row_num * dot_spacing
+                    - ((len(dot_rows) - 1) * dot_spacing) / 2
+                )
+                with bd.Locations((0, row_offset, 0)):
+                    with bd.GridLocations(
+                        dot_spacing, dot_spacing, dot_num, 1
+                    ):
+                        bd.Circle(dot_radius)
+        bd.extrude(amount=height / 2 + dot_height)
+
+    return cast(bd.Shape[Any], dome.part)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    caps: Sequence[TrackPointCapBase] = [
+        TrackPointCapRedT460S(),
+        TrackPointCapGreenT430(),
+        TrackPointCapBlueX1Carbon(),
+    ]
+
+    print(
+        f'{"Cap":<16} {"legacy":>8} {"new":>8} {"speedup":>8} '
+        f'{"volume diff":>12}'
+    )
+    for cap in caps:
+        kwargs = DomeParams(
+            diameter=cap.dome_diameter,
+            height=cap.dome_height,
+            dot_height=cap.dome_dot_height,
+            dot_radius=cap.dome_dot_radius,
+            dot_spacing=cap.dome_dot_spacing,
+            dot_rows=cap.dome_dot_rows,
+        )
+        legacy_s = time_func(lambda: build_dome_legacy(**kwargs), args.runs)
+        new_s = time_func(lambda: cap._build_dome(**kwargs), args.runs)
+
+        legacy_dome = build_dome_legacy(**kwargs)
+        new_dome = cap._build_dome(**kwargs)
+        print(
+            f'{cap.model:<16} {legacy_s:>7.2f}s {new_s:>7.2f}s '
+            f'{legacy_s / new_s:>7.1f}x '
+            f'{abs(legacy_dome.volume - new_dome.volume):>12.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Compares the old construction of the extension solid, which looked up the
+top face of every section to place the next one, with the alternatives
+that were tried to speed it up:
+
+  - sections: `TrackPointExtensionBase._build_extension()`, which fuses
+    cached sections
+  - revolved: revolves the stepped profile of all round sections
+  - fused: fuses one cylinder per section at its calculated height
+
+The solids are built for every extension model and a few parameter sets.
+They must have the same volume, bounding box and topology as the old
+solid, and the volume of their symmetric difference must be zero within
+the tolerance. The size of their STEP exports is compared as well. The
+cached sections are cleared before every build, so every build starts
+from scratch.
+
+The second table shows how long it takes to rebuild the extension from
+cached sections after changing a single parameter.
+
+Exits with status 1 if a solid differs.
+
+Usage: python benchmarks/bench_extension.py [--runs 5] [--tolerance 1e-6]
+"""
+
+import argparse
+import dataclasses
+import sys
+import tempfile
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, cast
+
+import build123d as bd
+
+from timing import time_func, time_prepared
+from tp_extension_builder import tp_extensions
+from tp_extension_builder.dimensions import TrackPointExtensionParams
+from tp_extension_builder.tp_caps import build_cap_adapter
+from tp_extension_builder.tp_extensions import (
+    TrackPointExtensionBase,
+    build_round_sections,
+)
+from tp_extension_builder.utils import ALIGN_CENTER_BOTTOM
+
+
+PARAMS = [
+    TrackPointExtensionParams(),
+    TrackPointExtensionParams(
+        adapter_hole_incr=0.0,
+        desired_cap_height=9.5,
+        tp_mounting_distance=1.2,
+    ),
+    TrackPointExtensionParams(
+        adapter_hole_incr=0.3,
+        desired_cap_height=14.0,
+        tp_mounting_distance=0.0,
+        pcb_height=1.6,
+    ),
+]
+
+# A single parameter is changed from the defaults, like when the extension
+# is tuned interactively or swept along one axis
+PARAM_CHANGES = {
+    'cap height': {'desired_cap_height': 11.0},
+    'hole increase': {'adapter_hole_incr': 0.3},
+    'width above PCB': {'adapter_width_above_pcb': 4.5},
+    'mounting distance': {'tp_mounting_distance': 1.0},
+}
+
+
+def build_extension_legacy(
+    extension: TrackPointExtensionBase,
+) -> bd.Shape[Any]:
+    """
+    The construction before the locations of the sections were calculated
+    from their heights.
+    """
+    with bd.BuildPart() as tp_extension:
+        below_pcb_adapter = bd.Cylinder(
+            radius=extension._adapter_width_below_pcb / 2,
+            height=extension._adapter_height_below_pcb,
+            align=ALIGN_CENTER_BOTTOM,
+        )
+
+        topf = below_pcb_adapter.faces().sort_by(bd.Axis.Z)[-1]
+        with bd.Locations(topf):
+            above_pcb_adapter = bd.Cylinder(
+                radius=extension._adapter_width_above_pcb / 2,
+                height=extension._adapter_height_above_pcb,
+                align=ALIGN_CENTER_BOTTOM,
+            )
+
+        topf = above_pcb_adapter.faces().sort_by(bd.Axis.Z)[-1]
+        with bd.Locations(topf):
+            extension_cylinder = bd.Cylinder(
+                radius=extension._extension_width / 2,
+                height=extension._extension_height,
+                align=ALIGN_CENTER_BOTTOM,
+            )
+
+        topf = extension_cylinder.faces().sort_by(bd.Axis.Z)[-1]
+        with bd.Locations(topf):
+            cap_adapter = build_cap_adapter(
+                extension._tp_cap_dimensions,
+                align=ALIGN_CENTER_BOTTOM,
+            )
+            bd.add(cap_adapter)
+
+        bd.Box(
+            width=extension._adapter_hole_width,
+            length=extension._adapter_hole_width,
+            height=extension._adapter_hole_height,
+            mode=bd.Mode.SUBTRACT,
+            align=ALIGN_CENTER_BOTTOM,
+        )
+
+    return cast(bd.Shape[Any], tp_extension.part)
+
+
+def build_uncached(extension: TrackPointExtensionBase) -> bd.Shape[Any]:
+    tp_extensions._extension_sections.clear()
+    return extension._build_extension()
+
+
+def add_revolved_body(extension: TrackPointExtensionBase) -> None:
+    """
+    Adds the round sections by revolving their stepped outline around the
+    Z axis, so they don't have to be fused.
+    """
+    bd.add(build_round_sections(extension._get_body_sections()))
+
+
+def add_fused_body(extension: TrackPointExtensionBase) -> None:
+    """
+    Adds the round sections as one cylinder per section, placed at the
+    heights of the sections below instead of on their top faces.
+    """
+    z = 0.0
+    for radius, height in extension._get_body_sections():
+        with bd.Locations((0, 0, z)):
+            bd.Cylinder(
+                radius=radius,
+                height=height,
+                align=ALIGN_CENTER_BOTTOM,
+            )
+
+        z += height
+
+
+def build_extension_with_body(
+    extension: TrackPointExtensionBase,
+    add_body: Callable[[TrackPointExtensionBase], None],
+) -> bd.Shape[Any]:
+    """
+    Builds the extension in a single BuildPart from the round sections that
+    `add_body` adds.
+    """
+    cap_adapter_z = extension._adapter_height + extension._extension_height
+
+    with bd.BuildPart() as tp_extension:
+        add_body(extension)
+
+        with bd.Locations((0, 0, cap_adapter_z)):
+            cap_adapter = build_cap_adapter(
+                extension._tp_cap_dimensions,
+                align=ALIGN_CENTER_BOTTOM,
+            )
+            bd.add(cap_adapter)
+
+        bd.Box(
+            width=extension._adapter_hole_width,
+            length=extension._adapter_hole_width,
+            height=extension._adapter_hole_height,
+            mode=bd.Mode.SUBTRACT,
+            align=ALIGN_CENTER_BOTTOM,
+        )
+
+    return cast(bd.Shape[Any], tp_extension.part)
+
+
+CONSTRUCTIONS: Dict[
+    str, Callable[[TrackPointExtensionBase], bd.Shape[Any]]
+] = {
+    'sections': build_uncached,
+    'revolved': lambda extension: build_extension_with_body(
+        extension, add_revolved_body
+    ),
+    'fused': lambda extension: build_extension_with_body(
+        extension, add_fused_body
+    ),
+}
+
+
+def time_rebuild(
+    base_extension: TrackPointExtensionBase,
+    changed_extension: TrackPointExtensionBase,
+    runs: int,
+) -> float:
+    """
+    Returns the best time in seconds to build the changed extension after
+    the base extension was built.
+    """
+
+    def prepare() -> Callable[[], Any]:
+        build_uncached(base_extension)
+        return changed_extension._build_extension
+
+    return time_prepared(prepare, runs)
+
+
+def get_step_size(shape: bd.Shape[Any]) -> int:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        step_path = Path(tmp_dir) / 'extension.step'
+        bd.export_step(shape, str(step_path))
+
+        return step_path.stat().st_size
+
+
+def get_differences(
+    expected: bd.Shape[Any],
+    actual: bd.Shape[Any],
+    tolerance: float,
+) -> List[str]:
+    """
+    Returns a description of every way in which the solids differ.
+    """
+    differences = []
+
+    if abs(expected.volume - actual.volume) > tolerance:
+        differences.append(
+            f'volume {expected.volume:.6f} != {actual.volume:.6f}'
+        )
+
+    expected_box = expected.bounding_box()
+    actual_box = actual.bounding_box()
+    for name in ['min', 'max']:
+        expected_corner = getattr(expected_box, name)
+        actual_corner = getattr(actual_box, name)
+        if (expected_corner - actual_corner).length > tolerance:
+            differences.append(
+                f'bounding box {name} {expected_corner} != {actual_corner}'
+            )
+
+    counts: Dict[str, Callable[[bd.Shape[Any]], int]] = {
+        'solids': lambda shape: len(shape.solids()),
+        'faces': lambda shape: len(shape.faces()),
+        'edges': lambda shape: len(shape.edges()),
+    }
+    for name, count in counts.items():
+        if count(expected) != count(actual):
+            differences.append(f'{name} {count(expected)} != {count(actual)}')
+
+    difference_volume = (
+        cast(bd.Shape[Any], expected - actual).volume
+        + cast(bd.Shape[Any], actual - expected).volume
+    )
+    if difference_volume > tolerance:
+        differences.append(f'symmetric difference {difference_volume:.6f}')
+
+    return differences
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    failures = []
+
+    header = f'{"Extension":<36} {"legacy":>10}'
+    for construction_name in CONSTRUCTIONS:
+        header += f' {construction_name:>10}'
+    print(f'{header} {"STEP size":>{11 * len(CONSTRUCTIONS) + 10}}')
+
+    for extension_class in TrackPointExtensionBase.__subclasses__():
+        for i, params in enumerate(PARAMS):
+            name = f'{extension_class.__name__} #{i}'
+
+            legacy_extension = extension_class.from_params(params)
+            expected = build_extension_legacy(legacy_extension)
+            legacy_ms = 1000 * time_func(
+                lambda: build_extension_legacy(legacy_extension),
+                args.runs,
+            )
+
+            timings = f'{legacy_ms:>8.2f}ms'
+            step_sizes = f'{get_step_size(expected) / 1000:>8.1f}kB'
+            extension = extension_class.from_params(params)
+            for construction_name, build in CONSTRUCTIONS.items():
+                actual = build(extension)
+                differences = get_differences(expected, actual, args.tolerance)
+                if differences:
+                    failures.append(
+                        f'{name} {construction_name}: {", ".join(differences)}'
+                    )
+
+                current_ms = 1000 * time_func(
+                    lambda: build(extension),
+                    args.runs,
+                )
+                timings += f' {current_ms:>8.2f}ms'
+                step_sizes += f' {get_step_size(actual) / 1000:>8.1f}kB'
+
+            print(f'{name:<36} {timings} {step_sizes}')
+
+    print(f'\n{"Changed parameter":<52} {"cold":>10} {"rebuild":>10}')
+    base_params = PARAMS[0]
+    for extension_class in TrackPointExtensionBase.__subclasses__():
+        base_extension = extension_class.from_params(base_params)
+        for change_name, change in PARAM_CHANGES.items():
+            name = f'{extension_class.__name__} {change_name}'
+            params = dataclasses.replace(base_params, **change)
+            extension = extension_class.from_params(params)
+
+            build_uncached(base_extension)
+            differences = get_differences(
+                build_extension_legacy(extension),
+                extension._build_extension(),
+                args.tolerance,
+            )
+            if differences:
+                failures.append(f'{name} rebuild: {", ".join(differences)}')
+
+            cold_ms = 1000 * time_func(
+                lambda: build_uncached(extension), args.runs
+            )
+            rebuild_ms = 1000 * time_rebuild(
+                base_extension, extension, args.runs
+            )
+            print(f'{name:<52} {cold_ms:>8.2f}ms {rebuild_ms:>8.2f}ms')
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f'FAIL: {failure}')
+        sys.exit(1)
+
+    print('\nAll extensions are identical.')
+
+
+if __name__ == '__main__':
+    main()
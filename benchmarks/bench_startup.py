@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Checks the startup time budget of the CLI.
+
+The requests that don't build anything must not import the CLI framework
+or the CAD kernel:
+
+  - `python -X importtime` is used to verify which modules every request
+    imports. This doesn't depend on the speed of the machine, so it's the
+    check that catches most regressions.
+  - The wall time of every request is compared with the budget.
+
+The help and completion requests are run once to fill the output cache
+before they are timed.
+
+Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--budget-ms 150]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from typing import Dict, List, Optional, Tuple
+
+
+# Runs the launcher like the installed `tp_extension_builder` command, so
+# that the completion environment variable matches the program name
+LAUNCHER_CODE = (
+    'import sys; '
+    'sys.argv[0] = "tp_extension_builder"; '
+    'from tp_extension_builder.launcher import main; '
+    'main()'
+)
+
+# Modules that are too slow for the requests that don't build anything
+FORBIDDEN_MODULES = ['OCP', 'build123d', 'typer', 'click', 'rich']
+
+IMPORT_TIME_REGEX = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$',
+)
+
+# (name, arguments, extra environment variables)
+REQUESTS: List[Tuple[str, List[str], Dict[str, str]]] = [
+    ('--version', ['--version'], {}),
+    ('--help', ['--help'], {}),
+    ('build --help', ['build', '--help'], {}),
+    (
+        'bash completion',
+        [],
+        {
+            '_TP_EXTENSION_BUILDER_COMPLETE': 'complete_bash',
+            'COMP_WORDS': 'tp_extension_builder b',
+            'COMP_CWORD': '1',
+        },
+    ),
+    (
+        'zsh completion',
+        [],
+        {
+            '_TP_EXTENSION_BUILDER_COMPLETE': 'complete_zsh',
+            '_TYPER_COMPLETE_ARGS': 'tp_extension_builder combine --',
+        },
+    ),
+]
+
+
+def run_launcher(
+    args: List[str],
+    env: Dict[str, str],
+    python_args: Optional[List[str]] = None,
+) -> Tuple[float, subprocess.CompletedProcess[str]]:
+    """
+    Returns the wall time in seconds and the finished process.
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, *(python_args or []), '-c', LAUNCHER_CODE, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    return (time.perf_counter() - start, process)
+
+
+def get_imported_modules(import_time_output: str) -> Dict[str, float]:
+    """
+    Returns the cumulative import time in milliseconds of every module in
+    the output of `python -X importtime`.
+    """
+    modules = {}
+    for line in import_time_output.splitlines():
+        match = IMPORT_TIME_REGEX.match(line)
+        if match is not None:
+            modules[match.group(4)] = int(match.group(2)) / 1000
+
+    return modules
+
+
+def get_forbidden_modules(modules: Dict[str, float]) -> List[str]:
+    return [
+        module
+        for module in FORBIDDEN_MODULES
+        if any(
+            name == module or name.startswith(f'{module}.') for name in modules
+        )
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=150.0)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        base_env = dict(os.environ)
+        base_env['TP_EXTENSION_BUILDER_CACHE_DIR'] = cache_dir
+
+        print(
+            f'{"Request":<18} {"cold":>8} {"warm":>8} {"modules":>8}  '
+            'forbidden modules'
+        )
+        for name, request_args, extra_env in REQUESTS:
+            env = {**base_env, **extra_env}
+
+            cold_s, process = run_launcher(request_args, env)
+            if process.returncode != 0:
+                failures.append(f'{name} failed: {process.stderr.strip()}')
+                continue
+
+            _, process = run_launcher(
+                request_args,
+                env,
+                python_args=['-X', 'importtime'],
+            )
+            modules = get_imported_modules(process.stderr)
+            forbidden_modules = get_forbidden_modules(modules)
+            if forbidden_modules:
+                failures.append(
+                    f'{name} imports {", ".join(forbidden_modules)}'
+                )
+
+            warm_s = min(
+                run_launcher(request_args, env)[0] for _ in range(args.runs)
+            )
+            if warm_s * 1000 > args.budget_ms:
+                failures.append(
+                    f'{name} took {warm_s * 1000:.0f}ms, the budget is '
+                    f'{args.budget_ms:.0f}ms'
+                )
+
+            print(
+                f'{name:<18} {cold_s * 1000:>6.0f}ms {warm_s * 1000:>6.0f}ms '
+                f'{len(modules):>8} '
+                f'{", ".join(forbidden_modules) or "-"}'
+            )
+
+    if failures:
+        print()
+        for failure in failures:
+            print(f'FAIL: {failure}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Compares the STL writers on a combined plate:
+
+  - `export_stl()`, which tessellates the shape with `bd.export_stl()`
+  - Reading the triangulation of every face into a `Mesh` and writing it
+    with the bulk writer `write_stl()`
+  - Combining the STL files of the parts as meshes and writing them with
+    `write_stl()`, like `combine` does for STL files
+
+Usage: python benchmarks/bench_stl.py [--parts 20] [--cap] [--runs 3]
+"""
+
+import argparse
+import os
+import tempfile
+
+from pathlib import Path
+from typing import Any, Callable, List, Tuple
+
+import build123d as bd
+import numpy as np
+
+from OCP.BRep import BRep_Tool
+from OCP.BRepMesh import BRepMesh_IncrementalMesh
+from OCP.BRepTools import BRepTools
+from OCP.TopAbs import TopAbs_FACE, TopAbs_REVERSED
+from OCP.TopExp import TopExp_Explorer
+from OCP.TopLoc import TopLoc_Location
+from OCP.TopoDS import TopoDS
+
+from timing import time_func
+from tp_extension_builder.defines import (
+    D_STL_ANGULAR_TOLERANCE,
+    D_STL_TOLERANCE,
+)
+from tp_extension_builder.mesh import (
+    Mesh,
+    combine_meshes,
+    read_stl,
+    write_stl,
+)
+from tp_extension_builder.tp_extensions import TrackPointExtensionRedT460S
+from tp_extension_builder.utils import combine_shapes, export_stl
+
+
+def make_parts(count: int, include_cap: bool) -> List[bd.Shape[Any]]:
+    """
+    Returns extensions with different hole sizes, so the parts don't share
+    any geometry.
+    """
+    parts = []
+    for part_num in range(count):
+        extension = TrackPointExtensionRedT460S(
+            adapter_hole_incr=0.1 + part_num * 0.01,
+            desired_cap_height=10.5,
+            tp_mounting_distance=0.0,
+        )
+        if include_cap is True:
+            parts.append(extension.for_kicad(include_cap=True))
+        else:
+            parts.append(bd.Compound(extension.wrapped))
+
+    return parts
+
+
+def get_mesh(shape: bd.Shape[Any]) -> Mesh:
+    """
+    Reads the triangulation of every face of the meshed shape.
+    """
+    triangles = []
+    explorer = TopExp_Explorer(shape.wrapped, TopAbs_FACE)
+    while explorer.More():
+        face = TopoDS.Face_s(explorer.Current())
+        location = TopLoc_Location()
+        triangulation = BRep_Tool.Triangulation_s(face, location)
+        if triangulation is not None:
+            transform = location.Transformation()
+            nodes = np.array(
+                [
+                    triangulation.Node(i).Transformed(transform).Coord()
+                    for i in range(1, triangulation.NbNodes() + 1)
+                ]
+            )
+            indices = (
+                np.array(
+                    [
+                        triangulation.Triangle(i).Get()
+                        for i in range(1, triangulation.NbTriangles() + 1)
+                    ]
+                )
+                - 1
+            )
+            if face.Orientation() == TopAbs_REVERSED:
+                indices = indices[:, [0, 2, 1]]
+            triangles.append(nodes[indices])
+        explorer.Next()
+
+    return Mesh(np.concatenate(triangles))
+
+
+def write_bulk_stl(shape: bd.Shape[Any], file_path: Path) -> None:
+    BRepTools.Clean_s(shape.wrapped)
+    BRepMesh_IncrementalMesh(
+        shape.wrapped, D_STL_TOLERANCE, True, D_STL_ANGULAR_TOLERANCE, True
+    )
+    write_stl(file_path, get_mesh(shape))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parts', type=int, default=20)
+    parser.add_argument(
+        '--cap',
+        action='store_true',
+        help='Adds the cap to every part like KiCad models.',
+    )
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    parts = make_parts(args.parts, include_cap=args.cap)
+    plate = combine_shapes(parts, distance=0.5, add_sprue=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+
+        part_paths = []
+        for part_num, part in enumerate(parts):
+            part_path = tmp_path / f'part_{part_num}.stl'
+            export_stl(part, part_path)
+            part_paths.append(part_path)
+
+        def write_combined_meshes() -> None:
+            write_stl(
+                tmp_path / 'meshes.stl',
+                combine_meshes(
+                    meshes=map(read_stl, part_paths),
+                    distance=0.5,
+                    add_sprue=True,
+                ),
+            )
+
+        writers: List[Tuple[str, str, Callable[[], None]]] = [
+            (
+                'export_stl()',
+                'export.stl',
+                lambda: export_stl(plate, tmp_path / 'export.stl'),
+            ),
+            (
+                'Triangulation + write_stl()',
+                'bulk.stl',
+                lambda: write_bulk_stl(plate, tmp_path / 'bulk.stl'),
+            ),
+            ('Combined meshes', 'meshes.stl', write_combined_meshes),
+        ]
+
+        print(f'{"Writer":<30} {"time":>8} {"triangles":>10} {"size":>10}')
+        for name, file_name, writer in writers:
+            write_s = time_func(writer, args.runs)
+            file_size = os.path.getsize(tmp_path / file_name)
+            triangle_count = read_stl(tmp_path / file_name).triangle_count
+            print(
+                f'{name:<30} {write_s:>7.3f}s {triangle_count:>10} '
+                f'{file_size / 1024 / 1024:>8.2f}MB'
+            )
+
+
+if __name__ == '__main__':
+    main()
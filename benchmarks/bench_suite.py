@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Times the main build, combine and export paths and compares them with a
+baseline to catch performance regressions:
+
+  - Every `TrackPointCapBase` and `TrackPointExtensionBase` subclass
+  - `for_kicad()` with and without the cap
+  - `combine_shapes()` with 2, 10 and 50 parts
+  - The STEP, gzip compressed STEP, STL and 3MF exports
+
+The best time of all runs is used. The per-process caches of caps, dot
+patterns and extension sections are cleared before every run, so every run
+builds from scratch.
+
+Timings depend on the machine, so create the baseline on the machine that
+runs the comparison, e.g. on CI from the main branch:
+
+    python benchmarks/bench_suite.py --save benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json
+
+The comparison exits with status 1 if a case got slower than the baseline
+by more than the threshold.
+
+Usage: python benchmarks/bench_suite.py [--runs 3] [--filter cap/]
+           [--save FILE] [--compare FILE] [--threshold 0.25]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+
+from dataclasses import dataclass
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import build123d as bd
+
+from timing import time_prepared
+from tp_extension_builder.dimensions import TrackPointExtensionParams
+from tp_extension_builder.tp_caps import TrackPointCapBase
+from tp_extension_builder.tp_extensions import (
+    TrackPointExtensionBase,
+    TrackPointExtensionRedT460S,
+)
+from tp_extension_builder.utils import (
+    clear_shape_caches,
+    combine_shapes,
+    export_3mf,
+    export_step_gz,
+    export_stl,
+)
+
+
+# Cases that differ by less than this are never reported, because the
+# timer noise is larger than the difference
+MIN_REGRESSION_S = 0.005
+
+COMBINE_PART_COUNTS = [2, 10, 50]
+
+# The CLI defaults
+EXTENSION_PARAMS = TrackPointExtensionParams()
+
+
+@dataclass
+class BenchCase:
+    """
+    `prepare` is not timed and returns the function that is timed.
+    """
+
+    name: str
+    prepare: Callable[[], Callable[[], Any]]
+
+
+def make_extension() -> bd.Shape[Any]:
+    extension = TrackPointExtensionRedT460S.from_params(EXTENSION_PARAMS)
+
+    return bd.Compound(extension.wrapped)
+
+
+def get_cases(export_dir: Path) -> List[BenchCase]:
+    cases = []
+
+    for cap_class in TrackPointCapBase.__subclasses__():
+
+        def prepare_cap(
+            cap_class: Type[TrackPointCapBase] = cap_class,
+        ) -> Callable[[], Any]:
+            return cap_class
+
+        cases.append(
+            BenchCase(name=f'cap/{cap_class.__name__}', prepare=prepare_cap)
+        )
+
+    for extension_class in TrackPointExtensionBase.__subclasses__():
+
+        def prepare_extension(
+            extension_class: Type[TrackPointExtensionBase] = extension_class,
+        ) -> Callable[[], Any]:
+            return lambda: extension_class.from_params(EXTENSION_PARAMS)
+
+        cases.append(
+            BenchCase(
+                name=f'extension/{extension_class.__name__}',
+                prepare=prepare_extension,
+            )
+        )
+
+    for include_cap in [True, False]:
+        suffix = 'with_cap' if include_cap is True else 'without_cap'
+
+        def prepare_kicad(
+            include_cap: bool = include_cap,
+        ) -> Callable[[], Any]:
+            extension = TrackPointExtensionRedT460S.from_params(
+                EXTENSION_PARAMS
+            )
+
+            return lambda: extension.for_kicad(include_cap=include_cap)
+
+        cases.append(BenchCase(name=f'kicad/{suffix}', prepare=prepare_kicad))
+
+    for part_count in COMBINE_PART_COUNTS:
+
+        def prepare_combine(part_count: int = part_count) -> Callable[[], Any]:
+            shape = make_extension()
+            shapes = [shape.moved(bd.Location()) for _ in range(part_count)]
+
+            return lambda: combine_shapes(
+                shapes,
+                distance=0.5,
+                add_sprue=True,
+                sprue_radius=0.75,
+            )
+
+        cases.append(
+            BenchCase(name=f'combine/{part_count}', prepare=prepare_combine)
+        )
+
+    exporters: Dict[str, Callable[[bd.Shape[Any], Path], Any]] = {
+        'step': lambda shape, path: bd.export_step(shape, str(path)),
+        'step.gz': export_step_gz,
+        'stl': export_stl,
+        '3mf': export_3mf,
+    }
+    for export_format, exporter in exporters.items():
+
+        def prepare_export(
+            export_format: str = export_format,
+            exporter: Callable[[bd.Shape[Any], Path], Any] = exporter,
+        ) -> Callable[[], Any]:
+            shape = make_extension()
+            file_path = export_dir / f'export.{export_format}'
+
+            return lambda: exporter(shape, file_path)
+
+        cases.append(
+            BenchCase(name=f'export/{export_format}', prepare=prepare_export)
+        )
+
+    return cases
+
+
+def time_case(case: BenchCase, runs: int) -> float:
+    """
+    Returns the best time of all runs in seconds.
+    """
+
+    def prepare() -> Callable[[], Any]:
+        clear_shape_caches()
+        return case.prepare()
+
+    return time_prepared(prepare, runs)
+
+
+def get_machine_info() -> Dict[str, str]:
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'build123d': version('build123d'),
+    }
+
+
+def compare_results(
+    results: Dict[str, float],
+    baseline: Dict[str, Any],
+    threshold: float,
+) -> List[str]:
+    """
+    Prints the change of every case and returns the regressed cases.
+    """
+    if baseline['machine'] != get_machine_info():
+        print(
+            'Warning: The baseline was created on a different machine or '
+            'with different versions, so the timings may not be comparable.'
+        )
+
+    regressions = []
+    print(
+        f'\n{"Case":<44} {"baseline":>9} {"current":>9} {"change":>8}  status'
+    )
+    for name, current_s in results.items():
+        baseline_s: Optional[float] = baseline['results'].get(name)
+        if baseline_s is None:
+            print(f'{name:<44} {"-":>9} {current_s:>8.3f}s {"-":>8}  new')
+            continue
+
+        change = current_s / baseline_s - 1 if baseline_s > 0 else 0.0
+        status = 'ok'
+        if change > threshold and current_s - baseline_s > MIN_REGRESSION_S:
+            status = 'REGRESSION'
+            regressions.append(name)
+        elif change < -threshold:
+            status = 'faster'
+
+        print(
+            f'{name:<44} {baseline_s:>8.3f}s {current_s:>8.3f}s '
+            f'{change * 100:>+7.1f}%  {status}'
+        )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument(
+        '--filter',
+        default='',
+        help='Only runs the cases whose name contains this text.',
+    )
+    parser.add_argument(
+        '--save',
+        type=Path,
+        help='Writes the results to this file to use them as the baseline.',
+    )
+    parser.add_argument(
+        '--compare',
+        type=Path,
+        help='Compares the results with the baseline in this file.',
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.25,
+        help='The slowdown that counts as a regression, 0.25 means 25%%.',
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as export_dir:
+        cases = [
+            case
+            for case in get_cases(Path(export_dir))
+            if args.filter in case.name
+        ]
+
+        print(f'{"Case":<44} {"time":>9}')
+        for case in cases:
+            results[case.name] = time_case(case, args.runs)
+            print(f'{case.name:<44} {results[case.name]:>8.3f}s')
+
+    if args.save is not None:
+        args.save.write_text(
+            json.dumps(
+                {'machine': get_machine_info(), 'results': results},
+                indent=2,
+            )
+        )
+        print(f'\nWrote baseline to {args.save}')
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare_results(results, baseline, args.threshold)
+        if regressions:
+            print(
+                f'\n{len(regressions)} case(s) are more than '
+                f'{args.threshold * 100:.0f}% slower than the baseline: '
+                f'{", ".join(regressions)}'
+            )
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+The timing helpers of the benchmarks.
+
+Every benchmark reports the best time of all runs in seconds, because the
+other runs only add the noise of the machine.
+"""
+
+import time
+
+from typing import Any, Callable
+
+
+def time_prepared(
+    prepare: Callable[[], Callable[[], Any]],
+    runs: int,
+) -> float:
+    """
+    Returns the best time of all runs in seconds.
+
+    `prepare` is called before every run without being timed and returns
+    the function that is timed, e.g. after clearing the caches.
+    """
+    timings = []
+    for _ in range(runs):
+        func = prepare()
+
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def time_func(func: Callable[[], Any], runs: int) -> float:
+    """
+    Returns the best time of all runs of the function in seconds.
+    """
+    return time_prepared(lambda: func, runs)
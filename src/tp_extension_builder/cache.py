@@ -0,0 +1,320 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from tp_extension_builder.defines import D_CACHE_MAX_SIZE_MB
+from tp_extension_builder.launcher import get_package_key
+from tp_extension_builder.profiling import profile_span
+
+if TYPE_CHECKING:
+    # Importing build123d is very slow. So we only import it when a cache
+    # entry is actually read or written and during type checking.
+    from build123d import Shape
+
+
+CACHE_FORMAT_VERSION = 1
+CACHE_META_FILE_NAME = 'meta.json'
+
+# The libraries that build the shapes. A new version of the CAD kernel can
+# build different shapes from the same code.
+CAD_LIBRARIES = ['build123d', 'cadquery-ocp']
+
+
+def get_library_versions() -> Dict[str, str]:
+    """
+    Returns the installed version of every library in `CAD_LIBRARIES`.
+    """
+    # Imported here, because only building models needs the versions
+    import importlib.metadata
+
+    versions = {}
+    for library in CAD_LIBRARIES:
+        try:
+            versions[library] = importlib.metadata.version(library)
+        except importlib.metadata.PackageNotFoundError:
+            versions[library] = 'unknown'
+
+    return versions
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns the directory where built shapes are cached.
+
+    Can be overridden with the `TP_EXTENSION_BUILDER_CACHE_DIR` environment
+    variable and otherwise follows the XDG base directory spec.
+    """
+    cache_dir = os.environ.get('TP_EXTENSION_BUILDER_CACHE_DIR')
+    if cache_dir:
+        return Path(cache_dir)
+
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME')
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / 'tp_extension_builder'
+
+    return Path.home() / '.cache' / 'tp_extension_builder'
+
+
+@dataclass
+class CachedBuild:
+    """
+    A cache hit: the restored shape and the info text of the original build.
+    """
+
+    key: str
+    shape: 'Shape[Any]'
+    info: Optional[str]
+
+
+class BuildCache:
+    """
+    Content-addressed on-disk cache for built shapes.
+
+    Every entry is a directory named after the hash of the parameters that
+    produced the shape. It contains the shape as one or more BRep files and
+    a `meta.json` file with labels, colors and the build info.
+
+    The cache is limited to `max_size_mb` and the least recently used
+    entries are evicted first. A value of 0 or less disables the limit.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size_mb: float = D_CACHE_MAX_SIZE_MB,
+        enabled: bool = True,
+    ) -> None:
+        if cache_dir is None:
+            cache_dir = get_cache_dir()
+
+        self.cache_dir = Path(cache_dir)
+        self.max_size_mb = max_size_mb
+        self.enabled = enabled
+
+        self._library_versions: Optional[Dict[str, str]] = None
+
+    def _get_library_versions(self) -> Dict[str, str]:
+        # Looking up the versions scans the installed packages, which
+        # shouldn't happen for every key of a sweep
+        if self._library_versions is None:
+            self._library_versions = get_library_versions()
+
+        return self._library_versions
+
+    def get_key(self, **params: Any) -> str:
+        """
+        Returns the cache key for a set of build parameters.
+
+        Enums are stored by value. The package key and the versions of the
+        CAD libraries are always added, so entries that were built by
+        different code or a different CAD kernel are never reused. The
+        package key changes with every edit of the source files, even in
+        editable installs where the version stays the same.
+        """
+        key_params = {
+            name: value.value if isinstance(value, Enum) else value
+            for name, value in params.items()
+        }
+        key_params['_package_key'] = get_package_key()
+        key_params['_library_versions'] = self._get_library_versions()
+        key_params['_cache_format_version'] = CACHE_FORMAT_VERSION
+
+        key_json = json.dumps(key_params, sort_keys=True, default=str)
+
+        return hashlib.sha256(key_json.encode('utf-8')).hexdigest()
+
+    def load(self, key: str) -> Optional[CachedBuild]:
+        """
+        Returns the cached build for the key or None if there is no entry.
+        """
+        if self.enabled is False:
+            return None
+
+        entry_dir = self.cache_dir / key
+        meta_path = entry_dir / CACHE_META_FILE_NAME
+
+        try:
+            with profile_span('cache_load'):
+                meta = json.loads(meta_path.read_text())
+                shape = self._read_shape(entry_dir, meta['shape'])
+        except (OSError, ValueError, KeyError) as e:
+            if entry_dir.exists():
+                print(f'Ignoring broken cache entry {key}: {e}')
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # Mark the entry as recently used for the LRU eviction
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+        return CachedBuild(key=key, shape=shape, info=meta.get('info'))
+
+    def store(
+        self,
+        key: str,
+        shape: 'Shape[Any]',
+        info: Optional[str] = None,
+    ) -> None:
+        """
+        Writes the shape to the cache and evicts old entries if the cache
+        grew beyond its size limit.
+
+        Errors are printed and otherwise ignored, because a failing cache
+        should never fail a build.
+        """
+        if self.enabled is False:
+            return
+
+        entry_dir = self.cache_dir / key
+        tmp_dir = None
+
+        try:
+            self.cache_dir.mkdir(exist_ok=True, parents=True)
+
+            # Write into a temporary dir first so that concurrent builds
+            # never see half-written entries.
+            tmp_dir = Path(
+                tempfile.mkdtemp(prefix=f'.{key}-', dir=self.cache_dir)
+            )
+            with profile_span('cache_store'):
+                shape_meta = self._write_shape(tmp_dir, shape, 'shape')
+            meta = {
+                'created': time.time(),
+                'info': info,
+                'shape': shape_meta,
+            }
+            (tmp_dir / CACHE_META_FILE_NAME).write_text(
+                json.dumps(meta, indent=2)
+            )
+
+            if entry_dir.exists():
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            else:
+                tmp_dir.rename(entry_dir)
+        except OSError as e:
+            print(f'Could not write cache entry {key}: {e}')
+            if tmp_dir is not None:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self) -> List[str]:
+        """
+        Removes the least recently used entries until the cache fits into
+        `max_size_mb` and returns the keys of the removed entries.
+        """
+        if self.max_size_mb <= 0:
+            return []
+
+        entries = self._get_entries()
+        total_size = sum(size for _, _, size in entries)
+        max_size = self.max_size_mb * 1024 * 1024
+
+        evicted = []
+        for entry_dir, _, size in sorted(entries, key=lambda e: e[1]):
+            if total_size <= max_size:
+                break
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= size
+            evicted.append(entry_dir.name)
+
+        return evicted
+
+    def _get_entries(self) -> List[Tuple[Path, float, int]]:
+        """
+        Returns the path, last use time and size of every cache entry.
+        """
+        if not self.cache_dir.is_dir():
+            return []
+
+        entries = []
+        for entry_dir in self.cache_dir.iterdir():
+            meta_path = entry_dir / CACHE_META_FILE_NAME
+            if entry_dir.name.startswith('.') or not meta_path.is_file():
+                continue
+
+            try:
+                last_used = meta_path.stat().st_mtime
+                size = sum(f.stat().st_size for f in entry_dir.iterdir())
+            except OSError:
+                continue
+
+            entries.append((entry_dir, last_used, size))
+
+        return entries
+
+    def _write_shape(
+        self,
+        entry_dir: Path,
+        shape: 'Shape[Any]',
+        name: str,
+    ) -> Dict[str, Any]:
+        """
+        Writes a shape and its children to BRep files and returns the
+        metadata needed to restore them.
+
+        Assemblies are stored per child, so that labels and colors of the
+        individual parts survive the round trip.
+        """
+        from build123d import Part, export_brep
+
+        meta: Dict[str, Any] = {
+            'label': shape.label,
+            'color': tuple(shape.color) if shape.color else None,
+            'is_part': isinstance(shape, Part),
+        }
+
+        if shape.children:
+            meta['children'] = [
+                self._write_shape(entry_dir, child, f'{name}_{i}')
+                for i, child in enumerate(shape.children)
+            ]
+        else:
+            file_name = f'{name}.brep'
+            export_brep(shape, str(entry_dir / file_name))
+            meta['file'] = file_name
+
+        return meta
+
+    def _read_shape(
+        self, entry_dir: Path, meta: Dict[str, Any]
+    ) -> 'Shape[Any]':
+        """
+        Restores a shape written by `_write_shape`.
+        """
+        from build123d import Color, Compound, Part, import_brep
+
+        if 'children' in meta:
+            children = [
+                self._read_shape(entry_dir, child_meta)
+                for child_meta in meta['children']
+            ]
+            shape: 'Shape[Any]' = Compound(children=children)
+        else:
+            brep_path = entry_dir / meta['file']
+            if not brep_path.is_file():
+                raise ValueError(f'{brep_path} is missing')
+            shape = import_brep(str(brep_path))
+
+            # Parts need to be restored as such, because the STEP exporter
+            # only applies colors to known compound types.
+            if meta.get('is_part') is True:
+                shape = Part(shape.wrapped)
+
+        shape.label = meta['label']
+        if meta['color'] is not None:
+            shape.color = Color(*meta['color'])
+
+        return shape
@@ -1,16 +1,44 @@
 #!/usr/bin/env python
 
+import hashlib
+import json
+import time
 import typer
 
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Annotated, Optional, List, Union, Any
+from typing import (
+    Annotated,
+    Optional,
+    List,
+    Union,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Tuple,
+    TypeVar,
+)
 from enum import Enum
 
+from tp_extension_builder.cache import BuildCache
+from tp_extension_builder.dimensions import (
+    TrackPointExtensionDimensions,
+    TrackPointExtensionParams,
+)
+
 from tp_extension_builder.cli_helpers import (
     get_export_path,
+    get_file_name_suffix_from_params,
+    get_stl_tolerances,
     TrackPointModel,
     ExportFormat,
     app_version_callback,
+    get_sweep_variants,
+    make_sweep_option,
+    parse_sweep_values,
+    PARAMS_PLACEHOLDERS,
 )
 
 from tp_extension_builder.defines import (
@@ -22,9 +50,14 @@ from tp_extension_builder.defines import (
     D_ADAPTER_WIDTH_BELOW_PCB,
     D_ADAPTER_WIDTH_ABOVE_PCB,
     D_EXTENSION_WIDTH,
+    D_CACHE_MAX_SIZE_MB,
+    D_SERVER_IDLE_TIMEOUT_MIN,
+    DetailLevel,
 )
 
 
+T = TypeVar('T')
+
 app = typer.Typer(
     no_args_is_help=True,
     add_completion=True,
@@ -38,7 +71,6 @@ app = typer.Typer(
 )
 app.callback()(app_version_callback)
 
-
 D_EXPORT_PATH = get_export_path(
     'tp_extension_<tp_model>_<parameters>.<format>'
 )
@@ -52,11 +84,8 @@ def substitute_export_path(
     export_path: Union[str, Path],
     tp_model: Optional[Union[TrackPointModel, str]],
     export_format: ExportFormat,
-    param_suffix_func_offset: int = 0,
+    param_suffix: str = '',
 ) -> Path:
-    # Ger params of previous func and not this one
-    param_suffix_func_offset += 1
-
     if isinstance(tp_model, Enum):
         tp_model = tp_model.value
 
@@ -66,16 +95,29 @@ def substitute_export_path(
 
     export_path = export_format.substitute_file_path(
         file_path=export_path,
+        param_suffix=param_suffix,
         extra_substitutions=extra_substitutions,
-        param_suffix_exclude_list=[
-            'trackpoint_model',
-        ],
-        param_suffix_func_offset=param_suffix_func_offset,
     )
 
     return export_path
 
 
+def get_extension_param_suffix(
+    command: Callable[..., Any],
+    tp_cap_model: Optional[TrackPointModel],
+    params: TrackPointExtensionParams,
+) -> str:
+    """
+    Returns the file name suffix with the short option names of the command
+    for the parameters that differ from the defaults.
+    """
+    return get_file_name_suffix_from_params(
+        func=command,
+        params=dict(**params.to_dict(), tp_cap_model=tp_cap_model),
+        include_only_non_default=True,
+    )
+
+
 def export_or_show(
     interactive: bool,
     export_path: Path,
@@ -84,6 +126,11 @@ def export_or_show(
     shape: Any,
     log: Optional[str],
     trackpoint_model: Optional[TrackPointModel],
+    stl_tolerance: Optional[float] = None,
+    stl_angular_tolerance: Optional[float] = None,
+    nozzle_size: Optional[float] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    param_suffix: str = '',
 ) -> None:
     if export_format is None:
         export_format = ExportFormat.step
@@ -92,7 +139,7 @@ def export_or_show(
         export_path=export_path,
         tp_model=trackpoint_model,
         export_format=export_format,
-        param_suffix_func_offset=1,
+        param_suffix=param_suffix,
     )
 
     if interactive is True:
@@ -103,10 +150,19 @@ def export_or_show(
 
         return
 
+    stl_tolerance, stl_angular_tolerance = get_stl_tolerances(
+        stl_tolerance=stl_tolerance,
+        stl_angular_tolerance=stl_angular_tolerance,
+        nozzle_size=nozzle_size,
+    )
+
     export_format.export(
         to_export=shape,
         file_path=export_path,
         overwrite=export_overwrite,
+        stl_tolerance=stl_tolerance,
+        stl_angular_tolerance=stl_angular_tolerance,
+        metadata=metadata,
     )
 
     if log is not None:
@@ -121,6 +177,130 @@ def export_or_show(
             print(f'Could not create log: {e}')
 
 
+#
+# Build Cache
+#
+
+OptUseCache = Annotated[
+    bool,
+    typer.Option(
+        '--cache/--no-cache',
+        help=(
+            'Load the model from the build cache if it was already built '
+            'with the same parameters and store newly built models in it.'
+        ),
+    ),
+]
+
+OptCacheDir = Annotated[
+    Optional[Path],
+    typer.Option(
+        '--cache-dir',
+        help=(
+            'The directory of the build cache. Defaults to '
+            '~/.cache/tp_extension_builder.'
+        ),
+    ),
+]
+
+OptCacheMaxSize = Annotated[
+    float,
+    typer.Option(
+        '--cache-max-size',
+        help=(
+            'The max size of the build cache in MB. The least recently used '
+            'models are removed when it grows larger. Use 0 for no limit.'
+        ),
+    ),
+]
+
+
+def build_or_load(
+    build_cache: BuildCache,
+    cache_params: Dict[str, Any],
+    build_func: Callable[[], Tuple[Any, str]],
+) -> Tuple[Any, str]:
+    """
+    Returns the shape and info from the build cache or calls `build_func` to
+    build them and stores the result in the cache.
+    """
+    cache_key = build_cache.get_key(**cache_params)
+
+    cached_build = build_cache.load(cache_key)
+    if cached_build is not None and cached_build.info is not None:
+        shape, info = cached_build.shape, cached_build.info
+        cache_status = 'hit'
+    else:
+        shape, info = build_func()
+        build_cache.store(cache_key, shape, info)
+        cache_status = 'miss' if build_cache.enabled else 'disabled'
+
+    print(f'\n{info}\n')
+    print(f'Build Cache: {cache_status} ({cache_key[:12]})\n')
+
+    return (shape, info)
+
+
+#
+# Profiling
+#
+
+OptProfile = Annotated[
+    bool,
+    typer.Option(
+        '--profile',
+        help=(
+            'Prints how long every stage of building, importing and '
+            'exporting took.'
+        ),
+    ),
+]
+
+OptProfileTrace = Annotated[
+    Optional[Path],
+    typer.Option(
+        '--profile-trace',
+        help=(
+            'Writes the stages to a Chrome trace JSON file, which can be '
+            'opened in https://ui.perfetto.dev. Implies --profile.'
+        ),
+    ),
+]
+
+
+@contextmanager
+def profile_command(
+    profile: bool,
+    trace_path: Optional[Path],
+    import_build123d: bool = True,
+) -> Iterator[None]:
+    """
+    Prints the time of every stage of the command after it finished if
+    profiling is enabled.
+
+    build123d is imported first in its own stage, because it takes seconds
+    and would otherwise be counted towards the first stage that uses it.
+    """
+    if profile is False and trace_path is None:
+        yield
+        return
+
+    from tp_extension_builder.profiling import profile_span, profiling
+
+    with profiling() as profiler:
+        if import_build123d is True:
+            with profile_span('import_build123d'):
+                import build123d  # noqa: F401
+
+        yield
+
+    print(f'\nProfile:\n{profiler.format_table()}')
+
+    if trace_path is not None:
+        profiler.write_chrome_trace(trace_path)
+        print(f'\nWrote Chrome trace to {trace_path} ...')
+
+
 #
 # Build Command
 #
@@ -171,6 +351,43 @@ OptInteractive = Annotated[
     ),
 ]
 
+OptStlTolerance = Annotated[
+    Optional[float],
+    typer.Option(
+        '--stl-tolerance',
+        help=(
+            'The max distance in mm between the surface of the model and '
+            'the triangles of STL exports. Larger values create smaller '
+            'files. Defaults to 0.001 or the nozzle size preset.'
+        ),
+    ),
+]
+
+OptStlAngularTolerance = Annotated[
+    Optional[float],
+    typer.Option(
+        '--stl-angular-tolerance',
+        help=(
+            'The max angle in radians between neighboring triangles of STL '
+            'exports. Larger values use fewer triangles for small curves. '
+            'Defaults to 0.1 or the nozzle size preset.'
+        ),
+    ),
+]
+
+OptNozzleSize = Annotated[
+    Optional[float],
+    typer.Option(
+        '--nozzle-size',
+        help=(
+            'Tessellate STL exports only as finely as a printer with this '
+            'nozzle size in mm can print. This creates much smaller files '
+            'than the defaults. --stl-tolerance and '
+            '--stl-angular-tolerance override the preset.'
+        ),
+    ),
+]
+
 OptCapModel = Annotated[
     Optional[TrackPointModel],
     typer.Option(
@@ -298,6 +515,74 @@ OptExtensionWidth = Annotated[
 ]
 
 
+OptDryRun = Annotated[
+    bool,
+    typer.Option(
+        '--dry-run',
+        help=(
+            'Only print the dimensions of the extension without building '
+            'or exporting the model.'
+        ),
+    ),
+]
+
+
+def create_extension(
+    trackpoint_model: TrackPointModel,
+    tp_cap_model: Optional[TrackPointModel],
+    params: TrackPointExtensionParams,
+) -> Any:
+    """
+    Builds the extension for the TrackPoint model with a tip for the cap of
+    `tp_cap_model` or its own cap.
+    """
+    cap_model = trackpoint_model if tp_cap_model is None else tp_cap_model
+
+    return trackpoint_model.build_extension.from_params(
+        params,
+        tp_cap=cap_model.cap_dimensions,
+    )
+
+
+def create_extension_dimensions(
+    trackpoint_model: TrackPointModel,
+    tp_cap_model: Optional[TrackPointModel],
+    params: TrackPointExtensionParams,
+) -> TrackPointExtensionDimensions:
+    """
+    Calculates the dimensions of the extension that `create_extension()`
+    would build without importing build123d.
+    """
+    cap_model = trackpoint_model if tp_cap_model is None else tp_cap_model
+    tp_stem = trackpoint_model.stem_dimensions
+
+    return TrackPointExtensionDimensions.from_params(
+        params,
+        model=tp_stem.model,
+        tp_cap=cap_model.cap_dimensions,
+        tp_stem_width=tp_stem.stem_width,
+        tp_stem_height=tp_stem.stem_height,
+    )
+
+
+def print_dry_run(
+    trackpoint_model: TrackPointModel,
+    tp_cap_model: Optional[TrackPointModel],
+    params: TrackPointExtensionParams,
+) -> None:
+    """
+    Prints the info of the extension without building it.
+    """
+    dimensions = create_extension_dimensions(
+        trackpoint_model=trackpoint_model,
+        tp_cap_model=tp_cap_model,
+        params=params,
+    )
+
+    print(f'\n{dimensions.info}\n')
+    print('Dry run: Nothing was built or exported.\n')
+
+
 @app.command(
     help='Creates a trackpoint extension model for 3d printing.',
     no_args_is_help=True,
@@ -308,6 +593,9 @@ def build(
     export_format: OptExportFormat = ExportFormat.step,
     export_overwrite: OptExportOverwrite = False,
     interactive: OptInteractive = False,
+    stl_tolerance: OptStlTolerance = None,
+    stl_angular_tolerance: OptStlAngularTolerance = None,
+    nozzle_size: OptNozzleSize = None,
     tp_mounting_distance: OptMountingDistance = D_MOUNTING_DISTANCE,
     desired_cap_height: OptDesiredCapHeight = CHOC_KEYCAP_HEIGHT,
     pcb_height: OptPcbHeight = D_PCB_HEIGHT,
@@ -321,29 +609,115 @@ def build(
     extension_width: OptExtensionWidth = D_EXTENSION_WIDTH,
     tp_cap_model: OptCapModel = None,
     adapter_hole_incr: OptAdapterHoleIncr = D_ADAPTER_HOLE_INCR,
+    use_cache: OptUseCache = True,
+    cache_dir: OptCacheDir = None,
+    cache_max_size: OptCacheMaxSize = D_CACHE_MAX_SIZE_MB,
+    dry_run: OptDryRun = False,
+    profile: OptProfile = False,
+    profile_trace: OptProfileTrace = None,
 ) -> None:
-    print('Generating extension...')
-
     if export_path is None:
         export_path = D_EXPORT_PATH
 
-    tp_cap = None
-    if tp_cap_model is not None:
-        tp_cap = tp_cap_model.build_cap()
+    with profile_command(
+        profile, profile_trace, import_build123d=dry_run is False
+    ):
+        build_extension(
+            trackpoint_model=trackpoint_model,
+            tp_cap_model=tp_cap_model,
+            params=TrackPointExtensionParams(
+                tp_mounting_distance=tp_mounting_distance,
+                desired_cap_height=desired_cap_height,
+                pcb_height=pcb_height,
+                space_above_pcb=space_above_pcb,
+                adapter_width_below_pcb=adapter_width_below_pcb,
+                adapter_width_above_pcb=adapter_width_above_pcb,
+                extension_width=extension_width,
+                adapter_hole_incr=adapter_hole_incr,
+            ),
+            export_path=export_path,
+            export_format=export_format,
+            export_overwrite=export_overwrite,
+            interactive=interactive,
+            stl_tolerance=stl_tolerance,
+            stl_angular_tolerance=stl_angular_tolerance,
+            nozzle_size=nozzle_size,
+            use_cache=use_cache,
+            cache_dir=cache_dir,
+            cache_max_size=cache_max_size,
+            dry_run=dry_run,
+        )
+
+
+def build_extension(
+    trackpoint_model: TrackPointModel,
+    tp_cap_model: Optional[TrackPointModel],
+    params: TrackPointExtensionParams,
+    export_path: Path = D_EXPORT_PATH,
+    export_format: Optional[ExportFormat] = ExportFormat.step,
+    export_overwrite: bool = False,
+    interactive: bool = False,
+    stl_tolerance: Optional[float] = None,
+    stl_angular_tolerance: Optional[float] = None,
+    nozzle_size: Optional[float] = None,
+    use_cache: bool = True,
+    cache_dir: Optional[Path] = None,
+    cache_max_size: float = D_CACHE_MAX_SIZE_MB,
+    dry_run: bool = False,
+    skip_existing: bool = False,
+) -> None:
+    """
+    Builds or loads the extension and exports it like the `build` command.
 
-    tp_extension = trackpoint_model.build_extension(
-        adapter_hole_incr=adapter_hole_incr,
-        desired_cap_height=desired_cap_height,
-        tp_mounting_distance=tp_mounting_distance,
-        adapter_width_below_pcb=adapter_width_below_pcb,
-        adapter_width_above_pcb=adapter_width_above_pcb,
-        extension_width=extension_width,
-        pcb_height=pcb_height,
-        space_above_pcb=space_above_pcb,
-        tp_cap=tp_cap,
-    )
+    The parameters are passed as one object, so sweeps can send them to
+    worker processes. With `skip_existing`, an existing export file is kept
+    instead of asking whether it should be overwritten.
+    """
+    print('Generating extension...')
 
-    print(f'\n{tp_extension.info}\n')
+    if dry_run is True:
+        print_dry_run(trackpoint_model, tp_cap_model, params)
+        return
+
+    param_suffix = get_extension_param_suffix(build, tp_cap_model, params)
+    if skip_existing is True and export_overwrite is False:
+        file_format = export_format or ExportFormat.step
+        file_path = file_format.add_extension_to_path(
+            substitute_export_path(
+                export_path=export_path,
+                tp_model=trackpoint_model,
+                export_format=file_format,
+                param_suffix=param_suffix,
+            )
+        )
+        if file_path.exists():
+            print(f'Skipped, {file_path} already exists.')
+            return
+
+    def build_tp_extension() -> Tuple[Any, str]:
+        tp_extension = create_extension(
+            trackpoint_model=trackpoint_model,
+            tp_cap_model=tp_cap_model,
+            params=params,
+        )
+
+        return (tp_extension, tp_extension.info)
+
+    build_cache = BuildCache(
+        cache_dir=cache_dir,
+        max_size_mb=cache_max_size,
+        enabled=use_cache,
+    )
+    tp_extension, info = build_or_load(
+        build_cache=build_cache,
+        cache_params=dict(
+            command='build',
+            trackpoint_model=trackpoint_model,
+            tp_cap_model=tp_cap_model,
+            **params.to_dict(),
+        ),
+        build_func=build_tp_extension,
+    )
 
     export_or_show(
         interactive=interactive,
@@ -351,11 +725,78 @@ def build(
         export_format=export_format,
         export_overwrite=export_overwrite,
         shape=tp_extension,
-        log=tp_extension.info,
+        log=info,
         trackpoint_model=trackpoint_model,
+        stl_tolerance=stl_tolerance,
+        stl_angular_tolerance=stl_angular_tolerance,
+        nozzle_size=nozzle_size,
+        metadata=dict(
+            trackpoint_model=trackpoint_model,
+            tp_cap_model=tp_cap_model,
+            **params.to_dict(),
+        ),
+        param_suffix=param_suffix,
     )
 
 
+#
+# Info Command
+#
+
+OptJson = Annotated[
+    bool,
+    typer.Option(
+        '--json',
+        help='Print the dimensions as JSON for use in other tools.',
+    ),
+]
+
+
+@app.command(
+    help=(
+        'Prints the dimensions of a trackpoint extension without building '
+        'it. This is fast enough to check many variants.'
+    ),
+    no_args_is_help=True,
+)
+def info(
+    trackpoint_model: ArgTrackPointModel,
+    tp_mounting_distance: OptMountingDistance = D_MOUNTING_DISTANCE,
+    desired_cap_height: OptDesiredCapHeight = CHOC_KEYCAP_HEIGHT,
+    pcb_height: OptPcbHeight = D_PCB_HEIGHT,
+    space_above_pcb: OptSpaceAbovePCB = (CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT),
+    adapter_width_below_pcb: OptAdapterWidthBelowPCB = (
+        D_ADAPTER_WIDTH_BELOW_PCB
+    ),
+    adapter_width_above_pcb: OptAdapterWidthAbovePCB = (
+        D_ADAPTER_WIDTH_ABOVE_PCB
+    ),
+    extension_width: OptExtensionWidth = D_EXTENSION_WIDTH,
+    tp_cap_model: OptCapModel = None,
+    adapter_hole_incr: OptAdapterHoleIncr = D_ADAPTER_HOLE_INCR,
+    as_json: OptJson = False,
+) -> None:
+    dimensions = create_extension_dimensions(
+        trackpoint_model=trackpoint_model,
+        tp_cap_model=tp_cap_model,
+        params=TrackPointExtensionParams(
+            tp_mounting_distance=tp_mounting_distance,
+            desired_cap_height=desired_cap_height,
+            pcb_height=pcb_height,
+            space_above_pcb=space_above_pcb,
+            adapter_width_below_pcb=adapter_width_below_pcb,
+            adapter_width_above_pcb=adapter_width_above_pcb,
+            extension_width=extension_width,
+            adapter_hole_incr=adapter_hole_incr,
+        ),
+    )
+
+    if as_json is True:
+        print(json.dumps(dimensions.to_dict(), indent=2))
+    else:
+        print(dimensions.info)
+
+
 #
 # KiCad Model Command
 #
@@ -369,6 +810,19 @@ OptIncludeCap = Annotated[
     ),
 ]
 
+OptDetail = Annotated[
+    DetailLevel,
+    typer.Option(
+        '--detail',
+        show_choices=True,
+        help=(
+            'Build the cap without the dome dots and with a coarse dome '
+            'profile. Low detail models build and load much faster, which '
+            'is enough for previews and KiCad footprints.'
+        ),
+    ),
+]
+
 
 @app.command(
     help=(
@@ -383,7 +837,11 @@ def build_kicad_model(
     export_format: OptExportFormat = ExportFormat.step,
     export_overwrite: OptExportOverwrite = False,
     interactive: OptInteractive = False,
+    stl_tolerance: OptStlTolerance = None,
+    stl_angular_tolerance: OptStlAngularTolerance = None,
+    nozzle_size: OptNozzleSize = None,
     include_cap: OptIncludeCap = True,
+    detail: OptDetail = DetailLevel.full,
     tp_mounting_distance: OptMountingDistance = D_MOUNTING_DISTANCE,
     desired_cap_height: OptDesiredCapHeight = CHOC_KEYCAP_HEIGHT,
     pcb_height: OptPcbHeight = D_PCB_HEIGHT,
@@ -397,41 +855,309 @@ def build_kicad_model(
     extension_width: OptExtensionWidth = D_EXTENSION_WIDTH,
     tp_cap_model: OptCapModel = None,
     adapter_hole_incr: OptAdapterHoleIncr = D_ADAPTER_HOLE_INCR,
+    use_cache: OptUseCache = True,
+    cache_dir: OptCacheDir = None,
+    cache_max_size: OptCacheMaxSize = D_CACHE_MAX_SIZE_MB,
+    dry_run: OptDryRun = False,
+    profile: OptProfile = False,
+    profile_trace: OptProfileTrace = None,
 ) -> None:
     print('Generating extension...')
-    tp_cap = None
-    if tp_cap_model is not None:
-        tp_cap = tp_cap_model.build_cap()
 
     if export_path is None:
         export_path = D_EXPORT_PATH_KICAD
 
-    tp_extension = trackpoint_model.build_extension(
-        adapter_hole_incr=adapter_hole_incr,
-        desired_cap_height=desired_cap_height,
+    params = TrackPointExtensionParams(
         tp_mounting_distance=tp_mounting_distance,
+        desired_cap_height=desired_cap_height,
+        pcb_height=pcb_height,
+        space_above_pcb=space_above_pcb,
         adapter_width_below_pcb=adapter_width_below_pcb,
         adapter_width_above_pcb=adapter_width_above_pcb,
         extension_width=extension_width,
-        pcb_height=pcb_height,
-        space_above_pcb=space_above_pcb,
-        tp_cap=tp_cap,
+        adapter_hole_incr=adapter_hole_incr,
     )
 
-    kicad_model = tp_extension.for_kicad(include_cap=include_cap)
+    if dry_run is True:
+        print_dry_run(trackpoint_model, tp_cap_model, params)
+        return
 
-    print(f'\n{tp_extension.info}\n')
+    with profile_command(profile, profile_trace):
+        build_cache = BuildCache(
+            cache_dir=cache_dir,
+            max_size_mb=cache_max_size,
+            enabled=use_cache,
+        )
+
+        def build_tp_kicad_model() -> Tuple[Any, str]:
+            tp_extension = create_extension(
+                trackpoint_model=trackpoint_model,
+                tp_cap_model=tp_cap_model,
+                params=params,
+            )
 
-    export_or_show(
-        interactive=interactive,
-        export_path=export_path,
-        export_format=export_format,
-        export_overwrite=export_overwrite,
-        shape=kicad_model,
-        log=tp_extension.info,
-        trackpoint_model=trackpoint_model,
+            kicad_model = tp_extension.for_kicad(
+                include_cap=include_cap,
+                build_cache=build_cache,
+                detail=detail,
+            )
+
+            return (kicad_model, tp_extension.info)
+
+        kicad_model, info = build_or_load(
+            build_cache=build_cache,
+            cache_params=dict(
+                command='build_kicad_model',
+                trackpoint_model=trackpoint_model,
+                tp_cap_model=tp_cap_model,
+                include_cap=include_cap,
+                detail=detail,
+                **params.to_dict(),
+            ),
+            build_func=build_tp_kicad_model,
+        )
+
+        export_or_show(
+            interactive=interactive,
+            export_path=export_path,
+            export_format=export_format,
+            export_overwrite=export_overwrite,
+            shape=kicad_model,
+            log=info,
+            trackpoint_model=trackpoint_model,
+            stl_tolerance=stl_tolerance,
+            stl_angular_tolerance=stl_angular_tolerance,
+            nozzle_size=nozzle_size,
+            metadata=dict(
+                trackpoint_model=trackpoint_model,
+                tp_cap_model=tp_cap_model,
+                include_cap=include_cap,
+                **params.to_dict(),
+            ),
+            param_suffix=get_extension_param_suffix(
+                build_kicad_model, tp_cap_model, params
+            ),
+        )
+
+
+#
+# Sweep Command
+#
+
+ArgSweepTrackPointModels = Annotated[
+    List[TrackPointModel],
+    typer.Argument(
+        show_choices=True,
+        help='One or more TrackPoint models',
+    ),
+]
+
+SweepOptCapModels = Annotated[
+    Optional[List[TrackPointModel]],
+    typer.Option(
+        '--cap-model',
+        '--cm',
+        show_choices=True,
+        help=(
+            'Create the extensions with tips that fit different TrackPoint '
+            "models' red caps. Can be used multiple times."
+        ),
+    ),
+]
+
+OptJobs = Annotated[
+    int,
+    typer.Option(
+        '--jobs',
+        '-j',
+        help=(
+            'The number of variants that are built in parallel. Use 0 to '
+            'build one variant per CPU core at a time. Parallel builds '
+            "can't ask before overwriting files, so existing files are "
+            'skipped unless you use --overwrite.'
+        ),
+    ),
+]
+
+SweepOptMountingDistance = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptMountingDistance),
+]
+
+SweepOptDesiredCapHeight = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptDesiredCapHeight),
+]
+
+SweepOptPcbHeight = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptPcbHeight),
+]
+
+SweepOptSpaceAbovePCB = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptSpaceAbovePCB),
+]
+
+SweepOptAdapterWidthBelowPCB = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptAdapterWidthBelowPCB),
+]
+
+SweepOptAdapterWidthAbovePCB = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptAdapterWidthAbovePCB),
+]
+
+SweepOptExtensionWidth = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptExtensionWidth),
+]
+
+SweepOptAdapterHoleIncr = Annotated[
+    Optional[List[str]],
+    make_sweep_option(OptAdapterHoleIncr),
+]
+
+
+@app.command(
+    help=(
+        'Creates trackpoint extension models for every combination of the '
+        'given parameter values in one go.'
+    ),
+    no_args_is_help=True,
+)
+def sweep(
+    trackpoint_models: ArgSweepTrackPointModels,
+    export_path: OptExportPath = D_EXPORT_PATH,
+    export_format: OptExportFormat = ExportFormat.step,
+    export_overwrite: OptExportOverwrite = False,
+    stl_tolerance: OptStlTolerance = None,
+    stl_angular_tolerance: OptStlAngularTolerance = None,
+    nozzle_size: OptNozzleSize = None,
+    tp_mounting_distance: SweepOptMountingDistance = None,
+    desired_cap_height: SweepOptDesiredCapHeight = None,
+    pcb_height: SweepOptPcbHeight = None,
+    space_above_pcb: SweepOptSpaceAbovePCB = None,
+    adapter_width_below_pcb: SweepOptAdapterWidthBelowPCB = None,
+    adapter_width_above_pcb: SweepOptAdapterWidthAbovePCB = None,
+    extension_width: SweepOptExtensionWidth = None,
+    tp_cap_models: SweepOptCapModels = None,
+    adapter_hole_incr: SweepOptAdapterHoleIncr = None,
+    use_cache: OptUseCache = True,
+    cache_dir: OptCacheDir = None,
+    cache_max_size: OptCacheMaxSize = D_CACHE_MAX_SIZE_MB,
+    jobs: OptJobs = 1,
+    dry_run: OptDryRun = False,
+) -> None:
+    if export_path is None:
+        export_path = D_EXPORT_PATH
+
+    cap_models: List[Optional[TrackPointModel]] = [None]
+    if tp_cap_models:
+        cap_models = list(tp_cap_models)
+
+    sweep_params: Dict[str, List[Any]] = {
+        'trackpoint_model': trackpoint_models,
+        'tp_cap_model': cap_models,
+        'tp_mounting_distance': parse_sweep_values(
+            tp_mounting_distance, D_MOUNTING_DISTANCE
+        ),
+        'desired_cap_height': parse_sweep_values(
+            desired_cap_height, CHOC_KEYCAP_HEIGHT
+        ),
+        'pcb_height': parse_sweep_values(pcb_height, D_PCB_HEIGHT),
+        'space_above_pcb': parse_sweep_values(
+            space_above_pcb, CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT
+        ),
+        'adapter_width_below_pcb': parse_sweep_values(
+            adapter_width_below_pcb, D_ADAPTER_WIDTH_BELOW_PCB
+        ),
+        'adapter_width_above_pcb': parse_sweep_values(
+            adapter_width_above_pcb, D_ADAPTER_WIDTH_ABOVE_PCB
+        ),
+        'extension_width': parse_sweep_values(
+            extension_width, D_EXTENSION_WIDTH
+        ),
+        'adapter_hole_incr': parse_sweep_values(
+            adapter_hole_incr, D_ADAPTER_HOLE_INCR
+        ),
+    }
+    variants = get_sweep_variants(sweep_params)
+
+    if (
+        dry_run is False
+        and len(variants) > 1
+        and not any(
+            placeholder in str(export_path)
+            for placeholder in PARAMS_PLACEHOLDERS
+        )
+    ):
+        raise typer.BadParameter(
+            'The export path must contain <parameters> when building '
+            'multiple variants, or the files would overwrite each other.',
+            param_hint='--export-path',
+        )
+
+    build_kwargs_list = [
+        dict(
+            trackpoint_model=variant.pop('trackpoint_model'),
+            tp_cap_model=variant.pop('tp_cap_model'),
+            params=TrackPointExtensionParams(**variant),
+            export_path=export_path,
+            export_format=export_format,
+            export_overwrite=export_overwrite,
+            stl_tolerance=stl_tolerance,
+            stl_angular_tolerance=stl_angular_tolerance,
+            nozzle_size=nozzle_size,
+            use_cache=use_cache,
+            cache_dir=cache_dir,
+            cache_max_size=cache_max_size,
+            dry_run=dry_run,
+        )
+        for variant in variants
+    ]
+
+    # Only sweep uses worker processes, so the other commands don't pay
+    # for importing them
+    from tp_extension_builder.parallel import get_job_count, map_captured
+
+    # Dry runs don't build anything, so they are faster without workers
+    jobs = 1 if dry_run is True else get_job_count(jobs)
+
+    # Workers can't ask before overwriting files, so they skip them
+    if jobs > 1:
+        for build_kwargs in build_kwargs_list:
+            build_kwargs['skip_existing'] = True
+    print(
+        f'Building {len(variants)} extension variants '
+        f'with {jobs} job{"s" if jobs > 1 else ""}...'
     )
 
+    # All variants are built in this process, so the build123d import is
+    # shared between them.
+    if jobs == 1:
+        for variant_num, build_kwargs in enumerate(build_kwargs_list, start=1):
+            print(f'\n[{variant_num}/{len(variants)}] ', end='')
+            build_extension(**build_kwargs)
+
+        return
+
+    # Every worker process exports its variants directly and the output is
+    # printed in the order of the variants once it is available.
+    failed_count = 0
+    results = map_captured(build_extension, build_kwargs_list, jobs=jobs)
+    for variant_num, result in enumerate(results, start=1):
+        print(f'\n[{variant_num}/{len(variants)}] {result.output}', end='')
+
+        if result.error is not None:
+            print(f'\nFailed to build variant: {result.error}')
+            failed_count += 1
+
+    if failed_count > 0:
+        print(f'\nFailed to build {failed_count} of {len(variants)} variants.')
+        raise typer.Exit(code=1)
+
 
 #
 # Combine Command
@@ -510,6 +1236,123 @@ OptSprueOffsetZ = Annotated[
     ),
 ]
 
+OptBedSize = Annotated[
+    Optional[Tuple[float, float]],
+    typer.Option(
+        '--bed-size',
+        '--bs',
+        help=(
+            'Packs the shapes into rows that fit on a print bed of this X '
+            'and Y size in mm instead of placing them in a single row. '
+            'Every row gets a sprue and a spine connects the rows.'
+        ),
+    ),
+]
+
+OptFuseAll = Annotated[
+    Optional[bool],
+    typer.Option(
+        '--fuse-all/--fuse-sprue-only',
+        help=(
+            'Fuses every shape into one part instead of only fusing the '
+            'shapes with the sprue, which is much slower for many shapes. '
+            'By default, everything is only fused if the shapes overlap '
+            'because of a negative shape distance.'
+        ),
+    ),
+]
+
+OptSeparateParts = Annotated[
+    Optional[bool],
+    typer.Option(
+        '--separate-parts/--connect-parts',
+        help=(
+            'Keeps every shape and sprue as a separate part instead of '
+            'fusing the shapes with the sprue. Copies of the same file are '
+            'then only stored once in step and 3mf files. By default, only '
+            '3mf files keep the parts separate.'
+        ),
+    ),
+]
+
+CombineOptJobs = Annotated[
+    int,
+    typer.Option(
+        '--jobs',
+        '-j',
+        help=(
+            'The number of step files that are imported in parallel. Use 0 '
+            'to import one file per CPU core at a time.'
+        ),
+    ),
+]
+
+CombineOptProfile = Annotated[
+    bool,
+    typer.Option(
+        '--profile',
+        help=(
+            'Prints how long every stage of importing, combining and '
+            'exporting took. The step files are imported one at a time '
+            'then, because the worker processes of --jobs are not profiled.'
+        ),
+    ),
+]
+
+
+def with_progress(
+    file_pathes: List[Path],
+    items: Iterable[T],
+) -> Iterator[T]:
+    """
+    Prints the progress of the file imports while the items are consumed.
+    """
+    start_time = time.perf_counter()
+    for file_num, (file_path, item) in enumerate(
+        zip(file_pathes, items), start=1
+    ):
+        elapsed_time = time.perf_counter() - start_time
+        print(
+            f'[{file_num}/{len(file_pathes)}] Imported {file_path} '
+            f'({elapsed_time:.1f}s)'
+        )
+        yield item
+
+
+def get_unique_files(file_pathes: List[Path]) -> Tuple[List[Path], List[int]]:
+    """
+    Returns the files with different contents and the index of the unique
+    file for every file, so files that are combined multiple times are only
+    imported once.
+    """
+    unique_pathes: List[Path] = []
+    unique_indexes: Dict[str, int] = {}
+    file_indexes = []
+    for file_path in file_pathes:
+        file_hash = hashlib.sha256(file_path.read_bytes()).hexdigest()
+        if file_hash not in unique_indexes:
+            unique_indexes[file_hash] = len(unique_pathes)
+            unique_pathes.append(file_path)
+
+        file_indexes.append(unique_indexes[file_hash])
+
+    return (unique_pathes, file_indexes)
+
+
+def repeat_duplicates(
+    items: Iterator[T], file_indexes: List[int]
+) -> Iterator[T]:
+    """
+    Yields the item of the unique file for every file. The copies of a file
+    are the same object, so they can share their geometry.
+    """
+    unique_items: List[T] = []
+    for file_index in file_indexes:
+        if file_index == len(unique_items):
+            unique_items.append(next(items))
+
+        yield unique_items[file_index]
+
 
 @app.command(
     help=(
@@ -524,14 +1367,29 @@ def combine(
     export_format: OptExportFormat = None,
     export_overwrite: OptExportOverwrite = False,
     interactive: OptInteractive = False,
+    stl_tolerance: OptStlTolerance = None,
+    stl_angular_tolerance: OptStlAngularTolerance = None,
+    nozzle_size: OptNozzleSize = None,
     shape_distance: OptCombineShapeDistance = 0.5,
     add_sprue: OptAddSprue = True,
     sprue_radius: OptSprueRadius = 0.75,
     sprue_offset_x: OptSprueOffsetX = 0.0,
     sprue_offset_y: OptSprueOffsetY = -0.1,
     sprue_offset_z: OptSprueOffsetZ = 0.0,
+    bed_size: OptBedSize = None,
+    fuse_all: OptFuseAll = None,
+    separate_parts: OptSeparateParts = None,
+    jobs: CombineOptJobs = 0,
+    profile: CombineOptProfile = False,
+    profile_trace: OptProfileTrace = None,
 ) -> None:
     file_pathes = [Path(file_path) for file_path in files_to_combine]
+    unique_pathes, file_indexes = get_unique_files(file_pathes)
+
+    if profile is True or profile_trace is not None:
+        # Only this process is profiled, so the files are imported here to
+        # show up in the profile
+        jobs = 1
 
     if export_format is None:
         if file_pathes[0].suffix == '.stl':
@@ -542,43 +1400,164 @@ def combine(
     if export_path is None:
         export_path = D_EXPORT_PATH_COMBINED
 
+    if separate_parts is None:
+        # The parts of 3MF files remain separate objects
+        separate_parts = export_format is ExportFormat.threemf
+
     print(f'Combining {len(files_to_combine)} files...')
-    import build123d as bd
-    from tp_extension_builder.utils import combine_shapes
 
-    shapes = []
-    for file_path in file_pathes:
-        if file_path.suffix in ['.step', '.stp']:
-            shape = bd.import_step(str(file_path))
-        elif file_path.suffix == '.stl':
-            shape = bd.import_stl(str(file_path))
-        else:
-            raise ValueError(
-                f'Files with suffix {file_path.suffix} are not supported.'
-            )
-        shapes.append(shape)
-
-    shapes_sprued = combine_shapes(
-        shapes=shapes,
-        distance=shape_distance,
-        add_sprue=add_sprue,
-        sprue_radius=sprue_radius,
-        sprue_offset=bd.Vector(
-            sprue_offset_x,
-            sprue_offset_y,
-            sprue_offset_z,
-        ),
+    # Meshes are combined without converting them into OCC shapes, which is
+    # much faster than placing and fusing every triangle as a face.
+    combine_as_meshes = (
+        interactive is False
+        and export_format is ExportFormat.stl
+        and all(file_path.suffix == '.stl' for file_path in file_pathes)
     )
 
-    export_or_show(
-        interactive=interactive,
-        export_path=export_path,
-        export_format=export_format,
-        export_overwrite=export_overwrite,
-        shape=shapes_sprued,
-        log=None,
-        trackpoint_model=None,
-    )
+    with profile_command(
+        profile,
+        profile_trace,
+        import_build123d=combine_as_meshes is False,
+    ):
+        combined_shape: Any
+        try:
+            if combine_as_meshes is True:
+                from tp_extension_builder.mesh import (
+                    combine_meshes,
+                    read_stl,
+                )
+
+                combined_shape = combine_meshes(
+                    meshes=with_progress(
+                        file_pathes,
+                        repeat_duplicates(
+                            map(read_stl, unique_pathes),
+                            file_indexes,
+                        ),
+                    ),
+                    distance=shape_distance,
+                    add_sprue=add_sprue,
+                    sprue_radius=sprue_radius,
+                    sprue_offset=(
+                        sprue_offset_x,
+                        sprue_offset_y,
+                        sprue_offset_z,
+                    ),
+                    bed_size=bed_size,
+                )
+            else:
+                import build123d as bd
+                from tp_extension_builder.utils import (
+                    combine_shapes,
+                    import_shapes,
+                )
+
+                combined_shape = combine_shapes(
+                    shapes=with_progress(
+                        file_pathes,
+                        repeat_duplicates(
+                            import_shapes(unique_pathes, jobs=jobs),
+                            file_indexes,
+                        ),
+                    ),
+                    distance=shape_distance,
+                    add_sprue=add_sprue,
+                    sprue_radius=sprue_radius,
+                    sprue_offset=bd.Vector(
+                        sprue_offset_x,
+                        sprue_offset_y,
+                        sprue_offset_z,
+                    ),
+                    fuse_all=fuse_all,
+                    bed_size=bed_size,
+                    separate_parts=separate_parts,
+                )
+        except ValueError as error:
+            # For example, if the shapes don't fit on the bed
+            print(f'Error: {error}')
+            raise typer.Exit(code=1)
+
+        export_or_show(
+            interactive=interactive,
+            export_path=export_path,
+            export_format=export_format,
+            export_overwrite=export_overwrite,
+            shape=combined_shape,
+            log=None,
+            trackpoint_model=None,
+            stl_tolerance=stl_tolerance,
+            stl_angular_tolerance=stl_angular_tolerance,
+            nozzle_size=nozzle_size,
+            param_suffix=get_file_name_suffix_from_params(
+                func=combine,
+                params=dict(
+                    shape_distance=shape_distance,
+                    add_sprue=add_sprue,
+                    sprue_radius=sprue_radius,
+                    sprue_offset_x=sprue_offset_x,
+                    sprue_offset_y=sprue_offset_y,
+                    sprue_offset_z=sprue_offset_z,
+                    bed_size=bed_size,
+                ),
+                include_only_non_default=True,
+            ),
+        )
+
+
+#
+# Build Server Command
+#
+
+OptIdleTimeout = Annotated[
+    float,
+    typer.Option(
+        '--idle-timeout',
+        help=(
+            'Stops the server after it was idle for this many minutes. Use 0 '
+            'to keep it running until it is stopped.'
+        ),
+    ),
+]
+
+OptStopServer = Annotated[
+    bool,
+    typer.Option(
+        '--stop',
+        help='Stops the running build server.',
+    ),
+]
+
+
+@app.command(
+    help=(
+        'Runs a build server that keeps build123d loaded. While it runs, the '
+        'build, build-kicad-model and combine commands are run by the '
+        'server, which saves the seconds it takes to load build123d.'
+    ),
+)
+def serve(
+    idle_timeout: OptIdleTimeout = D_SERVER_IDLE_TIMEOUT_MIN,
+    stop: OptStopServer = False,
+) -> None:
+    from tp_extension_builder import daemon
+
+    if daemon.is_supported() is False:
+        print('The build server needs Unix sockets.')
+        raise typer.Exit(code=1)
+
+    if stop is True:
+        if daemon.stop_server() is True:
+            print('Stopped the build server.')
+        else:
+            print('The build server is not running.')
+
+        return
+
+    try:
+        daemon.serve(idle_timeout=idle_timeout * 60)
+    except (RuntimeError, OSError) as e:
+        print(f'Could not start the build server: {e}')
+        raise typer.Exit(code=1)
 
 
 if __name__ == '__main__':
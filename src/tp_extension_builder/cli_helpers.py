@@ -1,5 +1,8 @@
+import functools
 import importlib
 import inspect
+import itertools
+import math
 import typer
 
 from enum import Enum
@@ -9,6 +12,7 @@ from typing import (
     Type,
     Annotated,
     Any,
+    Callable,
     Optional,
     Union,
     Dict,
@@ -16,10 +20,29 @@ from typing import (
     Tuple,
 )
 
+from tp_extension_builder.defines import (
+    D_STL_TOLERANCE,
+    D_STL_ANGULAR_TOLERANCE,
+    STL_NOZZLE_TOLERANCE_FACTOR,
+    STL_NOZZLE_ANGULAR_TOLERANCE,
+)
+from tp_extension_builder.dimensions import (
+    TrackPointCapDimensions,
+    TrackPointStemDimensions,
+    CAP_DIMENSIONS_RED_T460S,
+    CAP_DIMENSIONS_GREEN_T430,
+    CAP_DIMENSIONS_BLUE_X1_CARBON,
+    STEM_DIMENSIONS_RED_T460S,
+    STEM_DIMENSIONS_GREEN_T430,
+    STEM_DIMENSIONS_BLUE_X1_CARBON,
+)
+from tp_extension_builder.profiling import profile_span
+
 if TYPE_CHECKING:
     # Importing these classes causes build123d to be imported, which is very
     # slow. So we only import it when it is needed and during type checking.
     from build123d import Shape
+    from tp_extension_builder.mesh import Mesh
     from tp_extension_builder.tp_extensions import (
         TrackPointExtensionRedT460S,
         TrackPointExtensionGreenT430,
@@ -95,25 +118,67 @@ class TrackPointModel(str, Enum):
             raise ValueError(f'Cannot build cap for {self}')
         return cap
 
+    @property
+    def cap_dimensions(self) -> TrackPointCapDimensions:
+        """
+        Returns the dimensions of this model's cap without building it.
+        """
+        mapping = {
+            TrackPointModel.red_t460s: CAP_DIMENSIONS_RED_T460S,
+            TrackPointModel.green_t430: CAP_DIMENSIONS_GREEN_T430,
+            TrackPointModel.blue_x1_carbon: CAP_DIMENSIONS_BLUE_X1_CARBON,
+        }
+
+        cap_dimensions = mapping.get(self)
+        if cap_dimensions is None:
+            raise ValueError(f'No cap dimensions for {self}')
+        return cap_dimensions
+
+    @property
+    def stem_dimensions(self) -> TrackPointStemDimensions:
+        """
+        Returns the dimensions of this model's stem.
+        """
+        mapping = {
+            TrackPointModel.red_t460s: STEM_DIMENSIONS_RED_T460S,
+            TrackPointModel.green_t430: STEM_DIMENSIONS_GREEN_T430,
+            TrackPointModel.blue_x1_carbon: STEM_DIMENSIONS_BLUE_X1_CARBON,
+        }
+
+        stem_dimensions = mapping.get(self)
+        if stem_dimensions is None:
+            raise ValueError(f'No stem dimensions for {self}')
+        return stem_dimensions
+
+
+# The placeholders of export paths that are replaced by the parameter suffix
+PARAMS_PLACEHOLDERS = ['<params>', '<parameters>']
+
 
 class ExportFormat(str, Enum):
     step = 'step'
+    step_gz = 'step.gz'
     stl = 'stl'
+    threemf = '3mf'
 
     def export(
         self,
-        to_export: 'Shape',
+        to_export: Union['Shape[Any]', 'Mesh'],
         file_path: Union[str, Path],
         overwrite: bool = False,
+        stl_tolerance: float = D_STL_TOLERANCE,
+        stl_angular_tolerance: float = D_STL_ANGULAR_TOLERANCE,
+        metadata: Optional[Dict[str, Any]] = None,
     ) -> None:
         """
         Exports a shape using the selected format's build123d exporter
-        function.
+        function and prints the size of the file.
+
+        Meshes are written directly and can only be exported as STL. The
+        STL tolerances are also used for the meshes of 3MF files, which
+        store the metadata and one object per part.
         """
-        from build123d import (
-            export_step,
-            export_stl,
-        )
+        from tp_extension_builder.mesh import Mesh, write_stl
 
         file_path = self.add_extension_to_path(file_path)
 
@@ -129,68 +194,87 @@ class ExportFormat(str, Enum):
         except (PermissionError, OSError) as e:
             print(f'Could not create dir for export path: {e}')
 
+        if isinstance(to_export, Mesh):
+            if self is not ExportFormat.stl:
+                raise ValueError(f'Meshes can not be exported as {self.value}')
+
+            write_stl(file_path, to_export)
+            print(get_export_report(file_path))
+            return
+
+        from build123d import export_step
+        from tp_extension_builder.utils import (
+            export_3mf,
+            export_step_gz,
+            export_stl,
+        )
+
         if self is ExportFormat.step:
-            export_step(to_export, str(file_path))
+            with profile_span('write_step'):
+                export_step(to_export, str(file_path))
+        elif self is ExportFormat.step_gz:
+            export_step_gz(to_export, file_path)
         elif self is ExportFormat.stl:
-            export_stl(to_export, str(file_path))
+            export_stl(
+                to_export,
+                file_path,
+                tolerance=stl_tolerance,
+                angular_tolerance=stl_angular_tolerance,
+            )
+        elif self is ExportFormat.threemf:
+            export_3mf(
+                to_export,
+                file_path,
+                tolerance=stl_tolerance,
+                angular_tolerance=stl_angular_tolerance,
+                metadata=metadata,
+            )
         else:
             raise ValueError(f'{self.value} is not a supported export format')
 
+        print(get_export_report(file_path))
+
     def add_extension_to_path(self, file_path: Union[str, Path]) -> Path:
         """
         Replaces the file extension of a path with the extension for the
         selected type.
         """
-        new_path = Path(file_path).with_suffix(f'.{self.value}')
+        file_path = Path(file_path)
+
+        # Extensions like `.step.gz` consist of two suffixes, which would
+        # only be replaced partially
+        for export_format in ExportFormat:
+            extension = f'.{export_format.value}'
+            if len(extension) > len(
+                file_path.suffix
+            ) and file_path.name.lower().endswith(extension):
+                file_path = file_path.with_name(
+                    file_path.name[: -len(extension)]
+                )
+                break
+
+        new_path = file_path.with_suffix(f'.{self.value}')
 
         return new_path
 
     def substitute_file_path(
         self,
         file_path: Union[str, Path],
+        param_suffix: str = '',
         extra_substitutions: Dict[str, str] = {},
-        param_suffix_func_offset: int = 0,
-        param_suffix_exclude_list: List[str] = [],
-        include_only_non_default: bool = True,
     ) -> Path:
         """
         Makes the following replacements in the file path:
-          - `<params>` / `<parameters>` to calling function's short parameter
-            values
+          - `<params>` / `<parameters>` to the parameter suffix, e.g. from
+            `get_file_name_suffix_from_params()`
           - `<format>` to the selected format in this enum
           - The dict keys in extra_substitutions to the dict values
         """
 
         file_path_str = str(file_path)
 
-        # Add additional, common parameters that should be excluded
-        param_suffix_exclude_list.extend(
-            [
-                'export_path',
-                'export_format',
-                'export_overwrite',
-                'interactive',
-            ]
-        )
-
-        # Replace `<params>` with the parameters of the calling function
-
-        # Increment func offset to get the parameters of the calling
-        # function and not of this one
-        param_suffix_func_offset += 1
-        param_suffix = get_file_name_suffix_from_params(
-            exclude_list=param_suffix_exclude_list,
-            call_frame_offset=param_suffix_func_offset,
-            include_only_non_default=include_only_non_default,
-        )
-        file_path_str = file_path_str.replace(
-            '<params>',
-            param_suffix,
-        )
-        file_path_str = file_path_str.replace(
-            '<parameters>',
-            param_suffix,
-        )
+        for placeholder in PARAMS_PLACEHOLDERS:
+            file_path_str = file_path_str.replace(placeholder, param_suffix)
 
         # Replace format with extension of selected format
         file_path_str = file_path_str.replace(
@@ -310,152 +394,79 @@ def is_interactive_mode() -> bool:
     return True
 
 
-def get_export_path(file_name: str) -> Path:
-    current_dir_exports = Path('exports')
-    parent_dir_exports = Path('../exports')
-
-    if current_dir_exports.is_dir():
-        return current_dir_exports / file_name
-    elif parent_dir_exports.is_dir():
-        return parent_dir_exports / file_name
-    else:
-        return Path(file_name)
-
+def get_stl_tolerances(
+    stl_tolerance: Optional[float] = None,
+    stl_angular_tolerance: Optional[float] = None,
+    nozzle_size: Optional[float] = None,
+) -> Tuple[float, float]:
+    """
+    Returns the linear and angular STL tolerance.
 
-def get_func_call_history_param_info(
-    exclude_list: Optional[List[str]] = None,
-    call_frame_offset: int = 0,
-) -> Dict[str, Dict[str, Any]]:
+    Tolerances that are not set are taken from the nozzle size preset or
+    the build123d defaults if there is no nozzle size.
     """
-    Retrieves parameter information from the call history of functions.
+    if nozzle_size is not None:
+        default_tolerance = nozzle_size * STL_NOZZLE_TOLERANCE_FACTOR
+        default_angular_tolerance = STL_NOZZLE_ANGULAR_TOLERANCE
+    else:
+        default_tolerance = D_STL_TOLERANCE
+        default_angular_tolerance = D_STL_ANGULAR_TOLERANCE
 
-    This function returns the parameter names, their annotations, and their
-    values for a function that was called prior to this one, based on the
-    specified call frame offset.
+    if stl_tolerance is None:
+        stl_tolerance = default_tolerance
+    if stl_angular_tolerance is None:
+        stl_angular_tolerance = default_angular_tolerance
 
-    Parameters:
-    - exclude_list: Optional[List[str]]
-        A list of parameter names to exclude from the results.
-    - call_frame_offset: int
-        The number of calls to look back in the call history. For example,
-        0 refers to the previous function call, 1 refers to the call before
-        that, and so on.
+    return (stl_tolerance, stl_angular_tolerance)
 
-    Returns:
-    - Dict[str, Dict[str, Any]]:
-        A dictionary where each key is a parameter name and the value is
-        another dictionary with the following keys:
-        - 'value': The value passed to the parameter.
-        - 'default': The default value of the parameter.
-        - 'annotation': The type annotation of the parameter, or None if
-          no annotation is present.
 
-    Example usage:
+def format_file_size(size: int) -> str:
+    if size < 1024:
+        return f'{size} B'
+    elif size < 1024 * 1024:
+        return f'{size / 1024:.1f} KB'
 
-    ```python
-    def example_function(a: int, b: str, c: float = 3.0) -> None:
-        info = get_func_call_history_param_info(call_frame_offset=0)
-        print(info)
+    return f'{size / 1024 / 1024:.1f} MB'
 
 
-    # It will print the parameter info and values passed to
-    # `example_function`.
-    ```
+def get_export_report(file_path: Path) -> str:
     """
+    Returns the size of an exported file and its number of triangles if it
+    is an STL file.
+    """
+    file_size = format_file_size(file_path.stat().st_size)
 
-    if exclude_list is None:
-        exclude_list = []
-
-    # Always exclude self and cls for methods
-    if 'self' not in exclude_list:
-        exclude_list.append('self')
-    if 'cls' not in exclude_list:
-        exclude_list.append('cls')
-
-    # Increment call_frame_offset to always skip the current frame.
-    call_frame_offset += 1
-
-    # Get the frame of X calls before the current function
-    frame = inspect.currentframe()
-    for _ in range(call_frame_offset):
-        if frame is None:
-            break
-        else:
-            frame = frame.f_back
+    if file_path.suffix.lower() == '.stl':
+        from tp_extension_builder.mesh import get_stl_triangle_count
 
-    if frame is None:
-        return {}
+        triangle_count = get_stl_triangle_count(file_path)
 
-    func_name = frame.f_code.co_name
+        return f'Exported {triangle_count:,} triangles ({file_size})'
 
-    # Get the function from the frame
-    try:
-        func = frame.f_globals[func_name]
-    except KeyError:
-        raise ValueError(
-            f'Your call_frame_offset seems to be too high. Could not '
-            f'retrieve parameters for function "{func_name}"'
-        )
+    return f'Exported {file_size}'
 
-    # Get the function signature and annotations
-    signature = inspect.signature(func)
-    annotations = {
-        param_name: (
-            param.annotation
-            if param.annotation != inspect.Parameter.empty
-            else None
-        )
-        for param_name, param in signature.parameters.items()
-    }
 
-    defaults = {
-        param_name: (
-            param.default if param.default != inspect.Parameter.empty else None
-        )
-        for param_name, param in signature.parameters.items()
-    }
-
-    # Get the argument values and annotations from the frame
-    args, _, _, values = inspect.getargvalues(frame)
-    params = {
-        arg: {
-            'value': values[arg],
-            'default': defaults.get(arg),
-            'annotation': annotations.get(arg),
-        }
-        for arg in args
-        if arg not in exclude_list
-    }
+def get_export_path(file_name: str) -> Path:
+    current_dir_exports = Path('exports')
+    parent_dir_exports = Path('../exports')
 
-    return params
+    if current_dir_exports.is_dir():
+        return current_dir_exports / file_name
+    elif parent_dir_exports.is_dir():
+        return parent_dir_exports / file_name
+    else:
+        return Path(file_name)
 
 
-def get_func_call_history_typer_names(
-    exclude_list: Optional[List[str]] = None,
-    call_frame_offset: int = 0,
-) -> List[Tuple[List[str], Any, Any]]:
+@functools.lru_cache(maxsize=None)
+def get_func_typer_names(
+    func: Callable[..., Any],
+) -> Dict[str, Tuple[List[str], Any]]:
     """
-    Retrieves Typer parameter names and their values from the call history
-    of functions.
-
-    This function returns a list of tuples containing parameter names
-    (including aliases defined by Typer) and their values for a function
-    that was called prior to this one, based on the specified call frame
-    offset.
-
-    Parameters:
-    - exclude_list: Optional[List[str]]
-        A list of parameter names to exclude from the results.
-    - call_frame_offset: int
-        The number of calls to look back in the call history. For example,
-        0 refers to the previous function call, 1 refers to the call before
-        that, and so on.
+    Returns the parameter names, including aliases defined by Typer, and the
+    default value of every parameter of a function.
 
-    Returns:
-    - List[Tuple[List[str], Any, Any]]:
-        A list of tuples, each containing:
-        - A list of parameter names, including any aliases defined by Typer.
-        - The value passed to the parameter.
+    The signature is only inspected once per function.
 
     Example usage:
     def example_function(
@@ -464,14 +475,15 @@ def get_func_call_history_typer_names(
                 typer.Argument('--my-arg', '--ma')
             ] = 1,
             b: int = 2) -> None:
-        info = get_func_call_history_typer_names(call_frame_offset=1)
-        print(info)
-
-    # When example_function(10, 20) is called, it will print:
-    # [
-    #    (['my_arg', 'my-arg', 'ma'], 10, 1),
-    #    (['b'], 20, 2)
-    # ]
+        pass
+
+    print(get_func_typer_names(example_function))
+
+    # It will print:
+    # {
+    #    'my_arg': (['my_arg', 'my-arg', 'ma'], 1),
+    #    'b': (['b'], 2),
+    # }
     """
 
     def get_typer_info_from_annotation(
@@ -484,17 +496,9 @@ def get_func_call_history_typer_names(
 
         return None
 
-    # Increment call_frame offset to get info about previous func
-    # and not this one.
-    call_frame_offset += 1
-
-    param_infos = get_func_call_history_param_info(
-        exclude_list, call_frame_offset
-    )
-
-    param_names_and_values = []
-    for param_name, param_info in param_infos.items():
-        typer_info = get_typer_info_from_annotation(param_info['annotation'])
+    typer_names = {}
+    for param_name, param in inspect.signature(func).parameters.items():
+        typer_info = get_typer_info_from_annotation(param.annotation)
 
         all_names = [param_name]
 
@@ -512,42 +516,38 @@ def get_func_call_history_typer_names(
                 if isinstance(param, str)
             ]
 
-        param_names_and_values.append(
-            (all_names, param_info['value'], param_info['default'])
+        default = (
+            param.default if param.default != inspect.Parameter.empty else None
         )
+        typer_names[param_name] = (all_names, default)
 
-    return param_names_and_values
+    return typer_names
 
 
 def get_file_name_suffix_from_params(
-    exclude_list: Optional[List[str]] = None,
+    func: Callable[..., Any],
+    params: Dict[str, Any],
     param_max_len: int = 3,
-    call_frame_offset: int = 0,
     include_only_non_default: bool = False,
 ) -> str:
     """
-    Generates a file name suffix based on parameter values from the call
-    history of previous functions.
+    Generates a file name suffix from parameter values of a Typer command.
 
-    This function retrieves Typer parameter names and their values from the
-    call history of functions that were called prior to this one, based on
-    the specified call frame offset.
-
-    It constructs a suffix for a file name by combining shortened parameter
-    names with their corresponding values.
+    It constructs a suffix for a file name by combining the shortened
+    parameter names of `func` with the values in `params`. Only the
+    parameters in `params` are used and they are ordered like the
+    parameters of `func`.
 
     Parameters:
-    - exclude_list: Optional[List[str]]
-        A list of parameter names to exclude from consideration when
-        generating the suffix.
+    - func: Callable[..., Any]
+        The Typer command that defines the short parameter names and
+        defaults.
+    - params: Dict[str, Any]
+        The values of the parameters that should be part of the file name.
     - param_max_len: int
         Maximum length for a parameter name to be considered for shortening.
         Parameter names longer than this length will not be included in the
         suffix.
-    - call_frame_offset: int
-        The number of calls to look back in the call history. For example, 0
-        refers to the previous function call, 1 refers to the call before
-        that, and so on.
     - include_only_non_default: bool
         Only include parameters where the default value was changed.
 
@@ -557,20 +557,20 @@ def get_file_name_suffix_from_params(
         joining shortened parameter names with their corresponding values,
         separated by '-'.
     """
-
-    # Increment call_frame offset to get info about previous func
-    # and not this one.
-    call_frame_offset += 1
-
-    typer_infos = get_func_call_history_typer_names(
-        exclude_list=exclude_list,
-        call_frame_offset=call_frame_offset,
-    )
-
     param_values = []
-    for names, value, default in typer_infos:
+    for param_name, (names, default) in get_func_typer_names(func).items():
+        if param_name not in params:
+            continue
+
+        value = params[param_name]
         if isinstance(value, Enum):
             value = value.value
+        elif isinstance(value, (tuple, list)):
+            # Sizes like the bed size are written as e.g. 200x200
+            value = 'x'.join(
+                f'{item:g}' if isinstance(item, float) else str(item)
+                for item in value
+            )
 
         if isinstance(default, Enum):
             default = default.value
@@ -588,3 +588,116 @@ def get_file_name_suffix_from_params(
     file_name_suffix = '_'.join(param_values)
 
     return file_name_suffix
+
+
+#
+# Parameter Sweeps
+#
+
+
+def parse_sweep_values(
+    values: Optional[List[str]],
+    default: float,
+    max_decimals: int = 6,
+) -> List[float]:
+    """
+    Parses the values of a sweep option into a list of floats.
+
+    Every value can be a single number, a comma separated list of numbers
+    (`0.1,0.2,0.4`) or an inclusive range with a step size
+    (`0.1:0.5:0.1`). The default is used if no value was given.
+
+    Values are rounded to `max_decimals` to avoid float artifacts from
+    ranges ending up in file names.
+    """
+    if not values:
+        return [default]
+
+    parsed: List[float] = []
+    for value in values:
+        for part in value.split(','):
+            part = part.strip()
+            if not part:
+                continue
+
+            if ':' not in part:
+                try:
+                    parsed.append(round(float(part), max_decimals))
+                except ValueError:
+                    raise typer.BadParameter(
+                        f'Invalid value "{part}"'
+                    ) from None
+                continue
+
+            range_parts = part.split(':')
+            if len(range_parts) != 3:
+                raise typer.BadParameter(
+                    f'Invalid range "{part}". Use start:stop:step.'
+                )
+
+            try:
+                start, stop, step = [float(p) for p in range_parts]
+            except ValueError:
+                raise typer.BadParameter(f'Invalid value "{part}"') from None
+            if step <= 0:
+                raise typer.BadParameter(
+                    f'Invalid range "{part}". The step must be positive.'
+                )
+
+            # Allow for float inaccuracies when checking the range end
+            step_count = int(math.floor((stop - start) / step + 1e-9))
+            parsed.extend(
+                round(start + i * step, max_decimals)
+                for i in range(step_count + 1)
+            )
+
+    # Remove duplicates while keeping the order
+    return list(dict.fromkeys(parsed))
+
+
+def get_sweep_variants(
+    sweep_params: Dict[str, List[Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Returns one dict of parameter values for every combination of the
+    values in `sweep_params`.
+    """
+    names = list(sweep_params.keys())
+
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*sweep_params.values())
+    ]
+
+
+def make_sweep_option(option: Any) -> Any:
+    """
+    Creates a repeatable sweep option that accepts lists and ranges from the
+    annotated type of a typer option and uses the same names.
+
+    Usage:
+        OptFoo = Annotated[float, typer.Option('--foo', '--fo', help='Foo')]
+        SweepOptFoo = Annotated[
+            Optional[List[str]],
+            make_sweep_option(OptFoo),
+        ]
+    """
+    option_info = None
+    for metadata in getattr(option, '__metadata__', []):
+        if isinstance(metadata, typer.models.OptionInfo):
+            option_info = metadata
+
+    if option_info is None:
+        raise ValueError(f'{option} is not an annotated typer option')
+
+    param_decls = [
+        param
+        for param in [option_info.default, *(option_info.param_decls or [])]
+        if isinstance(param, str)
+    ]
+    help_text = (
+        f'{option_info.help} Accepts a list (0.1,0.2), a range with a '
+        'step size (0.1:0.5:0.1) and can be used multiple times.'
+    )
+
+    return typer.Option(*param_decls, help=help_text)
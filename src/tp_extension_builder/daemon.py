@@ -0,0 +1,514 @@
+"""
+A build server that keeps build123d and OCP loaded between commands.
+
+Importing build123d takes seconds, which is much longer than most builds.
+While `tp_extension_builder serve` runs, the launcher forwards the
+commands that build models to it over a Unix socket. The server runs them
+in its own process, so they also profit from the caps and dot patterns
+that earlier commands already built.
+
+The server runs one command at a time. When it is busy, it was started
+from a different version of the package or it isn't running, the command
+is run in-process instead, just like without a server.
+
+Messages are JSON objects, one per line:
+
+  - The client sends a `run` request with the arguments, working
+    directory and environment of the command.
+  - The server sends the output of the command as `stdout` and `stderr`
+    messages and asks the client for a line of its stdin with `input`
+    messages, e.g. for confirmation prompts.
+  - The server finishes with an `exit` message with the exit code of the
+    command, or a `busy` or `outdated` message if it didn't run it.
+"""
+
+import io
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import traceback
+
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from tp_extension_builder.cache import get_cache_dir
+from tp_extension_builder.launcher import PACKAGE_NAME, get_package_key
+
+
+# The commands that build models and are forwarded to the server
+SERVER_COMMANDS = ['build', 'build-kicad-model', 'combine']
+
+# Set this environment variable to always run commands in-process
+NO_SERVER_VAR = 'TP_EXTENSION_BUILDER_NO_SERVER'
+
+SOCKET_FILE_NAME = 'build-server.sock'
+
+# Connections are accepted one at a time, so a client that doesn't send
+# its request within this many seconds is dropped instead of blocking the
+# clients after it
+REQUEST_TIMEOUT_S = 5.0
+
+# The fields of a `run` request that the server reads
+RUN_REQUEST_KEYS = [
+    'args',
+    'prog_name',
+    'cwd',
+    'env',
+    'stdout_isatty',
+    'stderr_isatty',
+]
+
+
+def get_socket_path() -> Path:
+    return get_cache_dir() / SOCKET_FILE_NAME
+
+
+def is_supported() -> bool:
+    return hasattr(socket, 'AF_UNIX')
+
+
+#
+# Protocol
+#
+
+
+def send_message(connection: socket.socket, message: Dict[str, Any]) -> None:
+    connection.sendall(json.dumps(message).encode() + b'\n')
+
+
+def read_messages(reader: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the messages until the other side closes the connection.
+    """
+    for line in reader:
+        yield json.loads(line)
+
+
+def connect(socket_path: Path) -> Optional[socket.socket]:
+    """
+    Returns a connection to the server or None if it isn't running.
+    """
+    if is_supported() is False:
+        return None
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(str(socket_path))
+    except OSError:
+        connection.close()
+        return None
+
+    return connection
+
+
+#
+# Client
+#
+
+
+def forward_command(args: List[str]) -> Optional[int]:
+    """
+    Runs the command on the build server and returns its exit code.
+
+    Returns None if the server didn't run the command, so that it can be
+    run in-process instead.
+    """
+    if os.environ.get(NO_SERVER_VAR):
+        return None
+
+    connection = connect(get_socket_path())
+    if connection is None:
+        return None
+
+    env = dict(os.environ)
+    if sys.stdout.isatty() is True and 'COLUMNS' not in env:
+        try:
+            env['COLUMNS'] = str(os.get_terminal_size(sys.stdout.fileno())[0])
+        except OSError:
+            pass
+
+    has_output = False
+    with connection, connection.makefile('rb') as reader:
+        try:
+            send_message(
+                connection,
+                {
+                    'type': 'run',
+                    'args': args,
+                    'prog_name': os.path.basename(sys.argv[0]),
+                    'cwd': os.getcwd(),
+                    'env': env,
+                    'package_key': get_package_key(),
+                    'stdout_isatty': sys.stdout.isatty(),
+                    'stderr_isatty': sys.stderr.isatty(),
+                },
+            )
+
+            for message in read_messages(reader):
+                message_type = message['type']
+                if message_type in ['busy', 'outdated']:
+                    return None
+
+                if message_type == 'exit':
+                    return int(message['code'])
+
+                has_output = True
+                if message_type == 'stdout':
+                    sys.stdout.write(message['text'])
+                    sys.stdout.flush()
+                elif message_type == 'stderr':
+                    sys.stderr.write(message['text'])
+                    sys.stderr.flush()
+                elif message_type == 'input':
+                    line = sys.stdin.readline() if sys.stdin else ''
+                    send_message(connection, {'type': 'input', 'text': line})
+        except OSError:
+            pass
+
+    # The connection was closed without an exit code. If the command
+    # didn't print anything yet, it's safe to run it again in-process.
+    if has_output is False:
+        return None
+
+    print('The build server stopped unexpectedly.', file=sys.stderr)
+    return 1
+
+
+def stop_server() -> bool:
+    """
+    Stops the build server and returns whether it was running.
+    """
+    connection = connect(get_socket_path())
+    if connection is None:
+        return False
+
+    with connection, connection.makefile('rb') as reader:
+        send_message(connection, {'type': 'stop'})
+        for _ in read_messages(reader):
+            pass
+
+    return True
+
+
+#
+# Server
+#
+
+
+class ServerTerminated(BaseException):
+    """
+    Raised when the server gets SIGTERM.
+
+    It derives from BaseException like KeyboardInterrupt, so the commands
+    don't catch it as their exit code or as a failure.
+    """
+
+
+def raise_server_terminated(*args: Any) -> None:
+    raise ServerTerminated()
+
+
+class ConnectionWriter(io.TextIOBase):
+    """
+    A stdout or stderr replacement that sends everything to the client.
+    """
+
+    def __init__(
+        self,
+        connection: socket.socket,
+        stream_name: str,
+        isatty: bool,
+    ) -> None:
+        self.connection = connection
+        self.stream_name = stream_name
+        self._isatty = isatty
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return 'utf-8'
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return self._isatty
+
+    def write(self, text: str) -> int:
+        if not isinstance(text, str):
+            raise TypeError(f'write() argument must be str, not {type(text)}')
+
+        if text:
+            send_message(
+                self.connection,
+                {'type': self.stream_name, 'text': text},
+            )
+
+        return len(text)
+
+
+class ConnectionReader(io.TextIOBase):
+    """
+    A stdin replacement that reads lines from the stdin of the client.
+    """
+
+    def __init__(self, connection: socket.socket, reader: BinaryIO) -> None:
+        self.connection = connection
+        self.reader = reader
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(  # type: ignore[override]
+        self,
+        size: Optional[int] = -1,
+    ) -> str:
+        send_message(self.connection, {'type': 'input'})
+
+        line = self.reader.readline()
+        if not line:
+            return ''
+
+        message = json.loads(line)
+        return str(message.get('text', ''))
+
+
+class BuildServer:
+    """
+    Runs the forwarded commands one at a time in this process.
+
+    A background thread accepts the connections, so that clients get an
+    answer right away while a command runs. Everything else happens in the
+    main thread.
+    """
+
+    def __init__(self, socket_path: Path, idle_timeout: float) -> None:
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        self.package_key = get_package_key()
+
+        self._is_busy = threading.Event()
+        self._requests: queue.Queue[
+            Optional[Tuple[socket.socket, BinaryIO, Dict[str, Any]]]
+        ] = queue.Queue()
+
+        # The streams are replaced while a command runs, but the messages
+        # of the server belong in its own output
+        self._log_stream = sys.stdout
+
+    def log(self, text: str) -> None:
+        print(text, file=self._log_stream, flush=True)
+
+    def serve(self) -> None:
+        """
+        Serves until the server is stopped or was idle for `idle_timeout`
+        seconds. An `idle_timeout` of 0 disables the timeout.
+        """
+        self._remove_stale_socket()
+
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        # The server runs any command it gets, so only the user that
+        # started it may connect
+        old_umask = os.umask(0o177)
+        try:
+            listener.bind(str(self.socket_path))
+        finally:
+            os.umask(old_umask)
+
+        # Stopping the server with a signal should still remove the socket
+        signal.signal(signal.SIGTERM, raise_server_terminated)
+
+        try:
+            listener.listen()
+            self.log(
+                f'Build server for {PACKAGE_NAME} listening on '
+                f'{self.socket_path} ...'
+            )
+            threading.Thread(
+                target=self._accept_connections,
+                args=(listener,),
+                daemon=True,
+            ).start()
+
+            self._handle_requests()
+        finally:
+            listener.close()
+            self.socket_path.unlink(missing_ok=True)
+
+    def _remove_stale_socket(self) -> None:
+        """
+        Removes the socket of a server that didn't shut down cleanly.
+        """
+        if not self.socket_path.exists():
+            return
+
+        connection = connect(self.socket_path)
+        if connection is not None:
+            connection.close()
+            raise RuntimeError(
+                f'A build server is already running on {self.socket_path}'
+            )
+
+        self.socket_path.unlink()
+
+    def _accept_connections(self, listener: socket.socket) -> None:
+        while True:
+            connection, _ = listener.accept()
+            try:
+                self._accept_connection(connection)
+            except socket.timeout:
+                self.log('A client sent no request, closing its connection.')
+                connection.close()
+            except (
+                json.JSONDecodeError,
+                UnicodeDecodeError,
+                KeyError,
+                TypeError,
+            ):
+                self.log('A client sent an invalid request, ignoring it.')
+                connection.close()
+            except OSError:
+                connection.close()
+
+    def _accept_connection(self, connection: socket.socket) -> None:
+        connection.settimeout(REQUEST_TIMEOUT_S)
+        reader = connection.makefile('rb')
+        request = self._read_request(reader)
+
+        # Commands wait for the input of the user, e.g. for confirmation
+        # prompts, which may take longer than the request
+        connection.settimeout(None)
+
+        if request['type'] == 'stop':
+            self._requests.put(None)
+            connection.close()
+            return
+
+        if request.get('package_key') != self.package_key:
+            self.log('The package changed, stopping the build server...')
+            send_message(connection, {'type': 'outdated'})
+            connection.close()
+            self._requests.put(None)
+            return
+
+        if self._is_busy.is_set():
+            send_message(connection, {'type': 'busy'})
+            connection.close()
+            return
+
+        self._is_busy.set()
+        self._requests.put((connection, reader, request))
+
+    def _read_request(self, reader: BinaryIO) -> Dict[str, Any]:
+        """
+        Reads the first message of a client.
+
+        Raises a KeyError if it lacks a field, so that an invalid request
+        is rejected here instead of stopping the main thread.
+        """
+        request: Dict[str, Any] = json.loads(reader.readline())
+        if request['type'] == 'run':
+            for key in RUN_REQUEST_KEYS:
+                if key not in request:
+                    raise KeyError(key)
+
+        return request
+
+    def _handle_requests(self) -> None:
+        timeout = self.idle_timeout if self.idle_timeout > 0 else None
+        while True:
+            try:
+                item = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                self.log('The build server was idle, stopping...')
+                return
+
+            if item is None:
+                self.log('Stopping the build server...')
+                return
+
+            connection, reader, request = item
+            try:
+                with connection, reader:
+                    self._run_request(connection, reader, request)
+            finally:
+                self._is_busy.clear()
+
+    def _run_request(
+        self,
+        connection: socket.socket,
+        reader: BinaryIO,
+        request: Dict[str, Any],
+    ) -> None:
+        from tp_extension_builder.cli import app
+
+        args = request['args']
+        self.log(f'Running: {" ".join(args)}')
+
+        old_cwd = os.getcwd()
+        old_env = dict(os.environ)
+        old_streams = (sys.stdin, sys.stdout, sys.stderr)
+
+        exit_code: Any = 0
+        try:
+            os.chdir(request['cwd'])
+            os.environ.clear()
+            os.environ.update(request['env'])
+
+            sys.stdin = ConnectionReader(connection, reader)
+            sys.stdout = ConnectionWriter(
+                connection, 'stdout', request['stdout_isatty']
+            )
+            sys.stderr = ConnectionWriter(
+                connection, 'stderr', request['stderr_isatty']
+            )
+
+            app(args=args, prog_name=request['prog_name'])
+        except ServerTerminated:
+            raise
+        except SystemExit as e:
+            exit_code = e.code
+        except Exception:
+            exit_code = 1
+            try:
+                sys.stderr.write(traceback.format_exc())
+            except OSError:
+                pass
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = old_streams
+            os.environ.clear()
+            os.environ.update(old_env)
+            os.chdir(old_cwd)
+
+        if exit_code is None:
+            exit_code = 0
+        elif not isinstance(exit_code, int):
+            exit_code = 1
+
+        try:
+            send_message(connection, {'type': 'exit', 'code': exit_code})
+        except OSError:
+            self.log('The client disconnected before the command finished.')
+
+
+def serve(idle_timeout: float) -> None:
+    """
+    Loads build123d and runs the build server in the foreground.
+    """
+    import build123d  # noqa: F401
+
+    import tp_extension_builder.utils  # noqa: F401
+
+    server = BuildServer(
+        socket_path=get_socket_path(),
+        idle_timeout=idle_timeout,
+    )
+    try:
+        server.serve()
+    except (KeyboardInterrupt, ServerTerminated):
+        server.log('Stopping the build server...')
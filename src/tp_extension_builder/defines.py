@@ -1,3 +1,6 @@
+from enum import Enum
+
+
 #
 # Measurements
 #
@@ -20,3 +23,36 @@ D_PCB_HEIGHT = 1.6
 D_ADAPTER_WIDTH_BELOW_PCB = 5.0
 D_ADAPTER_WIDTH_ABOVE_PCB = 4.0
 D_EXTENSION_WIDTH = 2.0
+
+# Max size of the on-disk build cache before old entries are evicted
+D_CACHE_MAX_SIZE_MB = 500.0
+
+# The build server stops after it was idle for this long
+D_SERVER_IDLE_TIMEOUT_MIN = 30.0
+
+# The STL tessellation defaults of build123d
+D_STL_TOLERANCE = 0.001
+D_STL_ANGULAR_TOLERANCE = 0.1
+
+# The nozzle preset uses a fraction of the nozzle size as the max deviation
+# of the triangles, which no printer can resolve. The coarse angular
+# tolerance only affects small features, because the linear tolerance
+# still applies to large curves.
+STL_NOZZLE_TOLERANCE_FACTOR = 0.05
+STL_NOZZLE_ANGULAR_TOLERANCE = 0.5
+
+
+#
+# Detail Levels
+#
+
+
+class DetailLevel(str, Enum):
+    """
+    How detailed the cap is built. Low detail caps have no dome dots and a
+    coarse dome profile. They are much faster to build and to load, which
+    is enough for previews and KiCad models.
+    """
+
+    low = 'low'
+    full = 'full'
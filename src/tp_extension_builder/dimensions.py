@@ -0,0 +1,558 @@
+import math
+
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Dict, Tuple
+
+from tp_extension_builder.defines import (
+    CHOC_KEYCAP_HEIGHT,
+    CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT,
+    D_ADAPTER_HOLE_INCR,
+    D_ADAPTER_WIDTH_ABOVE_PCB,
+    D_ADAPTER_WIDTH_BELOW_PCB,
+    D_EXTENSION_WIDTH,
+    D_MOUNTING_DISTANCE,
+    D_PCB_HEIGHT,
+)
+
+
+#
+# Cap Dimensions
+#
+
+DEFAULT_DOME_DOT_HEIGHT = 0.2
+DEFAULT_DOME_DOT_RADIUS = 0.3
+DEFAULT_DOME_DOT_SPACING = 0.85
+DEFAULT_DOME_DOT_ROWS = (
+    3,
+    7,
+    7,
+    9,
+    9,
+    9,
+    7,
+    7,
+    3,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class TrackPointCapDimensions:
+    """
+    The dimensions of a red TrackPoint cap.
+
+    Everything the extensions need to know about a cap can be calculated from
+    these values, so they can be used without building the cap's solid.
+    """
+
+    model: str
+    total_height: float
+    base_height: float
+    base_diameter: float
+    dome_diameter: float
+    hole_length: float
+    hole_width: float
+    hole_depth: float
+    cap_adapter_width_decrease: float
+    cap_adapter_length_decrease: float
+    dome_dot_height: float = DEFAULT_DOME_DOT_HEIGHT
+    dome_dot_radius: float = DEFAULT_DOME_DOT_RADIUS
+    dome_dot_spacing: float = DEFAULT_DOME_DOT_SPACING
+    dome_dot_rows: Tuple[int, ...] = DEFAULT_DOME_DOT_ROWS
+
+    @property
+    def dome_height(self) -> float:
+        return self.total_height - self.base_height - self.dome_dot_height
+
+    @property
+    def cap_adapter_width(self) -> float:
+        return self.hole_width - self.cap_adapter_width_decrease
+
+    @property
+    def cap_adapter_length(self) -> float:
+        return self.hole_length - self.cap_adapter_length_decrease
+
+    @property
+    def cap_adapter_height(self) -> float:
+        return self.hole_depth
+
+    @property
+    def cap_extra_height(self) -> float:
+        """
+        How much the cap adds to the height of the extension.
+        """
+        return self.total_height - self.hole_depth
+
+    @property
+    def width(self) -> float:
+        return max(self.dome_diameter, self.base_diameter)
+
+    @property
+    def size(self) -> Tuple[float, float, float]:
+        """
+        The size of the cap's bounding box in X, Y and Z.
+        """
+        length = width = self.width
+
+        # Dome dots that don't fit on the dome stick out to the sides
+        if self.dome_dot_rows:
+            dots_length = (
+                max(self.dome_dot_rows) - 1
+            ) * self.dome_dot_spacing + self.dome_dot_radius * 2
+            dots_width = (
+                len(self.dome_dot_rows) - 1
+            ) * self.dome_dot_spacing + self.dome_dot_radius * 2
+            length = max(length, dots_length)
+            width = max(width, dots_width)
+
+        return (length, width, self.total_height)
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """
+        Returns the dimensions as keyword arguments for `TrackPointCapBase`.
+        """
+        return asdict(self)
+
+
+CAP_DIMENSIONS_RED_T460S = TrackPointCapDimensions(
+    model='Green T460S',
+    total_height=4.0,
+    base_height=2.0,
+    base_diameter=6.5,
+    dome_diameter=8.5,
+    hole_width=2.5,
+    hole_length=2.5,
+    hole_depth=3.0,
+    # Since the inside of the cap is rubber, we don't decrease the
+    # adapter size for a tighter fit
+    cap_adapter_length_decrease=0.0,
+    cap_adapter_width_decrease=0.0,
+)
+
+CAP_DIMENSIONS_GREEN_T430 = TrackPointCapDimensions(
+    model='Green T430',
+    total_height=6.2,
+    base_height=4.5,
+    base_diameter=6.8,
+    dome_diameter=8.0,
+    hole_width=2.3,
+    hole_length=2.3,
+    hole_depth=5.3,
+    # Since the inside of the cap is hard plastic and not rubber, we
+    # decrease the tip width to make it fit better
+    cap_adapter_length_decrease=0.2,
+    cap_adapter_width_decrease=0.2,
+)
+
+CAP_DIMENSIONS_BLUE_X1_CARBON = TrackPointCapDimensions(
+    model='Blue X1 Carbon',
+    total_height=3.0,
+    base_height=1.3,
+    base_diameter=6.5,
+    dome_diameter=8.0,
+    hole_width=2.2,
+    hole_length=2.2,
+    # Yes, the hole is smaller than the stem of the TP
+    # the cap hovers above the platform
+    hole_depth=1.8,
+    # Since the inside of the cap is rubber, we don't decrease the
+    # adapter size to achieve a tight fit.
+    cap_adapter_length_decrease=0.0,
+    cap_adapter_width_decrease=0.0,
+)
+
+
+#
+# TrackPoint Stem Dimensions
+#
+
+
+@dataclass(frozen=True)
+class TrackPointStemDimensions:
+    """
+    The dimensions of the TrackPoint module itself, which the extension's
+    adapter hole has to fit.
+    """
+
+    model: str
+
+    # Height from bottom metal part to stem top
+    total_height: float
+
+    # Height of the metal and black, round platform part.
+    # This is the height that sticks out below the pcb if the
+    # TP is mounted totally flush.
+    board_thickness: float
+
+    stem_width: float
+
+    @property
+    def stem_height(self) -> float:
+        """
+        The height of the white stem.
+        """
+        return self.total_height - self.board_thickness
+
+
+STEM_DIMENSIONS_RED_T460S = TrackPointStemDimensions(
+    model='Red T460S',
+    total_height=4.0,
+    board_thickness=1.3,
+    # Stem height: 2.7mm
+    stem_width=2.2,
+)
+
+STEM_DIMENSIONS_GREEN_T430 = TrackPointStemDimensions(
+    model='Green T430',
+    total_height=5.0,
+    board_thickness=2.5,
+    # Stem height: 2.5mm
+    stem_width=2.2,
+)
+
+STEM_DIMENSIONS_BLUE_X1_CARBON = TrackPointStemDimensions(
+    model='Blue X1 Carbon',
+    total_height=3.3,
+    board_thickness=1.2,
+    # Stem height: 2.1mm
+    stem_width=2.2,
+)
+
+
+#
+# Extension Parameters
+#
+
+
+@dataclass(frozen=True, slots=True)
+class TrackPointExtensionParams:
+    """
+    The user settings of a TrackPoint extension.
+
+    They are hashable and can be pickled, so the same object is used for
+    the info, file names, cache keys and to send variants to worker
+    processes.
+    """
+
+    tp_mounting_distance: float = D_MOUNTING_DISTANCE
+    desired_cap_height: float = CHOC_KEYCAP_HEIGHT
+    pcb_height: float = D_PCB_HEIGHT
+    space_above_pcb: float = CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT
+    adapter_width_below_pcb: float = D_ADAPTER_WIDTH_BELOW_PCB
+    adapter_width_above_pcb: float = D_ADAPTER_WIDTH_ABOVE_PCB
+    extension_width: float = D_EXTENSION_WIDTH
+    adapter_hole_incr: float = D_ADAPTER_HOLE_INCR
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the parameters as keyword arguments for the extensions.
+        """
+        return asdict(self)
+
+
+#
+# Extension Dimensions
+#
+
+
+@dataclass(frozen=True)
+class TrackPointExtensionDimensions:
+    """
+    The dimensions of a TrackPoint extension calculated from its parameters.
+
+    This is plain arithmetic, so it can be used to check the heights and
+    wall thicknesses of many extensions without importing build123d or
+    building any solids.
+    """
+
+    model: str
+    adapter_hole_incr: float
+    desired_cap_height: float
+    tp_mounting_distance: float
+    adapter_width_below_pcb: float
+    adapter_width_above_pcb: float
+    extension_width: float
+    pcb_height: float
+    space_above_pcb: float
+    tp_cap: TrackPointCapDimensions
+    tp_stem_width: float
+    tp_stem_height: float
+
+    # The user settings as they were given, before the lengths are made
+    # positive
+    params: TrackPointExtensionParams = field(
+        init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        object.__setattr__(
+            self,
+            'params',
+            TrackPointExtensionParams(
+                **{
+                    params_field.name: getattr(self, params_field.name)
+                    for params_field in fields(TrackPointExtensionParams)
+                }
+            ),
+        )
+
+        # Only the absolute values make sense for all lengths
+        for dimension_field in fields(self):
+            value = getattr(self, dimension_field.name)
+            if isinstance(value, (int, float)):
+                object.__setattr__(self, dimension_field.name, abs(value))
+
+    @classmethod
+    def from_params(
+        cls,
+        params: TrackPointExtensionParams,
+        model: str,
+        tp_cap: TrackPointCapDimensions,
+        tp_stem_width: float,
+        tp_stem_height: float,
+    ) -> 'TrackPointExtensionDimensions':
+        return cls(
+            **params.to_dict(),
+            model=model,
+            tp_cap=tp_cap,
+            tp_stem_width=tp_stem_width,
+            tp_stem_height=tp_stem_height,
+        )
+
+    @property
+    def adapter_height(self) -> float:
+        return (
+            self.tp_mounting_distance
+            + self.pcb_height
+            + self.space_above_pcb
+            - 0.2
+        )
+
+    @property
+    def adapter_hole_width(self) -> float:
+        return self.tp_stem_width + self.adapter_hole_incr
+
+    @property
+    def adapter_hole_height(self) -> float:
+        return self.tp_stem_height + self.adapter_hole_incr
+
+    @property
+    def adapter_hole_corner_distance(self) -> float:
+        return math.sqrt(
+            self.adapter_hole_width * self.adapter_hole_width
+            + self.adapter_hole_width * self.adapter_hole_width
+        )
+
+    @property
+    def adapter_height_below_pcb(self) -> float:
+        return self.pcb_height + self.tp_mounting_distance
+
+    @property
+    def adapter_height_above_pcb(self) -> float:
+        # Since a portion of the extension adapter will be below the top of
+        # the pcb, we calculate the length that it will extend above the
+        # pcb here
+        return self.adapter_height - self.adapter_height_below_pcb
+
+    @property
+    def adapter_wall_thickness_below_pcb(self) -> float:
+        return (self.adapter_width_below_pcb - self.adapter_hole_width) / 2
+
+    @property
+    def adapter_wall_thickness_above_pcb(self) -> float:
+        return (self.adapter_width_above_pcb - self.adapter_hole_width) / 2
+
+    @property
+    def adapter_corner_wall_thickness_below_pcb(self) -> float:
+        return (
+            self.adapter_width_below_pcb - self.adapter_hole_corner_distance
+        ) / 2
+
+    @property
+    def adapter_corner_wall_thickness_above_pcb(self) -> float:
+        return (
+            self.adapter_width_above_pcb - self.adapter_hole_corner_distance
+        ) / 2
+
+    @property
+    def adapter_corner_wall_thickness_top(self) -> float:
+        return self.adapter_height - self.adapter_hole_height
+
+    @property
+    def extension_height(self) -> float:
+        """
+        Height of the part between the mount at the bottom and tip at the
+        top.
+        """
+        return (
+            self.desired_cap_height
+            - self.tp_cap.total_height
+            - self.adapter_height_above_pcb
+        )
+
+    @property
+    def total_height(self) -> float:
+        return (
+            self.adapter_height
+            + self.extension_height
+            + self.tp_cap.cap_adapter_height
+        )
+
+    @property
+    def size(self) -> Tuple[float, float, float]:
+        """
+        The size of the extension's bounding box in X, Y and Z.
+        """
+        cylinder_width = max(
+            self.adapter_width_below_pcb,
+            self.adapter_width_above_pcb,
+            self.extension_width,
+        )
+
+        return (
+            max(cylinder_width, self.tp_cap.cap_adapter_length),
+            max(cylinder_width, self.tp_cap.cap_adapter_width),
+            self.total_height,
+        )
+
+    @property
+    def total_width(self) -> float:
+        """
+        The width of the widest section of the extension.
+        """
+        length, width, _ = self.size
+        return max(length, width)
+
+    @property
+    def above_pcb_height(self) -> float:
+        return self.total_height - self.adapter_height_below_pcb
+
+    @property
+    def above_pcb_height_with_cap(self) -> float:
+        return self.above_pcb_height + self.tp_cap.cap_extra_height
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the parameters as they were given and all calculated
+        dimensions.
+        """
+        calculated = [
+            'adapter_height',
+            'adapter_hole_width',
+            'adapter_hole_height',
+            'adapter_hole_corner_distance',
+            'adapter_height_below_pcb',
+            'adapter_height_above_pcb',
+            'adapter_wall_thickness_below_pcb',
+            'adapter_wall_thickness_above_pcb',
+            'adapter_corner_wall_thickness_below_pcb',
+            'adapter_corner_wall_thickness_above_pcb',
+            'adapter_corner_wall_thickness_top',
+            'extension_height',
+            'total_height',
+            'total_width',
+            'above_pcb_height',
+            'above_pcb_height_with_cap',
+        ]
+
+        dimensions = asdict(self)
+        del dimensions['params']
+
+        return {
+            **dimensions,
+            **self.params.to_dict(),
+            **{name: getattr(self, name) for name in calculated},
+        }
+
+    @property
+    def info(self) -> str:
+        tp_cap = self.tp_cap
+        cap_length, cap_width, cap_height = tp_cap.size
+
+        parameters = '\n'.join(
+            [f'\t{k}: {v}' for k, v in self.params.to_dict().items()]
+        )
+
+        def fv(
+            value: float, format_str: str = '.2f', units: str = 'mm'
+        ) -> str:
+            return f'{value:{format_str}}{units}'
+
+        info_list = [
+            'Info:',
+            f'\t TrackPoint Model: {self.model}',
+            f'\t Cap Model: {tp_cap.model}',
+            '',
+            'Parameters:',
+            f'{parameters}',
+            '',
+            'General Size:',
+            f'\tTotal Height: {fv(self.total_height)}',
+            f'\tTotal Width: {fv(self.total_width)}',
+            f'\tAbove PCB Height: {fv(self.above_pcb_height)}',
+            (
+                '\tAbove PCB Height (With Cap): '
+                f'{fv(self.above_pcb_height_with_cap)}'
+            ),
+            '',
+            'Adapter Hole:',
+            (
+                f'\t Width: {fv(self.adapter_hole_width)} '
+                f'({fv(self.adapter_hole_incr, "+.2f")})'
+            ),
+            (
+                f'\t Depth: {fv(self.adapter_hole_height)} '
+                f'({fv(self.adapter_hole_incr, "+.2f")})'
+            ),
+            f'\t Corner Distance: {fv(self.adapter_hole_corner_distance)}',
+            '',
+            'Adapter:',
+            f'\t Total Height: {fv(self.adapter_height)}',
+            '',
+            f'\t Below PCB Height  {fv(self.adapter_height_below_pcb)}',
+            f'\t Below PCB Width: {fv(self.adapter_width_below_pcb)}',
+            (
+                f'\t Below PCB Wall Thickness: '
+                f'{fv(self.adapter_wall_thickness_below_pcb)}'
+            ),
+            (
+                f'\t Below PCB Wall Thickness Corners: '
+                f'{fv(self.adapter_corner_wall_thickness_below_pcb)}'
+            ),
+            '',
+            f'\t Above PCB Height: {fv(self.adapter_height_above_pcb)}',
+            f'\t Above PCB Width: {fv(self.adapter_width_above_pcb)}',
+            (
+                f'\t Above PCB Wall Thickness: '
+                f'{fv(self.adapter_wall_thickness_above_pcb)}'
+            ),
+            (
+                f'\t Above PCB Wall Thickness Corners: '
+                f'{fv(self.adapter_corner_wall_thickness_above_pcb)}'
+            ),
+            '',
+            (
+                '\t Top Wall Thickness: '
+                f'{fv(self.adapter_corner_wall_thickness_top)}'
+            ),
+            '',
+            'Extension:',
+            f'\t Height: {fv(self.extension_height)}',
+            f'\t Width: {fv(self.extension_width)}',
+            '',
+            'Cap Adapter:',
+            f'\t Height: {fv(tp_cap.cap_adapter_height)}',
+            f'\t Width: {fv(tp_cap.cap_adapter_width)}',
+            f'\t Length: {fv(tp_cap.cap_adapter_length)}',
+            '',
+            'Cap:',
+            f'\t Hole Depth: {fv(tp_cap.hole_depth)}',
+            f'\t Hole Width: {fv(tp_cap.hole_width)}',
+            f'\t Hole Length: {fv(tp_cap.hole_length)}',
+            f'\t Cap Height: {fv(cap_height)}',
+            f'\t Cap Width: {fv(max(cap_length, cap_width))}',
+            f'\t Cap Height Increase: {fv(tp_cap.cap_extra_height)}',
+        ]
+
+        info_str = '\n'.join(info_list)
+
+        return info_str
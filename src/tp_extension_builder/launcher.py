@@ -0,0 +1,296 @@
+"""
+The entry point of the `tp_extension_builder` command.
+
+Importing typer takes longer than the whole startup time budget of the
+CLI, because it always imports rich. So this module answers the requests
+that don't build anything without importing the CLI:
+
+  - `--version` is read from the version file that setuptools-scm writes
+  - The help texts and shell completions are rendered by the CLI once and
+    then replayed from the cache directory
+
+The commands that build models are forwarded to the build server in
+`tp_extension_builder.daemon` if it runs. Everything else is handed to the
+typer app in `tp_extension_builder.cli`.
+"""
+
+import hashlib
+import os
+import sys
+
+from typing import Any, List, Optional
+
+
+PACKAGE_NAME = 'tp_extension_builder'
+
+# The environment variable that typer's completion scripts set
+COMPLETE_VAR = '_TP_EXTENSION_BUILDER_COMPLETE'
+
+# Environment variables that change the rendered help or completions
+OUTPUT_ENV_VARS = [
+    'COLUMNS',
+    'LINES',
+    'TERM',
+    'COLORTERM',
+    'NO_COLOR',
+    'FORCE_COLOR',
+    'TERMINAL_WIDTH',
+]
+OUTPUT_ENV_VAR_PREFIXES = ('_TYPER', '_TP_EXTENSION_BUILDER', 'COMP_')
+
+VERSION_ARGS = ['--version', '-v']
+HELP_ARGS = ['--help', '-h']
+
+CLI_CACHE_DIR_NAME = 'cli'
+
+
+def get_version() -> str:
+    try:
+        from tp_extension_builder._version import version
+
+        return version
+    except ImportError:
+        # The version file is missing when the package is used from a
+        # source checkout without being installed
+        import importlib.metadata
+
+        try:
+            return importlib.metadata.version(PACKAGE_NAME)
+        except importlib.metadata.PackageNotFoundError:
+            return 'unknown'
+
+
+def is_help_request(args: List[str]) -> bool:
+    """
+    Returns whether the arguments only ask for the help of the app or one
+    of its commands.
+    """
+    if not args:
+        return True
+
+    if args[-1] not in HELP_ARGS:
+        return False
+
+    return all(not arg.startswith('-') for arg in args[:-1])
+
+
+def get_package_key() -> str:
+    """
+    Returns a hash of the version and the contents of the modules of the
+    package, which changes whenever the code changes.
+
+    The contents are hashed instead of the modification times, so checking
+    out a branch or touching the files doesn't invalidate the caches.
+    """
+    package_hash = hashlib.sha256(get_version().encode())
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    with os.scandir(package_dir) as entries:
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name.endswith('.py'):
+                package_hash.update(entry.name.encode() + b'\0')
+                with open(entry.path, 'rb') as module_file:
+                    package_hash.update(module_file.read())
+
+    return package_hash.hexdigest()
+
+
+def get_output_cache_key(args: List[str]) -> str:
+    """
+    Returns a hash of everything else the help texts and completions depend
+    on besides the code of the package: the arguments, the environment and
+    the terminal.
+    """
+    key_parts: List[Any] = [
+        os.path.basename(sys.argv[0]),
+        args,
+    ]
+
+    key_parts.append(
+        sorted(
+            (name, value)
+            for name, value in os.environ.items()
+            if name in OUTPUT_ENV_VARS
+            or name.startswith(OUTPUT_ENV_VAR_PREFIXES)
+        )
+    )
+
+    is_tty = sys.stdout.isatty()
+    key_parts.append(is_tty)
+    if is_tty is True:
+        try:
+            key_parts.append(tuple(os.get_terminal_size(sys.stdout.fileno())))
+        except OSError:
+            pass
+
+    return hashlib.sha256(repr(key_parts).encode()).hexdigest()
+
+
+def get_output_cache_dir() -> str:
+    # Imported here, so `--version` doesn't pay for the imports of the
+    # cache module
+    from tp_extension_builder.cache import get_cache_dir
+
+    return os.path.join(get_cache_dir(), CLI_CACHE_DIR_NAME)
+
+
+def get_output_cache_path(package_key: str, cache_key: str) -> str:
+    """
+    The outputs are stored in one directory per package key, because the
+    help texts include the defaults from the code, so any change to the
+    package invalidates them.
+    """
+    return os.path.join(
+        get_output_cache_dir(), package_key, f'{cache_key}.txt'
+    )
+
+
+def prune_cached_outputs(package_key: str) -> None:
+    """
+    Removes the outputs of other versions of the package, which are never
+    read again.
+    """
+    import shutil
+
+    cache_dir = get_output_cache_dir()
+    try:
+        entries = list(os.scandir(cache_dir))
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.name == package_key:
+            continue
+
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            # The outputs that were stored before they were grouped by
+            # package key
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+class TeeWriter:
+    """
+    Writes to a stream and records everything that was written.
+
+    All other attributes come from the stream, so rich still detects the
+    terminal and its size.
+    """
+
+    def __init__(self, stream: Any) -> None:
+        self.stream = stream
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        # click probes for binary streams by writing bytes, which has to
+        # fail before the text is recorded
+        written: int = self.stream.write(text)
+        self.parts.append(text)
+
+        return written
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+    def getvalue(self) -> str:
+        return ''.join(self.parts)
+
+
+def run_app() -> None:
+    from tp_extension_builder.cli import app
+
+    app()
+
+
+def run_command(args: List[str]) -> None:
+    """
+    Forwards the commands that build models to the build server if it's
+    running and otherwise runs them in-process.
+    """
+    from tp_extension_builder import daemon
+
+    if args and args[0] in daemon.SERVER_COMMANDS:
+        exit_code = daemon.forward_command(args)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    run_app()
+
+
+def run_app_and_cache_output(package_key: str, cache_path: str) -> None:
+    """
+    Runs the app and stores its output if it succeeded, so the next
+    identical request can be answered from the cache. The outputs of other
+    versions of the package are removed at the same time.
+    """
+    stdout = sys.stdout
+    writer = TeeWriter(stdout)
+    sys.stdout = writer
+    exit_code: Any = 0
+    try:
+        run_app()
+    except SystemExit as e:
+        exit_code = e.code
+    finally:
+        sys.stdout = stdout
+
+    if exit_code in (None, 0):
+        prune_cached_outputs(package_key)
+        write_cached_output(cache_path, writer.getvalue())
+
+    sys.exit(exit_code)
+
+
+def read_cached_output(cache_path: str) -> Optional[str]:
+    try:
+        with open(cache_path, encoding='utf-8') as cache_file:
+            return cache_file.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_cached_output(cache_path: str, output: str) -> None:
+    """
+    Writes the output atomically, so parallel shells never replay a
+    partially written file. A cache that can't be written is ignored.
+    """
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+            cache_file.write(output)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def main() -> None:
+    args = sys.argv[1:]
+
+    if args in [[version_arg] for version_arg in VERSION_ARGS]:
+        print(f'{PACKAGE_NAME} - v{get_version()}')
+        return
+
+    if COMPLETE_VAR not in os.environ and not is_help_request(args):
+        run_command(args)
+        return
+
+    package_key = get_package_key()
+    cache_path = get_output_cache_path(package_key, get_output_cache_key(args))
+    output = read_cached_output(cache_path)
+    if output is None:
+        run_app_and_cache_output(package_key, cache_path)
+        return
+
+    sys.stdout.write(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+import abc
+
+from dataclasses import dataclass, field
+from typing import cast, List, Optional, Tuple
+
+
+Vector3T = Tuple[float, float, float]
+
+# The min and max corner of a bounding box
+BoundsT = Tuple[Vector3T, Vector3T]
+
+
+def add_vectors(a: Vector3T, b: Vector3T) -> Vector3T:
+    return (a[0] + b[0], a[1] + b[1], a[2] + b[2])
+
+
+def move_bounds(bounds: BoundsT, offset: Vector3T) -> BoundsT:
+    return (add_vectors(bounds[0], offset), add_vectors(bounds[1], offset))
+
+
+def merge_bounds(a: Optional[BoundsT], b: BoundsT) -> BoundsT:
+    """
+    Returns the bounds that enclose both bounds.
+    """
+    if a is None:
+        return b
+
+    return (
+        (min(a[0][0], b[0][0]), min(a[0][1], b[0][1]), min(a[0][2], b[0][2])),
+        (max(a[1][0], b[1][0]), max(a[1][1], b[1][1]), max(a[1][2], b[1][2])),
+    )
+
+
+def bounds_intersect(a: BoundsT, b: BoundsT) -> bool:
+    """
+    Returns True if the bounds overlap or touch.
+    """
+    return all(a[0][i] <= b[1][i] and b[0][i] <= a[1][i] for i in range(3))
+
+
+@dataclass(frozen=True)
+class Sprue:
+    """
+    A cylinder along the X or Y axis that connects shapes for printing.
+
+    `start` is the min corner of the cylinder's bounding box and
+    `direction` is the unit vector of the axis.
+    """
+
+    start: Vector3T
+    length: float
+    radius: float
+    direction: Vector3T = (1.0, 0.0, 0.0)
+
+    @property
+    def axis_start(self) -> Vector3T:
+        """
+        The center of the cylinder's start cap.
+        """
+        return cast(
+            Vector3T,
+            tuple(
+                start + self.radius * (1 - direction)
+                for start, direction in zip(self.start, self.direction)
+            ),
+        )
+
+    @property
+    def bounds(self) -> BoundsT:
+        size = cast(
+            Vector3T,
+            tuple(
+                self.length * direction + self.radius * 2 * (1 - direction)
+                for direction in self.direction
+            ),
+        )
+
+        return (self.start, add_vectors(self.start, size))
+
+
+@dataclass
+class Layout(abc.ABC):
+    """
+    The base class of the layouts that place shapes for combining.
+
+    Layouts only work with bounding boxes, so they are used for both
+    build123d shapes and meshes. Shapes are placed one by one, so they can
+    be placed while the next ones are still being loaded.
+    """
+
+    distance: float
+    bounds: Optional[BoundsT] = None
+    shape_count: int = 0
+
+    _sprues: List[Sprue] = field(default_factory=list)
+    _placed_bounds: List[BoundsT] = field(default_factory=list)
+
+    @abc.abstractmethod
+    def place(self, shape_bounds: BoundsT) -> Vector3T:
+        """
+        Places the next shape and returns the offset it has to be moved by.
+        """
+
+    @abc.abstractmethod
+    def add_sprues(
+        self,
+        radius: float,
+        offset: Vector3T = (0.0, -0.1, 0.0),
+    ) -> List[Sprue]:
+        """
+        Adds the sprues that connect all placed shapes and returns them.
+        """
+
+    def _add_placed_bounds(self, placed_bounds: BoundsT) -> None:
+        self.bounds = merge_bounds(self.bounds, placed_bounds)
+        self._placed_bounds.append(placed_bounds)
+        self.shape_count += 1
+
+    def _add_sprue(self, sprue: Sprue) -> None:
+        self._sprues.append(sprue)
+        self.bounds = merge_bounds(self.bounds, sprue.bounds)
+
+    @property
+    def sprues(self) -> List[Sprue]:
+        return list(self._sprues)
+
+    @property
+    def placed_bounds(self) -> List[BoundsT]:
+        """
+        The bounds of the placed shapes in the order they were placed.
+        """
+        return list(self._placed_bounds)
+
+
+@dataclass
+class RowLayout(Layout):
+    """
+    Places shapes next to each other along the X axis.
+
+    Every shape is moved so that its min X and Z and its max Y are at the
+    origin before it's moved to its place in the row.
+    """
+
+    _next_x: float = 0.0
+    _first_align_x: float = 0.0
+    _last_width: float = 0.0
+
+    def place(self, shape_bounds: BoundsT) -> Vector3T:
+        (min_x, _, min_z), (max_x, max_y, _) = shape_bounds
+        align_x = -min_x
+
+        offset = (align_x + self._next_x, -max_y, -min_z)
+
+        if self.shape_count == 0:
+            self._first_align_x = align_x
+        self._last_width = max_x - min_x
+
+        self._add_placed_bounds(move_bounds(shape_bounds, offset))
+
+        self._next_x += self._last_width + self.distance
+
+        return offset
+
+    def add_sprue(
+        self,
+        radius: float,
+        offset: Vector3T = (0.0, -0.1, 0.0),
+    ) -> Optional[Sprue]:
+        """
+        Adds a sprue from the middle of the first shape to the middle of
+        the last shape and returns it.
+
+        Returns None if there is nothing to connect.
+        """
+        if self.shape_count < 2:
+            return None
+
+        start_x = self._first_align_x
+        length = self._next_x - start_x - self._last_width / 2
+
+        sprue = Sprue(
+            start=(start_x + offset[0], offset[1], offset[2]),
+            length=length,
+            radius=radius,
+        )
+        self._add_sprue(sprue)
+
+        return sprue
+
+    def add_sprues(
+        self,
+        radius: float,
+        offset: Vector3T = (0.0, -0.1, 0.0),
+    ) -> List[Sprue]:
+        sprue = self.add_sprue(radius=radius, offset=offset)
+        if sprue is None:
+            return []
+
+        return [sprue]
+
+
+@dataclass
+class Shelf:
+    """
+    A row of a `ShelfLayout`.
+    """
+
+    top_y: float
+    depth: float
+    next_x: float
+    last_center_x: float = 0.0
+
+
+@dataclass
+class ShelfLayout(Layout):
+    """
+    Packs shapes into rows (shelves) that fit on a print bed of `bed_size`
+    (X, Y).
+
+    Every shape goes into the first row that has enough space left for its
+    footprint. A new row is started below the last one if none has. Only
+    the last row can get deeper for a shape, because there is nothing below
+    it yet.
+
+    `sprue_space` is kept free left of and above every row for the sprues.
+    Every row gets a sprue along its top edge and a spine along the Y axis
+    on the left connects the row sprues.
+    """
+
+    bed_size: Tuple[float, float] = (250.0, 250.0)
+    sprue_space: float = 0.0
+
+    _shelves: List[Shelf] = field(default_factory=list)
+
+    def place(self, shape_bounds: BoundsT) -> Vector3T:
+        (min_x, min_y, min_z), (max_x, max_y, _) = shape_bounds
+        width = max_x - min_x
+        depth = max_y - min_y
+
+        bed_x, bed_y = self.bed_size
+        if self.sprue_space + width > bed_x:
+            raise ValueError(
+                f'A shape with a width of {width:.2f}mm does not fit on a '
+                f'bed with a width of {bed_x:.2f}mm.'
+            )
+
+        shelf = self._find_shelf(width, depth)
+        if shelf is None:
+            shelf = self._add_shelf(depth)
+
+        shelf.depth = max(shelf.depth, depth)
+        if shelf.top_y - shelf.depth < -bed_y:
+            raise ValueError(
+                f'The shapes do not fit on a bed with a depth of '
+                f'{bed_y:.2f}mm.'
+            )
+
+        offset = (-min_x + shelf.next_x, -max_y + shelf.top_y, -min_z)
+        self._add_placed_bounds(move_bounds(shape_bounds, offset))
+
+        shelf.last_center_x = shelf.next_x + width / 2
+        shelf.next_x += width + self.distance
+
+        return offset
+
+    def _find_shelf(self, width: float, depth: float) -> Optional[Shelf]:
+        for shelf_num, shelf in enumerate(self._shelves):
+            is_last = shelf_num == len(self._shelves) - 1
+            if shelf.next_x + width > self.bed_size[0]:
+                continue
+            if depth <= shelf.depth or is_last:
+                return shelf
+
+        return None
+
+    def _add_shelf(self, depth: float) -> Shelf:
+        top_y = -self.sprue_space
+        if self._shelves:
+            last_shelf = self._shelves[-1]
+            top_y = (
+                last_shelf.top_y
+                - last_shelf.depth
+                - self.distance
+                - self.sprue_space
+            )
+
+        shelf = Shelf(top_y=top_y, depth=depth, next_x=self.sprue_space)
+        self._shelves.append(shelf)
+
+        return shelf
+
+    def add_sprues(
+        self,
+        radius: float,
+        offset: Vector3T = (0.0, -0.1, 0.0),
+    ) -> List[Sprue]:
+        """
+        Adds a sprue from the spine to the middle of the last shape of every
+        row and the spine that connects the rows.
+
+        Returns an empty list if there is nothing to connect.
+        """
+        if self.shape_count < 2:
+            return []
+
+        row_sprues = [
+            Sprue(
+                start=(offset[0], shelf.top_y + offset[1], offset[2]),
+                length=shelf.last_center_x - offset[0],
+                radius=radius,
+            )
+            for shelf in self._shelves
+        ]
+        sprues = list(row_sprues)
+
+        if len(row_sprues) > 1:
+            spine_start_y = row_sprues[-1].start[1]
+            spine_end_y = row_sprues[0].start[1] + radius * 2
+            sprues.append(
+                Sprue(
+                    start=(offset[0], spine_start_y, offset[2]),
+                    length=spine_end_y - spine_start_y,
+                    radius=radius,
+                    direction=(0.0, 1.0, 0.0),
+                )
+            )
+
+        for sprue in sprues:
+            self._add_sprue(sprue)
+
+        return sprues
+
+
+def create_layout(
+    distance: float,
+    bed_size: Optional[Tuple[float, float]] = None,
+    sprue_radius: Optional[float] = None,
+) -> Layout:
+    """
+    Returns a `ShelfLayout` for the bed size or a `RowLayout` if there is
+    no bed size.
+
+    Space for the sprues is only kept free if there is a `sprue_radius`.
+    """
+    if bed_size is None:
+        return RowLayout(distance=distance)
+
+    sprue_space = 0.0
+    if sprue_radius is not None:
+        sprue_space = sprue_radius * 2 + distance
+
+    return ShelfLayout(
+        distance=distance,
+        bed_size=bed_size,
+        sprue_space=sprue_space,
+    )
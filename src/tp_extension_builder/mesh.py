@@ -0,0 +1,243 @@
+import math
+import re
+import numpy as np
+import numpy.typing as npt
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+
+from tp_extension_builder.layout import (
+    BoundsT,
+    Sprue,
+    Vector3T,
+    create_layout,
+)
+from tp_extension_builder.profiling import profiled
+
+
+STL_HEADER_SIZE = 80
+
+# The record of a triangle in a binary STL file
+STL_TRIANGLE_DTYPE = np.dtype(
+    [
+        ('normal', '<f4', (3,)),
+        ('vertices', '<f4', (3, 3)),
+        ('attributes', '<u2'),
+    ]
+)
+
+STL_VERTEX_REGEX = re.compile(
+    rb'vertex\s+(\S+)\s+(\S+)\s+(\S+)',
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Mesh:
+    """
+    A triangle mesh as an array of shape (n, 3, 3) with the three vertices
+    of every triangle.
+
+    Meshes can be moved and combined without converting them to OCC shapes,
+    which is much faster for STL files.
+    """
+
+    triangles: npt.NDArray[np.float64]
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.triangles)
+
+    @property
+    def bounds(self) -> BoundsT:
+        if self.triangle_count == 0:
+            return ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+
+        vertices = self.triangles.reshape(-1, 3)
+        min_x, min_y, min_z = vertices.min(axis=0).tolist()
+        max_x, max_y, max_z = vertices.max(axis=0).tolist()
+
+        return ((min_x, min_y, min_z), (max_x, max_y, max_z))
+
+    def moved(self, offset: Vector3T) -> 'Mesh':
+        return Mesh(self.triangles + np.array(offset, dtype=np.float64))
+
+    def get_normals(self) -> npt.NDArray[np.float64]:
+        """
+        Returns the unit normal of every triangle. Degenerate triangles get
+        a zero normal.
+        """
+        edges_a = self.triangles[:, 1] - self.triangles[:, 0]
+        edges_b = self.triangles[:, 2] - self.triangles[:, 0]
+        normals = np.cross(edges_a, edges_b)
+
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        np.divide(normals, lengths, out=normals, where=lengths > 0)
+
+        return normals
+
+
+def concatenate_meshes(meshes: Iterable[Mesh]) -> Mesh:
+    triangles = [mesh.triangles for mesh in meshes]
+    if not triangles:
+        return Mesh(np.zeros((0, 3, 3), dtype=np.float64))
+
+    return Mesh(np.concatenate(triangles))
+
+
+def combine_meshes(
+    meshes: Iterable[Mesh],
+    distance: float,
+    add_sprue: bool,
+    sprue_radius: float = 1.0,
+    sprue_offset: Vector3T = (0.0, -0.1, 0.0),
+    bed_size: Optional[Tuple[float, float]] = None,
+) -> Mesh:
+    """
+    The mesh version of `utils.combine_shapes()` that places the meshes in
+    the same way and moves the result to the origin.
+
+    The meshes and the sprue are only concatenated and not fused, so the
+    sprue overlaps the meshes. Slicers merge overlapping volumes when they
+    slice the model.
+    """
+    layout = create_layout(
+        distance=distance,
+        bed_size=bed_size,
+        sprue_radius=sprue_radius if add_sprue is True else None,
+    )
+    placed_meshes = [mesh.moved(layout.place(mesh.bounds)) for mesh in meshes]
+
+    if add_sprue is True:
+        sprues = layout.add_sprues(radius=sprue_radius, offset=sprue_offset)
+        placed_meshes.extend(make_sprue_mesh(sprue) for sprue in sprues)
+
+    combined_mesh = concatenate_meshes(placed_meshes)
+    if layout.bounds is not None:
+        min_x, min_y, min_z = layout.bounds[0]
+        combined_mesh = combined_mesh.moved((-min_x, -min_y, -min_z))
+
+    return combined_mesh
+
+
+#
+# STL Files
+#
+
+
+@profiled('import_stl')
+def read_stl(file_path: Union[str, Path]) -> Mesh:
+    """
+    Reads a binary or ASCII STL file.
+    """
+    data = Path(file_path).read_bytes()
+
+    # ASCII files start with `solid`, but so do some binary files. So a
+    # file is only treated as binary if its size matches the triangle
+    # count in its header.
+    if len(data) >= STL_HEADER_SIZE + 4:
+        triangle_count = int.from_bytes(
+            data[STL_HEADER_SIZE : STL_HEADER_SIZE + 4], 'little'
+        )
+        binary_size = (
+            STL_HEADER_SIZE + 4 + triangle_count * STL_TRIANGLE_DTYPE.itemsize
+        )
+        if len(data) == binary_size:
+            records = np.frombuffer(
+                data,
+                dtype=STL_TRIANGLE_DTYPE,
+                count=triangle_count,
+                offset=STL_HEADER_SIZE + 4,
+            )
+            return Mesh(records['vertices'].astype(np.float64))
+
+    vertices = STL_VERTEX_REGEX.findall(data)
+    if len(vertices) % 3 != 0:
+        raise ValueError(f'{file_path} is not a valid STL file')
+
+    return Mesh(np.array(vertices, dtype=np.float64).reshape(-1, 3, 3))
+
+
+def get_stl_triangle_count(file_path: Union[str, Path]) -> int:
+    """
+    Returns the number of triangles in a binary or ASCII STL file.
+    """
+    file_path = Path(file_path)
+    file_size = file_path.stat().st_size
+
+    with open(file_path, 'rb') as stl_file:
+        header = stl_file.read(STL_HEADER_SIZE + 4)
+
+    if len(header) == STL_HEADER_SIZE + 4:
+        triangle_count = int.from_bytes(header[STL_HEADER_SIZE:], 'little')
+        binary_size = (
+            STL_HEADER_SIZE + 4 + triangle_count * STL_TRIANGLE_DTYPE.itemsize
+        )
+        if file_size == binary_size:
+            return triangle_count
+
+    return file_path.read_bytes().lower().count(b'endfacet')
+
+
+@profiled('write_stl')
+def write_stl(
+    file_path: Union[str, Path],
+    mesh: Mesh,
+    header: bytes = b'tp_extension_builder',
+) -> None:
+    """
+    Writes the mesh as a binary STL file.
+    """
+    records = np.zeros(mesh.triangle_count, dtype=STL_TRIANGLE_DTYPE)
+    records['normal'] = mesh.get_normals()
+    records['vertices'] = mesh.triangles
+
+    with open(file_path, 'wb') as stl_file:
+        stl_file.write(header[:STL_HEADER_SIZE].ljust(STL_HEADER_SIZE, b' '))
+        stl_file.write(mesh.triangle_count.to_bytes(4, 'little'))
+        stl_file.write(records.tobytes())
+
+
+#
+# Primitives
+#
+
+
+def make_sprue_mesh(sprue: Sprue, segments: int = 32) -> Mesh:
+    """
+    Creates a closed cylinder mesh along the axis of the sprue.
+    """
+    direction = np.array(sprue.direction, dtype=np.float64)
+    start_center_point = np.array(sprue.axis_start, dtype=np.float64)
+    end_center_point = start_center_point + direction * sprue.length
+
+    # The ring axes and the direction form a right-handed system, e.g. Y
+    # and Z for a sprue along X
+    ring_axis_u = np.roll(direction, 1)
+    ring_axis_v = np.roll(direction, 2)
+
+    angles = np.linspace(0, 2 * math.pi, segments, endpoint=False)
+    ring = sprue.radius * (
+        np.cos(angles)[:, np.newaxis] * ring_axis_u
+        + np.sin(angles)[:, np.newaxis] * ring_axis_v
+    )
+    start_ring = ring + start_center_point
+    end_ring = ring + end_center_point
+
+    start_next = np.roll(start_ring, -1, axis=0)
+    end_next = np.roll(end_ring, -1, axis=0)
+    start_center = np.broadcast_to(start_center_point, ring.shape)
+    end_center = np.broadcast_to(end_center_point, ring.shape)
+
+    # The vertices are ordered counter-clockwise when seen from outside
+    triangles = np.concatenate(
+        [
+            np.stack([start_ring, end_next, end_ring], axis=1),
+            np.stack([start_ring, start_next, end_next], axis=1),
+            np.stack([start_center, start_next, start_ring], axis=1),
+            np.stack([end_center, end_ring, end_next], axis=1),
+        ]
+    )
+
+    return Mesh(triangles.astype(np.float64))
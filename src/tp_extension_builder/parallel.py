@@ -0,0 +1,97 @@
+import contextlib
+import io
+import os
+import sys
+import traceback
+import typer
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass
+class CapturedCall:
+    """
+    The console output of a function call in a worker process and the error
+    message if it failed.
+    """
+
+    output: str
+    error: Optional[str] = None
+
+
+def get_job_count(jobs: int) -> int:
+    """
+    Returns the number of worker processes to use. Values below 1 mean one
+    worker per CPU.
+    """
+    if jobs < 1:
+        return os.cpu_count() or 1
+
+    return jobs
+
+
+def call_captured(
+    func: Callable[..., Any],
+    kwargs: Dict[str, Any],
+) -> CapturedCall:
+    """
+    Calls the function and returns everything it printed instead of writing
+    it to the console, so that the output of parallel calls doesn't get
+    mixed up.
+    """
+    output = io.StringIO()
+    error = None
+
+    with (
+        contextlib.redirect_stdout(output),
+        contextlib.redirect_stderr(output),
+    ):
+        try:
+            func(**kwargs)
+        except typer.Abort:
+            error = 'Aborted'
+        except Exception:
+            error = traceback.format_exc()
+
+    return CapturedCall(output=output.getvalue(), error=error)
+
+
+def _init_worker() -> None:
+    # Workers can't ask the user anything. Without stdin, confirmation
+    # prompts abort right away instead of waiting for input forever.
+    sys.stdin = open(os.devnull)
+
+
+def create_pool(jobs: int) -> ProcessPoolExecutor:
+    """
+    Returns a pool of `jobs` worker processes.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max(jobs, 1),
+        initializer=_init_worker,
+    )
+
+
+def map_captured(
+    func: Callable[..., Any],
+    kwargs_list: List[Dict[str, Any]],
+    jobs: int,
+) -> Iterator[CapturedCall]:
+    """
+    Calls the function once for every kwargs dict in a pool of `jobs`
+    worker processes.
+
+    The results are yielded in the order of `kwargs_list` as soon as they
+    are available, so the output of every call can be printed in order
+    while the later calls are still running.
+    """
+    jobs = min(get_job_count(jobs), len(kwargs_list))
+
+    with create_pool(jobs) as executor:
+        yield from executor.map(
+            call_captured,
+            [func] * len(kwargs_list),
+            kwargs_list,
+        )
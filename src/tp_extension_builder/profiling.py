@@ -0,0 +1,217 @@
+"""
+Timing spans for the stages of building, importing and exporting models.
+
+The stages are wrapped in `profile_span()`, which only measures anything
+while a `Profiler` is active, e.g. because the `--profile` option was
+used. Otherwise it costs about as much as an empty `with` statement.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+    cast,
+)
+
+
+@dataclass
+class Span:
+    """
+    A finished span. The times are in nanoseconds since the profiler was
+    started.
+    """
+
+    name: str
+    start: int
+    duration: int
+    depth: int
+
+
+@dataclass
+class StageStats:
+    """
+    The combined time of all spans with the same name.
+    """
+
+    name: str
+    depth: int
+    calls: int = 0
+    total: int = 0
+
+
+class Profiler:
+    """
+    Records the spans of this process while it is active.
+    """
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.start_time = time.perf_counter_ns()
+        self.end_time: Optional[int] = None
+        self._depth = 0
+
+    @property
+    def duration(self) -> int:
+        end_time = self.end_time or time.perf_counter_ns()
+        return end_time - self.start_time
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        depth = self._depth
+        self._depth += 1
+        start_time = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_time = time.perf_counter_ns()
+            self._depth = depth
+            self.spans.append(
+                Span(
+                    name=name,
+                    start=start_time - self.start_time,
+                    duration=end_time - start_time,
+                    depth=depth,
+                )
+            )
+
+    def get_stage_stats(self) -> List[StageStats]:
+        """
+        Returns the stats of every stage in the order in which the stages
+        started.
+        """
+        stats: Dict[str, StageStats] = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            stage_stats = stats.get(span.name)
+            if stage_stats is None:
+                stage_stats = StageStats(name=span.name, depth=span.depth)
+                stats[span.name] = stage_stats
+
+            stage_stats.calls += 1
+            stage_stats.total += span.duration
+            stage_stats.depth = min(stage_stats.depth, span.depth)
+
+        return list(stats.values())
+
+    def format_table(self) -> str:
+        """
+        Returns a table with the time of every stage. Nested stages are
+        indented below the stage they are part of.
+        """
+        total = max(self.duration, 1)
+        rows = [
+            (
+                f'{"  " * stage.depth}{stage.name}',
+                stage.calls,
+                stage.total / 1e6,
+                stage.total / total * 100,
+            )
+            for stage in self.get_stage_stats()
+        ]
+        name_width = max([len('Stage'), *(len(row[0]) for row in rows)])
+
+        lines = [
+            f'{"Stage":<{name_width}} {"calls":>6} {"time":>10} {"share":>7}'
+        ]
+        for name, calls, time_ms, share in rows:
+            lines.append(
+                f'{name:<{name_width}} {calls:>6} {time_ms:>8.1f}ms '
+                f'{share:>6.1f}%'
+            )
+        lines.append(
+            f'{"Total":<{name_width}} {"":>6} {total / 1e6:>8.1f}ms '
+            f'{100.0:>6.1f}%'
+        )
+
+        return '\n'.join(lines)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Returns the spans in the Chrome trace event format, which can be
+        opened in https://ui.perfetto.dev or chrome://tracing.
+        """
+        pid = os.getpid()
+        tid = threading.get_ident()
+
+        return {
+            'traceEvents': [
+                {
+                    'name': span.name,
+                    'cat': 'tp_extension_builder',
+                    'ph': 'X',
+                    'ts': span.start / 1e3,
+                    'dur': span.duration / 1e3,
+                    'pid': pid,
+                    'tid': tid,
+                }
+                for span in sorted(self.spans, key=lambda span: span.start)
+            ],
+            'displayTimeUnit': 'ms',
+        }
+
+    def write_chrome_trace(self, file_path: Union[str, Path]) -> None:
+        Path(file_path).write_text(json.dumps(self.to_chrome_trace()))
+
+
+FuncT = TypeVar('FuncT', bound=Callable[..., Any])
+
+_profiler: Optional[Profiler] = None
+
+
+@contextmanager
+def profiling() -> Iterator[Profiler]:
+    """
+    Records the spans of everything that runs inside of the block.
+    """
+    global _profiler
+
+    previous_profiler = _profiler
+    profiler = Profiler()
+    _profiler = profiler
+    try:
+        yield profiler
+    finally:
+        profiler.end_time = time.perf_counter_ns()
+        _profiler = previous_profiler
+
+
+@contextmanager
+def profile_span(name: str) -> Iterator[None]:
+    """
+    Measures the block as a stage with the name if a profiler is active.
+    """
+    if _profiler is None:
+        yield
+        return
+
+    with _profiler.span(name):
+        yield
+
+
+def profiled(name: str) -> Callable[[FuncT], FuncT]:
+    """
+    Decorator that measures every call of the function as a stage.
+    """
+
+    def decorator(func: FuncT) -> FuncT:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with profile_span(name):
+                return func(*args, **kwargs)
+
+        return cast(FuncT, wrapper)
+
+    return decorator
@@ -1,32 +1,37 @@
 import build123d as bd
+import math
+
+from OCP.BRepBuilderAPI import BRepBuilderAPI_MakeFace
+from OCP.Geom import Geom_ToroidalSurface
+from OCP.gp import gp_Ax3, gp_Dir, gp_Pnt
+from typing import cast, Any, List, Optional, Sequence, Tuple
+
+from tp_extension_builder.cache import BuildCache
+
+from tp_extension_builder.defines import DetailLevel
+from tp_extension_builder.dimensions import (
+    TrackPointCapDimensions,
+    CAP_DIMENSIONS_RED_T460S,
+    CAP_DIMENSIONS_GREEN_T430,
+    CAP_DIMENSIONS_BLUE_X1_CARBON,
+    DEFAULT_DOME_DOT_HEIGHT,
+    DEFAULT_DOME_DOT_RADIUS,
+    DEFAULT_DOME_DOT_SPACING,
+    DEFAULT_DOME_DOT_ROWS,
+)
 
-from typing import cast, List
-
+from tp_extension_builder.profiling import profile_span
 from tp_extension_builder.utils import (
     get_bd_debug_objects,
     ALIGN_CENTER_TOP,
     ALIGN_CENTER_BOTTOM,
     AlignT,
+    DimensionedPartObject,
+    ShapeCache,
 )
 
 
-DEFAULT_DOME_DOT_HEIGHT = 0.2
-DEFAULT_DOME_DOT_RADIUS = 0.3
-DEFAULT_DOME_DOT_SPACING = 0.85
-DEFAULT_DOME_DOT_ROWS = [
-    3,
-    7,
-    7,
-    9,
-    9,
-    9,
-    7,
-    7,
-    3,
-]
-
-
-class TrackPointCapBase(bd.BasePartObject):
+class TrackPointCapBase(DimensionedPartObject):
     def __init__(
         self,
         total_height: float,
@@ -42,29 +47,47 @@ class TrackPointCapBase(bd.BasePartObject):
         dome_dot_height: float = DEFAULT_DOME_DOT_HEIGHT,
         dome_dot_radius: float = DEFAULT_DOME_DOT_RADIUS,
         dome_dot_spacing: float = DEFAULT_DOME_DOT_SPACING,
-        dome_dot_rows: list[int] = DEFAULT_DOME_DOT_ROWS,
+        dome_dot_rows: Sequence[int] = DEFAULT_DOME_DOT_ROWS,
         color: bd.Color = bd.Color('red'),
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
+        detail: DetailLevel = DetailLevel.full,
     ):
         context: bd.BuildPart = bd.BuildPart._get_context(self)
         bd.validate_inputs(context, self)
 
-        self._debug: List[bd.Shape] = []
+        self._debug: List[bd.Shape[Any]] = []
+
+        self.dimensions = TrackPointCapDimensions(
+            model=model,
+            total_height=total_height,
+            base_height=base_height,
+            base_diameter=base_diameter,
+            dome_diameter=dome_diameter,
+            hole_length=hole_length,
+            hole_width=hole_width,
+            hole_depth=hole_depth,
+            cap_adapter_width_decrease=cap_adapter_width_decrease,
+            cap_adapter_length_decrease=cap_adapter_length_decrease,
+            dome_dot_height=dome_dot_height,
+            dome_dot_radius=dome_dot_radius,
+            dome_dot_spacing=dome_dot_spacing,
+            dome_dot_rows=tuple(dome_dot_rows),
+        )
 
         self.total_height = total_height
 
         self.base_height = base_height
         self.base_diameter = base_diameter
 
-        self.dome_height = total_height - base_height - dome_dot_height
+        self.dome_height = self.dimensions.dome_height
         self.dome_diameter = dome_diameter
 
         self.dome_dot_height = dome_dot_height
         self.dome_dot_radius = dome_dot_radius
         self.dome_dot_spacing = dome_dot_spacing
-        self.dome_dot_rows = dome_dot_rows
+        self.dome_dot_rows = list(dome_dot_rows)
 
         self.hole_length = hole_length
         self.hole_width = hole_width
@@ -73,35 +96,60 @@ class TrackPointCapBase(bd.BasePartObject):
         self.cap_adapter_width_decrease = cap_adapter_width_decrease
         self.cap_adapter_length_decrease = cap_adapter_length_decrease
 
-        self.cap_adapter_width = (
-            self.hole_width - self.cap_adapter_width_decrease
-        )
-        self.cap_adapter_length = (
-            self.hole_length - self.cap_adapter_length_decrease
-        )
-        self.cap_adapter_height = self.hole_depth
+        self.cap_adapter_width = self.dimensions.cap_adapter_width
+        self.cap_adapter_length = self.dimensions.cap_adapter_length
+        self.cap_adapter_height = self.dimensions.cap_adapter_height
 
-        self.cap_extra_height = self.total_height - self.hole_depth
+        self.cap_extra_height = self.dimensions.cap_extra_height
 
         self.model = model
+        self.detail = detail
 
-        base_height_total = base_height + (self.dome_height / 2)
+        self._init_part(
+            label=f'TP Cap - {self.model}',
+            color=color,
+            rotation=rotation,
+            align=align,
+            mode=mode,
+        )
 
-        with bd.BuildPart() as tp_cap:
-            dome = self._build_dome(
-                diameter=self.dome_diameter,
-                height=self.dome_height,
-                dot_height=self.dome_dot_height,
-                dot_radius=self.dome_dot_radius,
-                dot_spacing=self.dome_dot_spacing,
-                dot_rows=self.dome_dot_rows,
-            )
-            bd.add(dome)
-            base = self._build_base(base_diameter, base_height_total)
-            bd.add(base, mode=bd.Mode.ADD)
+    @property
+    def debug(self) -> List[bd.Shape[Any]]:
+        """
+        Returns a list of build123d objects for debugging in ocp_viewer.
+        """
+        return get_bd_debug_objects(self)
+
+    def _build_part(self) -> bd.Part:
+        base_height_total = self.base_height + (self.dome_height / 2)
+
+        with profile_span('cap'), bd.BuildPart() as tp_cap:
+            with profile_span('dome'):
+                if self.detail == DetailLevel.low:
+                    dome = self._build_low_detail_dome(
+                        diameter=self.dome_diameter,
+                        height=self.dome_height,
+                    )
+                else:
+                    dome = self._build_dome(
+                        diameter=self.dome_diameter,
+                        height=self.dome_height,
+                        dot_height=self.dome_dot_height,
+                        dot_radius=self.dome_dot_radius,
+                        dot_spacing=self.dome_dot_spacing,
+                        dot_rows=self.dome_dot_rows,
+                    )
+                bd.add(dome)
+
+            with profile_span('base'):
+                base = self._build_base(self.base_diameter, base_height_total)
+                bd.add(base, mode=bd.Mode.ADD)
 
             # Cut the adapter hole through both the top and bottom
-            with bd.Locations((0, 0, -base_height_total)):
+            with (
+                profile_span('hole'),
+                bd.Locations((0, 0, -base_height_total)),
+            ):
                 bd.Box(
                     length=self.hole_length,
                     width=self.hole_width,
@@ -109,40 +157,21 @@ class TrackPointCapBase(bd.BasePartObject):
                     align=(bd.Align.CENTER, bd.Align.CENTER, bd.Align.MIN),
                     mode=bd.Mode.SUBTRACT,
                 )
-        tp_cap = tp_cap.part
 
-        super().__init__(
-            part=tp_cap,
-            rotation=rotation,
-            align=cast(AlignT, bd.tuplify(align, 3)),
-            mode=mode,
-        )
+        return cast(bd.Part, tp_cap.part)
 
-        self.label = f'TP Cap - {self.model}'
-        self.color = color
+    def _get_part_size(self) -> Optional[Tuple[float, float, float]]:
+        # The size of the dimensions includes the dome dots
+        if self.detail == DetailLevel.low:
+            return None
 
-    @property
-    def debug(self) -> List[bd.Shape]:
-        """
-        Returns a list of build123d objects for debugging in ocp_viewer.
-        """
-        return get_bd_debug_objects(self)
+        return self.dimensions.size
 
     def build_cap_adapter(
         self,
         align: AlignT = ALIGN_CENTER_BOTTOM,
-    ) -> bd.Shape:
-        with bd.BuildPart() as cap_adapter:
-            bd.Box(
-                length=self.cap_adapter_length,
-                width=self.cap_adapter_width,
-                height=self.cap_adapter_height,
-                align=align,
-            )
-        cap_adapter = cap_adapter.part
-        cap_adapter.label = 'Cap Adapter'
-
-        return cast(bd.Shape, cap_adapter)
+    ) -> bd.Shape[Any]:
+        return build_cap_adapter(self.dimensions, align=align)
 
     def _build_dome(
         self,
@@ -151,65 +180,105 @@ class TrackPointCapBase(bd.BasePartObject):
         dot_height: float = DEFAULT_DOME_DOT_HEIGHT,
         dot_radius: float = DEFAULT_DOME_DOT_RADIUS,
         dot_spacing: float = DEFAULT_DOME_DOT_SPACING,
-        dot_rows: List[int] = DEFAULT_DOME_DOT_ROWS,
-    ) -> bd.Shape:
+        dot_rows: Sequence[int] = DEFAULT_DOME_DOT_ROWS,
+    ) -> bd.Shape[Any]:
         radius = diameter / 2
 
-        with bd.BuildPart() as dome:
-            # This is not the actual curvature of the TP dome, but
-            # it's close enough.
-            with bd.BuildSketch(bd.Plane.XZ) as dome_sketch:
-                with bd.BuildLine():
-                    # Draw the top half of the profile on the right side
-                    l_side = bd.Line((0, 0), (0, height / 2))
-                    l_bottom = bd.Line(l_side @ 0, (radius, 0))
-                    l_top = bd.Line(l_side @ 1, (radius * 0.4, height / 2))
-
-                    # Create the arc between top end and bottom end of the line
-                    arc_mid_point = (
-                        (l_top.end_point().X + l_bottom.end_point().X) / 2,
-                        (l_top.end_point().Y + l_bottom.end_point().Y)
-                        / 2
-                        * 1.5,
-                    )
-                    bd.ThreePointArc(l_top @ 1, arc_mid_point, l_bottom @ 1)
+        # This is not the actual curvature of the TP dome, but
+        # it's close enough.
+        with (
+            profile_span('profile'),
+            bd.BuildSketch(bd.Plane.XZ) as dome_sketch,
+        ):
+            with bd.BuildLine():
+                # Draw the top half of the profile on the right side
+                l_side = bd.Line((0, 0), (0, height / 2))
+                l_bottom = bd.Line(l_side @ 0, (radius, 0))
+                l_top = bd.Line(l_side @ 1, (radius * 0.4, height / 2))
+
+                # Create the arc between top end and bottom end of the line
+                arc_mid_point = (
+                    (l_top.end_point().X + l_bottom.end_point().X) / 2,
+                    (l_top.end_point().Y + l_bottom.end_point().Y) / 2 * 1.5,
+                )
+                bd.ThreePointArc(l_top @ 1, arc_mid_point, l_bottom @ 1)
 
-                bd.make_face()
+            bd.make_face()
 
-                # Mirrow it down around the XZ plane
-                bd.mirror(about=bd.Plane.XZ)
+            # Mirrow it down around the XZ plane
+            bd.mirror(about=bd.Plane.XZ)
 
-            dome_sketch = dome_sketch.sketch
-            dome_sketch.label = 'Dome Sketch'
-            self._debug = [dome_sketch]
+        dome_sketch = dome_sketch.sketch
+        dome_sketch.label = 'Dome Sketch'
+        self._debug = [dome_sketch]
 
-            # Create the 3D shape by revolving
-            bd.revolve(axis=bd.Axis.Z)
+        # Fusing the dots with the analytic torus surfaces is much faster
+        # than with the surface of revolution that `revolve()` creates.
+        with profile_span('revolve'):
+            dome_body: Optional[bd.Shape[Any]] = build_arc_dome(
+                radius=radius,
+                top_radius=radius * 0.4,
+                height=height,
+                arc_mid_point=arc_mid_point,
+            )
+            if dome_body is None:
+                with bd.BuildPart() as revolved_dome:
+                    bd.add(dome_sketch)
+                    bd.revolve(axis=bd.Axis.Z)
+                dome_body = revolved_dome.part
+
+        with profile_span('dot_pattern'):
+            dot_pattern = get_dome_dot_pattern(
+                height=height / 2 + dot_height,
+                dot_radius=dot_radius,
+                dot_spacing=dot_spacing,
+                dot_rows=dot_rows,
+            )
+
+        # All dots are fused in a single boolean operation
+        with profile_span('dots_fuse'):
+            dome = cast(bd.Shape[Any], dome_body).fuse(dot_pattern)
+        if isinstance(dome, bd.ShapeList):
+            dome = bd.Compound(dome)
+        dome.label = 'Cap Dome'
 
-            # Dome Dots
-            with bd.BuildSketch(bd.Plane.XY):
-                for row_num, dot_num in enumerate(dot_rows):
-                    row_offset = (
-                        row_num * dot_spacing
-                        - ((len(dot_rows) - 1) * dot_spacing) / 2
+        return dome
+
+    def _build_low_detail_dome(
+        self,
+        diameter: float,
+        height: float,
+    ) -> bd.Shape[Any]:
+        """
+        Builds the dome without dots and with straight lines instead of the
+        arc in its profile.
+        """
+        radius = diameter / 2
+
+        with bd.BuildPart() as dome:
+            with bd.BuildSketch(bd.Plane.XZ):
+                with bd.BuildLine():
+                    bd.Polyline(
+                        (0, height / 2),
+                        (radius * 0.4, height / 2),
+                        (radius * 0.7, height / 2 * 0.75),
+                        (radius, 0),
+                        (radius * 0.7, -height / 2 * 0.75),
+                        (radius * 0.4, -height / 2),
+                        (0, -height / 2),
+                        close=True,
                     )
-                    with bd.Locations((0, row_offset, 0)):
-                        grid_loc = bd.GridLocations(
-                            dot_spacing, dot_spacing, dot_num, 1
-                        )
-                        with grid_loc:
-                            bd.Circle(
-                                dot_radius,
-                            )
-            bd.extrude(amount=height / 2 + dot_height)
+                bd.make_face()
+
+            bd.revolve(axis=bd.Axis.Z)
         dome = dome.part
         dome.label = 'Cap Dome'
 
-        return cast(bd.Shape, dome)
+        return cast(bd.Shape[Any], dome)
 
     def _build_base(
         self, diameter: float, height: float, align: AlignT = ALIGN_CENTER_TOP
-    ) -> bd.Shape:
+    ) -> bd.Shape[Any]:
         radius = diameter / 2
 
         with bd.BuildPart() as base:
@@ -221,7 +290,193 @@ class TrackPointCapBase(bd.BasePartObject):
         base = base.part
         base.label = 'Cap Base'
 
-        return cast(bd.Shape, base)
+        return cast(bd.Shape[Any], base)
+
+
+def build_cap_adapter(
+    dimensions: TrackPointCapDimensions,
+    align: AlignT = ALIGN_CENTER_BOTTOM,
+) -> bd.Shape[Any]:
+    """
+    Builds the box at the tip of the extension that fits into the cap's
+    hole.
+    """
+    with bd.BuildPart() as cap_adapter:
+        bd.Box(
+            length=dimensions.cap_adapter_length,
+            width=dimensions.cap_adapter_width,
+            height=dimensions.cap_adapter_height,
+            align=align,
+        )
+    cap_adapter = cap_adapter.part
+    cap_adapter.label = 'Cap Adapter'
+
+    return cast(bd.Shape[Any], cap_adapter)
+
+
+# A pattern per dot size and spacing, which only change with the cap model
+_dome_dot_patterns = ShapeCache(max_size=8)
+
+
+def get_dome_dot_pattern(
+    height: float,
+    dot_radius: float = DEFAULT_DOME_DOT_RADIUS,
+    dot_spacing: float = DEFAULT_DOME_DOT_SPACING,
+    dot_rows: Sequence[int] = DEFAULT_DOME_DOT_ROWS,
+) -> bd.Shape[Any]:
+    """
+    Returns the dots on top of the dome as a compound of cylinders that
+    start at the XY plane.
+
+    Every row is centered on the Y axis and the rows are centered on the X
+    axis. The pattern is kept in a `ShapeCache`, so don't move it without
+    copying it.
+    """
+    key = (height, dot_radius, dot_spacing, tuple(dot_rows))
+    dot_pattern = _dome_dot_patterns.get(key)
+    if dot_pattern is not None:
+        return dot_pattern
+
+    dot = bd.Solid.make_cylinder(radius=dot_radius, height=height)
+
+    dots = []
+    for row_num, dot_num in enumerate(dot_rows):
+        row_offset = (
+            row_num * dot_spacing - ((len(dot_rows) - 1) * dot_spacing) / 2
+        )
+        for dot_col in range(dot_num):
+            col_offset = (
+                dot_col * dot_spacing - ((dot_num - 1) * dot_spacing) / 2
+            )
+            dots.append(dot.moved(bd.Location((col_offset, row_offset, 0))))
+
+    dot_pattern = bd.Compound(dots)
+    _dome_dot_patterns.put(key, dot_pattern)
+
+    return dot_pattern
+
+
+def build_arc_dome(
+    radius: float,
+    top_radius: float,
+    height: float,
+    arc_mid_point: Tuple[float, float],
+) -> Optional[bd.Solid]:
+    """
+    Builds the same dome as revolving the dome profile, but with toroidal
+    faces instead of surfaces of revolution.
+
+    The profile has a flat top with `top_radius` and an arc through
+    `arc_mid_point` (X, Z) to the widest point at `radius`. The bottom half
+    is mirrored.
+
+    Returns None if the arc can't be represented by a torus around the Z
+    axis.
+    """
+    arc = bd.Edge.make_three_point_arc(
+        (top_radius, 0, height / 2),
+        (arc_mid_point[0], 0, arc_mid_point[1]),
+        (radius, 0, 0),
+    )
+    arc_center = arc.arc_center
+    if arc_center.X <= 0:
+        return None
+
+    def get_angle(x: float, z: float, center_z: float) -> float:
+        return math.atan2(z - center_z, x - arc_center.X)
+
+    faces = []
+    for side in (1, -1):
+        center_z = arc_center.Z * side
+        angles = [
+            get_angle(top_radius, height / 2 * side, center_z),
+            get_angle(radius, 0, center_z),
+        ]
+        mid_angle = get_angle(
+            arc_mid_point[0], arc_mid_point[1] * side, center_z
+        )
+
+        # The angle range has to go through the middle of the arc
+        angle_min, angle_max = sorted(angles)
+        if not angle_min < mid_angle < angle_max:
+            angle_min, angle_max = angle_max, angle_min + 2 * math.pi
+
+        torus = Geom_ToroidalSurface(
+            gp_Ax3(gp_Pnt(0, 0, center_z), gp_Dir(0, 0, 1)),
+            arc_center.X,
+            arc.radius,
+        )
+        faces.append(
+            bd.Face(
+                BRepBuilderAPI_MakeFace(
+                    torus, 0, 2 * math.pi, angle_min, angle_max, bd.TOLERANCE
+                ).Face()
+            )
+        )
+
+        if top_radius > 0:
+            faces.append(
+                bd.Face(
+                    bd.Wire(
+                        [
+                            bd.Edge.make_circle(
+                                top_radius,
+                                bd.Plane.XY.offset(height / 2 * side),
+                            )
+                        ]
+                    )
+                )
+            )
+
+    dome = bd.Solid(bd.Shell(faces))
+    if not dome.is_valid():
+        return None
+
+    return dome
+
+
+# Every cap model in every detail level
+_caps = ShapeCache(max_size=16)
+
+
+def get_cap(
+    dimensions: TrackPointCapDimensions,
+    build_cache: Optional[BuildCache] = None,
+    detail: DetailLevel = DetailLevel.full,
+) -> bd.Shape[Any]:
+    """
+    Returns the cap solid for the dimensions.
+
+    Caps are kept in a `ShapeCache` of this process. If a build cache is
+    passed, caps are also loaded from and stored in it, so they don't have
+    to be rebuilt by the next process either.
+
+    The returned cap is shared, so copy it before moving it.
+    """
+    cap = _caps.get((dimensions, detail))
+    if cap is not None:
+        return cap
+
+    cache_key = None
+    if build_cache is not None:
+        cache_key = build_cache.get_key(
+            command='cap',
+            detail=detail,
+            **dimensions.to_kwargs(),
+        )
+        cached_build = build_cache.load(cache_key)
+        if cached_build is not None:
+            cap = cached_build.shape
+
+    if cap is None:
+        cap = TrackPointCapBase(**dimensions.to_kwargs(), detail=detail)
+
+        if build_cache is not None and cache_key is not None:
+            build_cache.store(cache_key, cap)
+
+    _caps.put((dimensions, detail), cap)
+
+    return cap
 
 
 class TrackPointCapRedT460S(TrackPointCapBase):
@@ -230,23 +485,14 @@ class TrackPointCapRedT460S(TrackPointCapBase):
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
+        detail: DetailLevel = DetailLevel.full,
     ):
         super().__init__(
-            total_height=4.0,
-            base_height=2.0,
-            base_diameter=6.5,
-            dome_diameter=8.5,
-            hole_width=2.5,
-            hole_length=2.5,
-            hole_depth=3.0,
-            # Since the inside of the cap is rubber, we don't decrease the
-            # adapter size for a tighter fit
-            cap_adapter_length_decrease=0.0,
-            cap_adapter_width_decrease=0.0,
-            model='Green T460S',
+            **CAP_DIMENSIONS_RED_T460S.to_kwargs(),
             rotation=rotation,
             align=bd.tuplify(align, 3),
             mode=mode,
+            detail=detail,
         )
 
 
@@ -256,23 +502,14 @@ class TrackPointCapGreenT430(TrackPointCapBase):
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
+        detail: DetailLevel = DetailLevel.full,
     ):
         super().__init__(
-            total_height=6.2,
-            base_height=4.5,
-            base_diameter=6.8,
-            dome_diameter=8.0,
-            hole_width=2.3,
-            hole_length=2.3,
-            hole_depth=5.3,
-            # Since the inside of the cap is hard plastic and not rubber, we
-            # decrease the tip width to make it fit better
-            cap_adapter_length_decrease=0.2,
-            cap_adapter_width_decrease=0.2,
-            model='Green T430',
+            **CAP_DIMENSIONS_GREEN_T430.to_kwargs(),
             rotation=rotation,
             align=bd.tuplify(align, 3),
             mode=mode,
+            detail=detail,
         )
 
 
@@ -282,23 +519,12 @@ class TrackPointCapBlueX1Carbon(TrackPointCapBase):
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
+        detail: DetailLevel = DetailLevel.full,
     ):
         super().__init__(
-            total_height=3.0,
-            base_height=1.3,
-            base_diameter=6.5,
-            dome_diameter=8.0,
-            hole_width=2.2,
-            hole_length=2.2,
-            # Yes, the hole is smaller than the stem of the TP
-            # the cap hovers above the platform
-            hole_depth=1.8,
-            # Since the inside of the cap is rubber, we don't decrease the
-            # adapter size to achieve a tight fit.
-            cap_adapter_length_decrease=0.0,
-            cap_adapter_width_decrease=0.0,
-            model='Blue X1 Carbon',
+            **CAP_DIMENSIONS_BLUE_X1_CARBON.to_kwargs(),
             rotation=rotation,
             align=bd.tuplify(align, 3),
             mode=mode,
+            detail=detail,
         )
@@ -1,25 +1,41 @@
 import build123d as bd
-import inspect
-import math
 
 from copy import copy
-from typing import cast, Any, List, Dict, Optional
+from typing import cast, Any, Callable, List, Optional, Tuple, Union
+
+from tp_extension_builder.cache import BuildCache
+
+from tp_extension_builder.dimensions import (
+    TrackPointCapDimensions,
+    TrackPointExtensionDimensions,
+    TrackPointExtensionParams,
+    CAP_DIMENSIONS_RED_T460S,
+    CAP_DIMENSIONS_GREEN_T430,
+    CAP_DIMENSIONS_BLUE_X1_CARBON,
+    STEM_DIMENSIONS_RED_T460S,
+    STEM_DIMENSIONS_GREEN_T430,
+    STEM_DIMENSIONS_BLUE_X1_CARBON,
+)
+
+from tp_extension_builder.profiling import profile_span
 
 from tp_extension_builder.tp_caps import (
     TrackPointCapBase,
-    TrackPointCapRedT460S,
-    TrackPointCapGreenT430,
-    TrackPointCapBlueX1Carbon,
+    build_cap_adapter,
+    get_cap,
 )
 
 from tp_extension_builder.utils import (
     get_bd_debug_objects,
     ALIGN_CENTER_BOTTOM,
     AlignT,
+    DimensionedPartObject,
+    ShapeCache,
     align_shape,
 )
 
 from tp_extension_builder.defines import (
+    DetailLevel,
     D_ADAPTER_WIDTH_BELOW_PCB,
     D_ADAPTER_WIDTH_ABOVE_PCB,
     D_EXTENSION_WIDTH,
@@ -32,8 +48,12 @@ from tp_extension_builder.defines import (
 # TP Extension Builder Base Class
 #
 
+# Extensions can be built for a cap solid or just the cap's dimensions. The
+# cap solid is only built when it is needed, like for KiCad models.
+TrackPointCapT = Union[TrackPointCapBase, TrackPointCapDimensions]
 
-class TrackPointExtensionBase(bd.BasePartObject):
+
+class TrackPointExtensionBase(DimensionedPartObject):
     def __init__(
         self,
         adapter_hole_incr: float,
@@ -44,7 +64,7 @@ class TrackPointExtensionBase(bd.BasePartObject):
         extension_width: float,
         pcb_height: float,
         space_above_pcb: float,
-        tp_cap: TrackPointCapBase,
+        tp_cap: TrackPointCapT,
         tp_stem_width: float,
         tp_stem_height: float,
         model: str,
@@ -56,216 +76,124 @@ class TrackPointExtensionBase(bd.BasePartObject):
         context: bd.BuildPart = bd.BuildPart._get_context(self)
         bd.validate_inputs(context, self)
 
-        self._debug: List[bd.Shape] = []
-
-        self._desired_cap_height = abs(desired_cap_height)
-        self._tp_mounting_distance = abs(tp_mounting_distance)
-        self._adapter_hole_incr = abs(adapter_hole_incr)
-        self._adapter_width_below_pcb = abs(adapter_width_below_pcb)
-        self._adapter_width_above_pcb = abs(adapter_width_above_pcb)
-        self._extension_width = abs(extension_width)
-        self._pcb_height = abs(pcb_height)
-        self._space_above_pcb = abs(space_above_pcb)
-        self._tp_stem_width = abs(tp_stem_width)
-        self._tp_stem_height = abs(tp_stem_height)
-        self._tp_cap = tp_cap
-
-        self._adapter_height = (
-            self._tp_mounting_distance
-            + self._pcb_height
-            + self._space_above_pcb
-            - 0.2
-        )
-
-        self._adapter_hole_width = (
-            self._tp_stem_width + self._adapter_hole_incr
-        )
-        self._adapter_hole_height = (
-            self._tp_stem_height + self._adapter_hole_incr
-        )
-
-        # Since a portion of the extension adapter will be below the top of the
-        # pcb, we calculate the length that it will extend above the pcb here
-        self._adapter_height_below_pcb = (
-            self._pcb_height + self._tp_mounting_distance
-        )
-        self._adapter_height_above_pcb = (
-            self._adapter_height - self._adapter_height_below_pcb
-        )
+        self._debug: List[bd.Shape[Any]] = []
 
-        # Height of the part between the mount at the bottom and tip at the top
-        self._extension_height = (
-            self._desired_cap_height
-            - self._tp_cap.total_height
-            - self._adapter_height_above_pcb
-        )
+        self._tp_cap: Optional[TrackPointCapBase] = None
+        if isinstance(tp_cap, TrackPointCapBase):
+            self._tp_cap = tp_cap
+            self._tp_cap_dimensions = tp_cap.dimensions
+        else:
+            self._tp_cap_dimensions = tp_cap
 
-        self._total_height = (
-            self._adapter_height
-            + self._extension_height
-            + self._tp_cap.cap_adapter_height
+        self.dimensions = TrackPointExtensionDimensions(
+            model=model,
+            adapter_hole_incr=adapter_hole_incr,
+            desired_cap_height=desired_cap_height,
+            tp_mounting_distance=tp_mounting_distance,
+            adapter_width_below_pcb=adapter_width_below_pcb,
+            adapter_width_above_pcb=adapter_width_above_pcb,
+            extension_width=extension_width,
+            pcb_height=pcb_height,
+            space_above_pcb=space_above_pcb,
+            tp_cap=self._tp_cap_dimensions,
+            tp_stem_width=tp_stem_width,
+            tp_stem_height=tp_stem_height,
         )
+        dimensions = self.dimensions
+
+        self._desired_cap_height = dimensions.desired_cap_height
+        self._tp_mounting_distance = dimensions.tp_mounting_distance
+        self._adapter_hole_incr = dimensions.adapter_hole_incr
+        self._adapter_width_below_pcb = dimensions.adapter_width_below_pcb
+        self._adapter_width_above_pcb = dimensions.adapter_width_above_pcb
+        self._extension_width = dimensions.extension_width
+        self._pcb_height = dimensions.pcb_height
+        self._space_above_pcb = dimensions.space_above_pcb
+        self._tp_stem_width = dimensions.tp_stem_width
+        self._tp_stem_height = dimensions.tp_stem_height
+
+        self._adapter_height = dimensions.adapter_height
+        self._adapter_hole_width = dimensions.adapter_hole_width
+        self._adapter_hole_height = dimensions.adapter_hole_height
+        self._adapter_height_below_pcb = dimensions.adapter_height_below_pcb
+        self._adapter_height_above_pcb = dimensions.adapter_height_above_pcb
+        self._extension_height = dimensions.extension_height
+        self._total_height = dimensions.total_height
 
         self.model = model
 
-        extension = self._build_extension()
-
-        self._init_params = self._get_init_params(
-            exclude_list=['color', 'rotation', 'align', 'mode', 'tp_cap']
-        )
-
-        super().__init__(
-            part=extension,
+        self._init_part(
+            label=f'TP Extension - {self.model}',
+            color=color,
             rotation=rotation,
-            align=cast(AlignT, bd.tuplify(align, 3)),
+            align=align,
             mode=mode,
         )
 
-        self.label = f'TP Extension - {self.model}'
-        self.color = color
-
-    def _get_init_params(
-        self,
-        exclude_list: Optional[List[str]] = None,
-    ) -> Dict[str, Any]:
-        if exclude_list is None:
-            exclude_list = []
-        if 'self' not in exclude_list:
-            exclude_list.append('self')
-
-        frame = inspect.currentframe()
-        if not frame or not frame.f_back or not frame.f_back.f_back:
-            return {}
-        else:
-            frame = frame.f_back.f_back
+    @classmethod
+    def from_params(
+        cls,
+        params: TrackPointExtensionParams,
+        **kwargs: Any,
+    ) -> 'TrackPointExtensionBase':
+        """
+        Creates the extension from its parameter object. The other keyword
+        arguments, like `tp_cap`, are passed to the constructor.
+        """
+        return cls(**params.to_dict(), **kwargs)
 
-        args, _, _, values = inspect.getargvalues(frame)
-        params = {arg: values[arg] for arg in args if arg not in exclude_list}
+    @property
+    def params(self) -> TrackPointExtensionParams:
+        """
+        The user settings the extension was created with.
+        """
+        return self.dimensions.params
 
-        return params
+    @property
+    def total_width(self) -> float:
+        """
+        The width of the widest section of the extension.
+        """
+        return self.dimensions.total_width
 
     @property
     def info(self) -> str:
-        size = self.bounding_box().size
-        cap_size = self._tp_cap.bounding_box().size
-        cap_height_incr = cap_size.Z - self._tp_cap.hole_depth
-
-        above_pcb_height = self._total_height - self._adapter_height_below_pcb
-        above_pcb_height_with_cap = (
-            above_pcb_height + self._tp_cap.cap_extra_height
-        )
-
-        adapter_hole_corner_distance = math.sqrt(
-            self._adapter_hole_width * self._adapter_hole_width
-            + self._adapter_hole_width * self._adapter_hole_width
-        )
-        adapter_wall_thickness_below_pcb = (
-            self._adapter_width_below_pcb - self._adapter_hole_width
-        ) / 2
-        adapter_wall_thickness_above_pcb = (
-            self._adapter_width_above_pcb - self._adapter_hole_width
-        ) / 2
-        adapter_corner_wall_thickness_below_pcb = (
-            self._adapter_width_below_pcb - adapter_hole_corner_distance
-        ) / 2
-        adapter_corner_wall_thickness_above_pcb = (
-            self._adapter_width_above_pcb - adapter_hole_corner_distance
-        ) / 2
-        adapter_corner_wall_thickness_top = (
-            self._adapter_height - self._adapter_hole_height
-        )
-
-        parameters = '\n'.join(
-            [f'\t{k}: {v}' for k, v in self._init_params.items()]
-        )
-
-        def fv(
-            value: float, format_str: str = '.2f', units: str = 'mm'
-        ) -> str:
-            return f'{value:{format_str}}{units}'
-
-        info_list = [
-            'Info:',
-            f'\t TrackPoint Model: {self.model}',
-            f'\t Cap Model: {self._tp_cap.model}',
-            '',
-            'Parameters:',
-            f'{parameters}',
-            '',
-            'General Size:',
-            f'\tTotal Height: {fv(size.Z)}',
-            f'\tTotal Width: {fv(max(size.Y, size.X))}',
-            f'\tAbove PCB Height: {fv(above_pcb_height)}',
-            f'\tAbove PCB Height (With Cap): {fv(above_pcb_height_with_cap)}',
-            '',
-            'Adapter Hole:',
-            (
-                f'\t Width: {fv(self._adapter_hole_width)} '
-                f'({fv(self._adapter_hole_incr, "+.2f")})'
-            ),
-            (
-                f'\t Depth: {fv(self._adapter_hole_height)} '
-                f'({fv(self._adapter_hole_incr, "+.2f")})'
-            ),
-            f'\t Corner Distance: {fv(adapter_hole_corner_distance)}',
-            '',
-            'Adapter:',
-            f'\t Total Height: {fv(self._adapter_height)}',
-            '',
-            f'\t Below PCB Height  {fv(self._adapter_height_below_pcb)}',
-            f'\t Below PCB Width: {fv(self._adapter_width_below_pcb)}',
-            (
-                f'\t Below PCB Wall Thickness: '
-                f'{fv(adapter_wall_thickness_below_pcb)}'
-            ),
-            (
-                f'\t Below PCB Wall Thickness Corners: '
-                f'{fv(adapter_corner_wall_thickness_below_pcb)}'
-            ),
-            '',
-            f'\t Above PCB Height: {fv(self._adapter_height_above_pcb)}',
-            f'\t Above PCB Width: {fv(self._adapter_width_above_pcb)}',
-            (
-                f'\t Above PCB Wall Thickness: '
-                f'{fv(adapter_wall_thickness_above_pcb)}'
-            ),
-            (
-                f'\t Above PCB Wall Thickness Corners: '
-                f'{fv(adapter_corner_wall_thickness_above_pcb)}'
-            ),
-            '',
-            f'\t Top Wall Thickness: {fv(adapter_corner_wall_thickness_top)}',
-            '',
-            'Extension:',
-            f'\t Height: {fv(self._extension_height)}',
-            f'\t Width: {fv(self._extension_width)}',
-            '',
-            'Cap Adapter:',
-            f'\t Height: {fv(self._tp_cap.cap_adapter_height)}',
-            f'\t Width: {fv(self._tp_cap.cap_adapter_width)}',
-            f'\t Length: {fv(self._tp_cap.cap_adapter_length)}',
-            '',
-            'Cap:',
-            f'\t Hole Depth: {fv(self._tp_cap.hole_depth)}',
-            f'\t Hole Width: {fv(self._tp_cap.hole_width)}',
-            f'\t Hole Length: {fv(self._tp_cap.hole_length)}',
-            f'\t Cap Height: {fv(cap_size.Z)}',
-            f'\t Cap Width: {fv(max(cap_size.X, cap_size.Y))}',
-            f'\t Cap Height Increase: {fv(cap_height_incr)}',
-        ]
-
-        info_str = '\n'.join(info_list)
-
-        return info_str
+        return self.dimensions.info
 
     @property
-    def debug(self) -> List[bd.Shape]:
+    def debug(self) -> List[bd.Shape[Any]]:
         """
         Returns a list of build123d objects for debugging in ocp_viewer.
         """
         return get_bd_debug_objects(self)
 
-    def for_kicad(self, include_cap: bool = True) -> bd.Shape:
+    def get_cap(
+        self,
+        build_cache: Optional[BuildCache] = None,
+        detail: DetailLevel = DetailLevel.full,
+    ) -> bd.Shape[Any]:
+        """
+        Returns the cap solid this extension was built for.
+
+        If the extension was only given the cap's dimensions, the shared cap
+        from `tp_caps.get_cap()` is returned and built in the requested
+        detail if necessary.
+        """
+        if self._tp_cap is not None:
+            return self._tp_cap
+
+        return get_cap(
+            self._tp_cap_dimensions,
+            build_cache=build_cache,
+            detail=detail,
+        )
+
+    def for_kicad(
+        self,
+        include_cap: bool = True,
+        build_cache: Optional[BuildCache] = None,
+        detail: DetailLevel = DetailLevel.full,
+    ) -> bd.Shape[Any]:
         tp_extension = align_shape(
             self,
             ALIGN_CENTER_BOTTOM,
@@ -281,20 +209,20 @@ class TrackPointExtensionBase(bd.BasePartObject):
 
         if include_cap is True:
             # Move cap to top of extension tip
-            tp_cap = copy(tp_extension._tp_cap)
+            tp_cap = copy(self.get_cap(build_cache=build_cache, detail=detail))
             tp_cap.move(
                 bd.Location(
                     (
                         0,
                         0,
-                        tp_extension._total_height - tp_cap.hole_depth,
+                        self._total_height
+                        - self._tp_cap_dimensions.hole_depth,
                     )
                 )
             )
 
             tp_extension = bd.Compound(
                 label='TrackPoint Extension',
-                shapes=[],
                 children=[
                     tp_extension,
                     tp_cap,
@@ -308,49 +236,217 @@ class TrackPointExtensionBase(bd.BasePartObject):
 
         return tp_extension
 
-    def _build_extension(self) -> bd.Shape:
-        with bd.BuildPart() as tp_extension:
-            # Below PCB adapter
-            below_pcb_adapter = bd.Cylinder(
-                radius=self._adapter_width_below_pcb / 2,
-                height=self._adapter_height_below_pcb,
-                align=ALIGN_CENTER_BOTTOM,
-            )
+    def _get_part_size(self) -> Optional[Tuple[float, float, float]]:
+        return self.dimensions.size
+
+    def _build_part(self) -> bd.Part:
+        return cast(bd.Part, self._build_extension())
+
+    def _build_extension(self) -> bd.Shape[Any]:
+        """
+        Fuses the cached adapter, shaft and cap adapter sections.
 
-            topf = below_pcb_adapter.faces().sort_by(bd.Axis.Z)[-1]
-            with bd.Locations(topf):
-                above_pcb_adapter = bd.Cylinder(
-                    radius=self._adapter_width_above_pcb / 2,
-                    height=self._adapter_height_above_pcb,
-                    align=ALIGN_CENTER_BOTTOM,
+        Every section is keyed by the dimensions it depends on, so changing
+        e.g. the cap height only builds a new shaft, while the adapter with
+        its hole and the cap adapter are reused.
+        """
+        # The hole is cut from the adapter section, unless it reaches into
+        # the shaft
+        is_hole_in_adapter = self._adapter_hole_height < self._adapter_height
+        adapter_sections = self._get_body_sections()[:2]
+        hole_size = (
+            (self._adapter_hole_width, self._adapter_hole_height)
+            if is_hole_in_adapter is True
+            else None
+        )
+
+        cap_dimensions = self._tp_cap_dimensions
+        cap_adapter_size = (
+            cap_dimensions.cap_adapter_length,
+            cap_dimensions.cap_adapter_width,
+            cap_dimensions.cap_adapter_height,
+        )
+
+        shaft_z = self._adapter_height
+        cap_adapter_z = shaft_z + self._extension_height
+
+        with profile_span('extension'):
+            with profile_span('adapter_section'):
+                adapter = get_extension_section(
+                    ('adapter', *adapter_sections, hole_size),
+                    lambda: build_adapter_section(adapter_sections, hole_size),
                 )
 
-            topf = above_pcb_adapter.faces().sort_by(bd.Axis.Z)[-1]
-            with bd.Locations(topf):
-                extension = bd.Cylinder(
-                    radius=self._extension_width / 2,
-                    height=self._extension_height,
-                    align=ALIGN_CENTER_BOTTOM,
+            with profile_span('shaft_section'):
+                shaft = get_extension_section(
+                    ('shaft', self._extension_width, self._extension_height),
+                    lambda: bd.Solid.make_cylinder(
+                        radius=self._extension_width / 2,
+                        height=self._extension_height,
+                    ),
                 )
 
-            topf = extension.faces().sort_by(bd.Axis.Z)[-1]
-            with bd.Locations(topf):
-                cap_adapter = self._tp_cap.build_cap_adapter(
-                    align=ALIGN_CENTER_BOTTOM
+            with profile_span('cap_adapter_section'):
+                cap_adapter = get_extension_section(
+                    ('cap_adapter', *cap_adapter_size),
+                    lambda: build_cap_adapter(
+                        cap_dimensions,
+                        align=ALIGN_CENTER_BOTTOM,
+                    ),
                 )
-                bd.add(cap_adapter)
-
-            bd.Box(
-                width=self._adapter_hole_width,
-                length=self._adapter_hole_width,
-                height=self._adapter_hole_height,
-                mode=bd.Mode.SUBTRACT,
-                align=ALIGN_CENTER_BOTTOM,
-            )
 
-        tp_extension = tp_extension.part
+            # All sections are fused in a single boolean operation. The
+            # builder of a BuildPart would take almost as long as the fuse
+            # to keep track of the new faces and edges.
+            with profile_span('fuse_sections'):
+                tp_extension = adapter.fuse(
+                    shaft.moved(bd.Location((0, 0, shaft_z))),
+                    cap_adapter.moved(bd.Location((0, 0, cap_adapter_z))),
+                )
+
+            if is_hole_in_adapter is False:
+                with profile_span('adapter_hole'):
+                    tp_extension = cast(bd.Shape[Any], tp_extension).cut(
+                        bd.Box(
+                            width=self._adapter_hole_width,
+                            length=self._adapter_hole_width,
+                            height=self._adapter_hole_height,
+                            align=ALIGN_CENTER_BOTTOM,
+                        )
+                    )
+
+            # The boolean operations return a list if there are several
+            # solids
+            if isinstance(tp_extension, bd.ShapeList):
+                solids = list(tp_extension)
+            else:
+                solids = [tp_extension]
+
+            with profile_span('clean'):
+                part = bd.Part(solids).clean()
+
+        return part
+
+    def _get_body_sections(self) -> List[Tuple[float, float]]:
+        """
+        Returns the radius and height of the round sections from the bottom
+        to the top.
+        """
+        return [
+            (
+                self._adapter_width_below_pcb / 2,
+                self._adapter_height_below_pcb,
+            ),
+            (
+                self._adapter_width_above_pcb / 2,
+                self._adapter_height_above_pcb,
+            ),
+            (self._extension_width / 2, self._extension_height),
+        ]
+
+
+def build_round_sections(sections: List[Tuple[float, float]]) -> bd.Shape[Any]:
+    """
+    Builds stacked round sections, given as radius and height from the
+    bottom to the top, by revolving their outline around the Z axis.
+    """
+    with bd.BuildPart() as round_sections:
+        with bd.BuildSketch(bd.Plane.XZ):
+            with bd.BuildLine():
+                bd.Polyline(*get_stepped_profile(sections), close=True)
+            bd.make_face()
+
+        bd.revolve(axis=bd.Axis.Z)
+
+    return cast(bd.Shape[Any], round_sections.part)
+
+
+def build_adapter_section(
+    sections: List[Tuple[float, float]],
+    hole_size: Optional[Tuple[float, float]],
+) -> bd.Shape[Any]:
+    """
+    Builds the round sections of the adapter with the hole for the stem,
+    given as width and height, at the bottom.
+    """
+    adapter = build_round_sections(sections)
+    if hole_size is None:
+        return adapter
+
+    hole_width, hole_height = hole_size
+    with bd.BuildPart() as adapter_section:
+        bd.add(adapter)
+        bd.Box(
+            width=hole_width,
+            length=hole_width,
+            height=hole_height,
+            mode=bd.Mode.SUBTRACT,
+            align=ALIGN_CENTER_BOTTOM,
+        )
+
+    return cast(bd.Shape[Any], adapter_section.part)
+
+
+# Enough sections for the variants of a sweep over a few parameters
+_extension_sections = ShapeCache(max_size=64)
+
+
+def get_extension_section(
+    key: Tuple[Any, ...],
+    build_section: Callable[[], bd.Shape[Any]],
+) -> bd.Shape[Any]:
+    """
+    Returns the section of an extension with the key or builds it with
+    `build_section`.
+
+    The key contains the name of the section and every dimension that it
+    depends on. The section is kept in a `ShapeCache`, so don't move it
+    without copying it.
+    """
+    section = _extension_sections.get(key)
+    if section is not None:
+        return section
+
+    section = build_section()
+    _extension_sections.put(key, section)
+
+    return section
+
+
+def get_stepped_profile(
+    sections: List[Tuple[float, float]],
+) -> List[Tuple[float, float]]:
+    """
+    Returns the outline of stacked round sections, given as radius and
+    height from the bottom to the top, on the right side of the axis.
+
+    Points that would create edges without length or split a straight edge,
+    like between two sections with the same radius, are left out.
+    """
+    points = [(0.0, 0.0)]
+    z = 0.0
+    for radius, height in sections:
+        points.append((radius, z))
+        z += height
+        points.append((radius, z))
+    points.append((0.0, z))
 
-        return cast(bd.Shape, tp_extension)
+    profile: List[Tuple[float, float]] = []
+    for point in points:
+        profile.append(point)
+        while len(profile) >= 3 and _is_collinear(*profile[-3:]):
+            del profile[-2]
+
+    return profile
+
+
+def _is_collinear(
+    a: Tuple[float, float],
+    b: Tuple[float, float],
+    c: Tuple[float, float],
+) -> bool:
+    cross = (b[0] - a[0]) * (c[1] - b[1]) - (b[1] - a[1]) * (c[0] - b[0])
+    return abs(cross) < 1e-9
 
 
 #
@@ -369,26 +465,16 @@ class TrackPointExtensionRedT460S(TrackPointExtensionBase):
         extension_width: float = D_EXTENSION_WIDTH,
         pcb_height: float = D_PCB_HEIGHT,
         space_above_pcb: float = CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT,
-        tp_cap: Optional[TrackPointCapBase] = None,
+        tp_cap: Optional[TrackPointCapT] = None,
         color: bd.Color = bd.Color('gray'),
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
     ) -> None:
         if tp_cap is None:
-            tp_cap = TrackPointCapRedT460S()
-
-        # Height from bottom metal part to stem top
-        tp_total_height = 4.0
+            tp_cap = CAP_DIMENSIONS_RED_T460S
 
-        # Height of the metal and black, round platform part.
-        # This is the height that sticks out below the pcb if the
-        # TP is mounted totally flush.
-        tp_board_thickness = 1.3
-
-        # The height of the white stem (2.7mm)
-        tp_stem_height = tp_total_height - tp_board_thickness
-        tp_stem_width = 2.2
+        tp_stem = STEM_DIMENSIONS_RED_T460S
 
         super().__init__(
             # User Settings
@@ -402,9 +488,9 @@ class TrackPointExtensionRedT460S(TrackPointExtensionBase):
             space_above_pcb=space_above_pcb,
             # TP Dimensions
             tp_cap=tp_cap,
-            tp_stem_width=tp_stem_width,
-            tp_stem_height=tp_stem_height,
-            model='Red T460S',
+            tp_stem_width=tp_stem.stem_width,
+            tp_stem_height=tp_stem.stem_height,
+            model=tp_stem.model,
             color=color,
             align=align,
             rotation=rotation,
@@ -423,26 +509,16 @@ class TrackPointExtensionGreenT430(TrackPointExtensionBase):
         extension_width: float = D_EXTENSION_WIDTH,
         pcb_height: float = D_PCB_HEIGHT,
         space_above_pcb: float = CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT,
-        tp_cap: Optional[TrackPointCapBase] = None,
+        tp_cap: Optional[TrackPointCapT] = None,
         color: bd.Color = bd.Color('gray'),
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
     ) -> None:
         if tp_cap is None:
-            tp_cap = TrackPointCapGreenT430()
-
-        # Height from bottom metal part to stem top
-        tp_total_height = 5.0
+            tp_cap = CAP_DIMENSIONS_GREEN_T430
 
-        # Height of the metal and black, round platform part.
-        # This is the height that sticks out below the pcb if the
-        # TP is mounted totally flush.
-        tp_board_thickness = 2.5
-
-        # The height of the white stem (2.5mm)
-        tp_stem_height = tp_total_height - tp_board_thickness
-        tp_stem_width = 2.2
+        tp_stem = STEM_DIMENSIONS_GREEN_T430
 
         super().__init__(
             # User Settings
@@ -456,9 +532,9 @@ class TrackPointExtensionGreenT430(TrackPointExtensionBase):
             space_above_pcb=space_above_pcb,
             # TP Dimensions
             tp_cap=tp_cap,
-            tp_stem_width=tp_stem_width,
-            tp_stem_height=tp_stem_height,
-            model='Green T430',
+            tp_stem_width=tp_stem.stem_width,
+            tp_stem_height=tp_stem.stem_height,
+            model=tp_stem.model,
             color=color,
             align=align,
             rotation=rotation,
@@ -477,26 +553,16 @@ class TrackPointExtensionBlueX1Carbon(TrackPointExtensionBase):
         extension_width: float = D_EXTENSION_WIDTH,
         pcb_height: float = D_PCB_HEIGHT,
         space_above_pcb: float = CHOC_SWITCH_MOUNTING_NOTCH_HEIGHT,
-        tp_cap: Optional[TrackPointCapBase] = None,
+        tp_cap: Optional[TrackPointCapT] = None,
         color: bd.Color = bd.Color('gray'),
         rotation: bd.RotationLike = (0, 0, 0),
         align: AlignT = ALIGN_CENTER_BOTTOM,
         mode: bd.Mode = bd.Mode.ADD,
     ) -> None:
         if tp_cap is None:
-            tp_cap = TrackPointCapBlueX1Carbon()
-
-        # Height from bottom metal part to stem top
-        tp_total_height = 3.3
+            tp_cap = CAP_DIMENSIONS_BLUE_X1_CARBON
 
-        # Height of the metal and black, round platform part.
-        # This is the height that sticks out below the pcb if the
-        # TP is mounted totally flush.
-        tp_board_thickness = 1.2
-
-        # The height of the white stem (2.1mm)
-        tp_stem_height = tp_total_height - tp_board_thickness
-        tp_stem_width = 2.2
+        tp_stem = STEM_DIMENSIONS_BLUE_X1_CARBON
 
         super().__init__(
             # User Settings
@@ -510,9 +576,9 @@ class TrackPointExtensionBlueX1Carbon(TrackPointExtensionBase):
             space_above_pcb=space_above_pcb,
             # TP Dimensions
             tp_cap=tp_cap,
-            tp_stem_width=tp_stem_width,
-            tp_stem_height=tp_stem_height,
-            model='Blue X1 Carbon',
+            tp_stem_width=tp_stem.stem_width,
+            tp_stem_height=tp_stem.stem_height,
+            model=tp_stem.model,
             color=color,
             align=align,
             rotation=rotation,
@@ -1,5 +1,44 @@
+import abc
 import build123d as bd
-from typing import cast, Any, List, Union, Tuple, Optional
+import gzip
+import io
+import shutil
+import tempfile
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from enum import Enum
+from OCP.Bnd import Bnd_Box
+from OCP.BRep import BRep_Builder
+from OCP.BRepTools import BRepTools
+from OCP.TopoDS import TopoDS_Shape
+from pathlib import Path
+from typing import (
+    cast,
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Union,
+    Tuple,
+    Optional,
+)
+
+from tp_extension_builder.defines import (
+    D_STL_ANGULAR_TOLERANCE,
+    D_STL_TOLERANCE,
+)
+from tp_extension_builder.layout import (
+    BoundsT,
+    Sprue,
+    bounds_intersect,
+    create_layout,
+)
+from tp_extension_builder.parallel import create_pool, get_job_count
+from tp_extension_builder.profiling import profile_span
 
 AlignT = Union[bd.Align, tuple[bd.Align, bd.Align, bd.Align]]
 
@@ -22,7 +61,7 @@ ALIGN_CENTER_TOP = (
 )
 
 
-def get_bd_debug_objects(bd_obj_instance: Any) -> List[bd.Shape]:
+def get_bd_debug_objects(bd_obj_instance: Any) -> List[bd.Shape[Any]]:
     """
     Returns build123d values of self._debug as a list for debugging in
     ocp_viewer if the `self._debug` property exists and has build123d
@@ -42,87 +81,701 @@ def get_bd_debug_objects(bd_obj_instance: Any) -> List[bd.Shape]:
     return debug
 
 
-def align_shape(
-    shape: bd.Shape,
-    align: AlignT,
-) -> bd.Shape:
+class DimensionedPartObject(bd.BasePartObject, metaclass=abc.ABCMeta):
     """
-    Returns a copy of the shape that has been moved to the alignment.
+    A `bd.BasePartObject` whose size is known from its dimensions.
+
+    Subclasses calculate their dimensions in `__init__()`, build the solid in
+    `_build_part()` and call `_init_part()` instead of `super().__init__()`.
     """
 
-    def get_align_offset(
-        shape: bd.Shape,
+    def _init_part(
+        self,
+        label: str,
+        color: bd.Color,
+        rotation: bd.RotationLike,
         align: AlignT,
-    ) -> Tuple[float, float, float]:
+        mode: bd.Mode,
+    ) -> None:
+        self._part_rotation = rotation
+        self._part_align = align
+
+        part = self._build_part()
+
+        bd.BasePartObject.__init__(
+            self,
+            part=part,
+            rotation=rotation,
+            align=cast(AlignT, bd.tuplify(align, 3)),
+            mode=mode,
+        )
+
+        self.label = label
+        self.color = color
+
+        # Aligning the part moves its location, so the box is calculated
+        # relative to the location right after the build.
+        self._part_location = self.location
+
+    @abc.abstractmethod
+    def _build_part(self) -> bd.Part:
+        """
+        Builds the unaligned and unrotated solid.
+        """
+
+    def _get_part_size(self) -> Optional[Tuple[float, float, float]]:
+        """
+        Returns the size of the unrotated solid if it can be calculated from
+        the dimensions.
+        """
+        return None
+
+    def analytic_bounding_box(self) -> Optional[bd.BoundBox]:
         """
-        Amount to move object to achieve the desired alignment.
+        Returns the bounding box calculated from the dimensions without
+        traversing the solid.
 
-        From bd.BoundingBox.to_align_offset, but expanded for a 3d move.
+        Returns None if the box can't be calculated, for example because the
+        part is rotated.
         """
-        align = cast(AlignT, bd.tuplify(align, 3))
-
-        align_offset = []
-        for i in range(3):
-            if align[i] == bd.Align.MIN:
-                align_offset.append(-shape.bounding_box().min.to_tuple()[i])
-            elif align[i] == bd.Align.CENTER:
-                align_offset.append(
-                    -(
-                        shape.bounding_box().min.to_tuple()[i]
-                        + shape.bounding_box().max.to_tuple()[i]
-                    )
-                    / 2
-                )
-            elif align[i] == bd.Align.MAX:
-                align_offset.append(-shape.bounding_box().max.to_tuple()[i])
-        return (align_offset[0], align_offset[1], align_offset[2])
-
-    align_location = bd.Location(get_align_offset(shape=shape, align=align))
+        size = self._get_part_size()
+        if size is None:
+            return None
+
+        rotation = self._part_rotation
+        if isinstance(rotation, tuple):
+            rotation = bd.Rotation(*rotation)
+        if is_rotated(rotation):
+            return None
+
+        location = self.location
+        part_location = self._part_location
+        if location is None or part_location is None or is_rotated(location):
+            return None
+        position = location.position - part_location.position
+
+        align = cast(
+            Tuple[bd.Align, bd.Align, bd.Align],
+            bd.tuplify(self._part_align, 3),
+        )
+        min_point = []
+        for axis_align, axis_size in zip(align, size):
+            if axis_align == bd.Align.MIN:
+                min_point.append(0.0)
+            elif axis_align == bd.Align.CENTER:
+                min_point.append(-axis_size / 2)
+            elif axis_align == bd.Align.MAX:
+                min_point.append(-axis_size)
+            else:
+                return None
+
+        min_vector = position + bd.Vector(*min_point)
+
+        return make_bounding_box(min_vector, min_vector + bd.Vector(*size))
+
+
+#
+# Shape Caches
+#
+
+_shape_caches: List['ShapeCache'] = []
+
+
+class ShapeCache:
+    """
+    Keeps shapes that were built in this process, so they don't have to be
+    built again.
+
+    Only the `max_size` most recently used shapes are kept, so the cache
+    doesn't grow without bounds in a long running build server or sweep.
+    The shapes are shared, so don't move them without copying them.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._shapes: OrderedDict[Hashable, bd.Shape[Any]] = OrderedDict()
+
+        _shape_caches.append(self)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def get(self, key: Hashable) -> Optional[bd.Shape[Any]]:
+        shape = self._shapes.get(key)
+        if shape is not None:
+            self._shapes.move_to_end(key)
+
+        return shape
+
+    def put(self, key: Hashable, shape: bd.Shape[Any]) -> None:
+        self._shapes[key] = shape
+        self._shapes.move_to_end(key)
+
+        while len(self._shapes) > self.max_size:
+            self._shapes.popitem(last=False)
+
+    def clear(self) -> None:
+        self._shapes.clear()
+
+
+def clear_shape_caches() -> None:
+    """
+    Empties every shape cache, e.g. to build everything from scratch.
+    """
+    for shape_cache in _shape_caches:
+        shape_cache.clear()
+
+
+#
+# Bounding Boxes
+#
+
+
+def is_rotated(location: bd.Location) -> bool:
+    return any(abs(angle) > 1e-9 for angle in location.orientation)
+
+
+def make_bounding_box(
+    min_point: bd.VectorLike,
+    max_point: bd.VectorLike,
+) -> bd.BoundBox:
+    """
+    Creates a bounding box from its corners without a shape.
+    """
+    x_min, y_min, z_min = bd.Vector(min_point).to_tuple()
+    x_max, y_max, z_max = bd.Vector(max_point).to_tuple()
+
+    bnd_box = Bnd_Box()
+    bnd_box.Update(x_min, y_min, z_min, x_max, y_max, z_max)
+
+    return bd.BoundBox(bnd_box)
+
+
+def move_bounding_box(
+    bbox: bd.BoundBox,
+    offset: bd.VectorLike,
+) -> bd.BoundBox:
+    """
+    Returns the bounding box of a shape after it was moved by the offset.
+    """
+    return make_bounding_box(bbox.min + offset, bbox.max + offset)
+
+
+def get_bounding_box(shape: bd.Shape[Any]) -> bd.BoundBox:
+    """
+    Returns the bounding box of the shape.
+
+    OCC has to traverse the whole shape to calculate it, which is slow for
+    imported meshes. So the result should be reused as much as possible.
+    Generated caps and extensions know their size, so their box is
+    calculated from their dimensions instead.
+    """
+    if isinstance(shape, DimensionedPartObject):
+        bbox: Optional[bd.BoundBox] = shape.analytic_bounding_box()
+        if bbox is not None:
+            return bbox
+
+    return shape.bounding_box()
+
+
+def get_align_offset(
+    bbox: bd.BoundBox,
+    align: AlignT,
+) -> bd.Vector:
+    """
+    Amount to move a shape with the bounding box to achieve the desired
+    alignment.
+
+    From bd.BoundingBox.to_align_offset, but expanded for a 3d move.
+    """
+    align_tuple = cast(
+        Tuple[bd.Align, bd.Align, bd.Align],
+        bd.tuplify(align, 3),
+    )
+    bbox_min = bbox.min.to_tuple()
+    bbox_max = bbox.max.to_tuple()
+
+    align_offset = []
+    for i in range(3):
+        if align_tuple[i] == bd.Align.MIN:
+            align_offset.append(-bbox_min[i])
+        elif align_tuple[i] == bd.Align.CENTER:
+            align_offset.append(-(bbox_min[i] + bbox_max[i]) / 2)
+        elif align_tuple[i] == bd.Align.MAX:
+            align_offset.append(-bbox_max[i])
+        else:
+            align_offset.append(0.0)
+
+    return bd.Vector(*align_offset)
+
+
+def align_shape(
+    shape: bd.Shape[Any],
+    align: AlignT,
+    bbox: Optional[bd.BoundBox] = None,
+) -> bd.Shape[Any]:
+    """
+    Returns a copy of the shape that has been moved to the alignment.
+
+    The bounding box of the shape is only calculated if it isn't passed in.
+    """
+    if bbox is None:
+        bbox = get_bounding_box(shape)
+
+    align_location = bd.Location(get_align_offset(bbox, align))
 
     shape_aligned = shape.moved(align_location)
 
     return shape_aligned
 
 
+#
+# Importing
+#
+
+STEP_SUFFIXES = ['.step', '.stp']
+STL_SUFFIXES = ['.stl']
+
+
+def check_import_suffix(file_path: Path) -> None:
+    if file_path.suffix not in STEP_SUFFIXES + STL_SUFFIXES:
+        raise ValueError(
+            f'Files with suffix {file_path.suffix} are not supported.'
+        )
+
+
+def import_shape(file_path: Path) -> bd.Shape[Any]:
+    """
+    Imports a STEP or STL file and labels the shape with the file name.
+    """
+    check_import_suffix(file_path)
+
+    shape: bd.Shape[Any]
+    if file_path.suffix in STEP_SUFFIXES:
+        with profile_span('import_step'):
+            shape = bd.import_step(str(file_path))
+    else:
+        with profile_span('import_stl'):
+            shape = bd.import_stl(str(file_path))
+
+    shape.label = file_path.stem
+
+    return shape
+
+
+def pack_shape(shape: bd.Shape[Any]) -> Dict[str, Any]:
+    """
+    Converts a shape and its children into a dict that can be pickled to
+    send it to another process.
+
+    build123d can pickle shapes, but not their colors, and its binary
+    format fails to restore some imported solids. So the geometry is sent
+    in the BRep format.
+    """
+    packed: Dict[str, Any] = {
+        'label': shape.label,
+        'color': tuple(shape.color) if shape.color else None,
+        'is_part': isinstance(shape, bd.Part),
+    }
+
+    if shape.children:
+        packed['children'] = [pack_shape(child) for child in shape.children]
+    else:
+        brep = io.BytesIO()
+        bd.export_brep(shape, brep)
+        packed['brep'] = brep.getvalue()
+
+    return packed
+
+
+def unpack_shape(packed: Dict[str, Any]) -> bd.Shape[Any]:
+    """
+    Restores a shape packed by `pack_shape()`.
+    """
+    if 'children' in packed:
+        children = [unpack_shape(child) for child in packed['children']]
+        shape: bd.Shape[Any] = bd.Compound(children=children)
+    else:
+        wrapped = TopoDS_Shape()
+        BRepTools.Read_s(wrapped, io.BytesIO(packed['brep']), BRep_Builder())
+
+        if packed['is_part'] is True:
+            shape = bd.Part(wrapped)
+        else:
+            shape = bd.Compound.cast(wrapped)
+
+    shape.label = packed['label']
+    if packed['color'] is not None:
+        shape.color = bd.Color(*packed['color'])
+
+    return shape
+
+
+def _import_packed_shape(file_path: Path) -> Dict[str, Any]:
+    return pack_shape(import_shape(file_path))
+
+
+def import_shapes(
+    file_paths: Sequence[Path],
+    jobs: int = 0,
+) -> Iterator[bd.Shape[Any]]:
+    """
+    Imports the files and yields the shapes in the order of the files as
+    soon as they are available, so they can be used while the remaining
+    files are still being imported.
+
+    Parsing STEP files is slow and CPU-bound, so they are imported by `jobs`
+    worker processes. STL files are imported in this process, because
+    that's faster than sending them between processes.
+    """
+    for file_path in file_paths:
+        check_import_suffix(file_path)
+
+    step_indexes = [
+        i
+        for i, file_path in enumerate(file_paths)
+        if file_path.suffix in STEP_SUFFIXES
+    ]
+
+    jobs = min(get_job_count(jobs), len(step_indexes))
+    if jobs <= 1:
+        for file_path in file_paths:
+            yield import_shape(file_path)
+        return
+
+    with create_pool(jobs) as executor:
+        futures: Dict[int, Future[Dict[str, Any]]] = {
+            i: executor.submit(_import_packed_shape, file_paths[i])
+            for i in step_indexes
+        }
+
+        for i, file_path in enumerate(file_paths):
+            future = futures.get(i)
+            if future is None:
+                yield import_shape(file_path)
+            else:
+                with profile_span('wait_for_import'):
+                    packed_shape = future.result()
+                with profile_span('unpack_shape'):
+                    shape = unpack_shape(packed_shape)
+                shape.label = file_path.stem
+                yield shape
+
+
+#
+# Exporting
+#
+
+THREEMF_METADATA_NAMESPACE = 'tp_extension_builder'
+
+
+def export_stl(
+    shape: bd.Shape[Any],
+    file_path: Union[str, Path],
+    tolerance: float = D_STL_TOLERANCE,
+    angular_tolerance: float = D_STL_ANGULAR_TOLERANCE,
+) -> None:
+    """
+    Writes the shape as a binary STL file.
+
+    Shapes keep the triangulation of earlier exports, which would be reused
+    instead of tessellating with these tolerances, so it's removed first.
+    """
+    BRepTools.Clean_s(shape.wrapped)
+
+    with profile_span('write_stl'):
+        if not bd.export_stl(
+            shape,
+            str(file_path),
+            tolerance=tolerance,
+            angular_tolerance=angular_tolerance,
+        ):
+            raise RuntimeError(f'Could not write {file_path}')
+
+
+def get_parts(shape: bd.Shape[Any]) -> List[bd.Shape[Any]]:
+    """
+    Returns the direct sub shapes of a compound or the shape itself.
+
+    The children of a compound keep their position when the compound is
+    moved, so the moved sub shapes are used and only their labels are taken
+    from the children.
+    """
+    if not isinstance(shape, bd.Compound):
+        return [shape]
+
+    parts = list(shape)
+    children = list(shape.children)
+    if len(children) == len(parts):
+        for part, child in zip(parts, children):
+            part.label = child.label
+
+    return parts
+
+
+def group_instances(
+    shapes: Iterable[bd.Shape[Any]],
+) -> List[List[bd.Shape[Any]]]:
+    """
+    Groups the shapes that only differ by their location, e.g. the copies of
+    a shape that were moved to different places.
+    """
+    groups: List[List[bd.Shape[Any]]] = []
+    for shape in shapes:
+        for group in groups:
+            if cast(TopoDS_Shape, shape.wrapped).IsPartner(group[0].wrapped):
+                group.append(shape)
+                break
+        else:
+            groups.append([shape])
+
+    return groups
+
+
+def get_3mf_transform(mesher: bd.Mesher, shape: bd.Shape[Any]) -> Any:
+    """
+    Converts the location of a shape to a 3MF transform, which multiplies
+    row vectors instead of column vectors.
+    """
+    trsf = cast(TopoDS_Shape, shape.wrapped).Location().Transformation()
+
+    transform = mesher.wrapper.GetIdentityTransform()
+    for col in range(3):
+        for row in range(3):
+            transform.Fields[col][row] = trsf.Value(row + 1, col + 1)
+        transform.Fields[3][col] = trsf.Value(col + 1, 4)
+
+    return transform
+
+
+def export_3mf(
+    shape: bd.Shape[Any],
+    file_path: Union[str, Path],
+    tolerance: float = D_STL_TOLERANCE,
+    angular_tolerance: float = D_STL_ANGULAR_TOLERANCE,
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """
+    Writes the shape as a 3MF file with one object per part of the shape,
+    so slicers can still separate the parts of a combined plate.
+
+    Parts that are copies of the same shape are only meshed and stored once
+    as a components object, which every copy references with its own
+    transform.
+
+    The metadata is stored in the model as text, e.g. the parameters the
+    extension was built with.
+    """
+    mesher = bd.Mesher()
+
+    for part_num, instances in enumerate(
+        group_instances(get_parts(shape)), start=1
+    ):
+        part = instances[0].located(bd.Location())
+        BRepTools.Clean_s(part.wrapped)
+
+        # The mesher adds the sub shapes of compounds without their label
+        sub_shapes = get_parts(part)
+        for sub_shape in sub_shapes:
+            sub_shape.label = part.label
+
+        mesh_count = len(mesher.meshes)
+        with profile_span('tessellate'):
+            mesher.add_shape(
+                sub_shapes,
+                linear_deflection=tolerance,
+                angular_deflection=angular_tolerance,
+                part_number=str(part_num),
+            )
+        meshes = mesher.meshes[mesh_count:]
+
+        # Replace the build items of the meshes with one build item per
+        # copy that references all meshes of the part
+        mesh_ids = {mesh.GetResourceID() for mesh in meshes}
+        build_items = mesher.model.GetBuildItems()
+        mesh_build_items = []
+        while build_items.MoveNext():
+            build_item = build_items.GetCurrent()
+            if build_item.GetObjectResourceID() in mesh_ids:
+                mesh_build_items.append(build_item)
+
+        for build_item in mesh_build_items:
+            mesher.model.RemoveBuildItem(build_item)
+
+        components = mesher.model.AddComponentsObject()
+        components.SetPartNumber(str(part_num))
+        if part.label:
+            components.SetName(part.label)
+
+        for mesh in meshes:
+            components.AddComponent(
+                mesh, mesher.wrapper.GetIdentityTransform()
+            )
+
+        for instance in instances:
+            mesher.model.AddBuildItem(
+                components,
+                get_3mf_transform(mesher, instance),
+            )
+
+    for name, value in (metadata or {}).items():
+        if value is None:
+            continue
+        elif isinstance(value, Enum):
+            value = value.value
+
+        mesher.add_meta_data(
+            name_space=THREEMF_METADATA_NAMESPACE,
+            name=name,
+            value=str(value),
+            metadata_type='xs:string',
+            must_preserve=False,
+        )
+
+    with profile_span('write_3mf'):
+        mesher.write(str(file_path))
+
+
+def export_step_gz(shape: bd.Shape[Any], file_path: Union[str, Path]) -> None:
+    """
+    Writes the shape as a gzip compressed STEP file.
+
+    STEP files are plain text and usually shrink to a fraction of their
+    size.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        step_path = Path(tmp_dir) / 'export.step'
+        with profile_span('write_step'):
+            if not bd.export_step(shape, str(step_path)):
+                raise RuntimeError(f'Could not write {file_path}')
+
+        with (
+            profile_span('compress'),
+            open(step_path, 'rb') as step_file,
+            gzip.open(file_path, 'wb') as gz_file,
+        ):
+            shutil.copyfileobj(step_file, gz_file)
+
+
+def get_bounds(bbox: bd.BoundBox) -> BoundsT:
+    return (bbox.min.to_tuple(), bbox.max.to_tuple())
+
+
+def make_sprue_solid(sprue: Sprue) -> bd.Solid:
+    """
+    Creates the cylinder of the sprue along its axis.
+    """
+    return bd.Solid.make_cylinder(
+        radius=sprue.radius,
+        height=sprue.length,
+        plane=bd.Plane(origin=sprue.axis_start, z_dir=sprue.direction),
+    )
+
+
 def combine_shapes(
-    shapes: List[bd.Shape],
+    shapes: Iterable[bd.Shape[Any]],
     distance: float,
     add_sprue: bool,
     sprue_radius: float = 1.0,
     sprue_offset: Optional[bd.Vector] = None,
     align: AlignT = (bd.Align.MIN, bd.Align.MIN, bd.Align.MIN),
-) -> bd.Shape:
+    fuse_all: Optional[bool] = None,
+    bed_size: Optional[Tuple[float, float]] = None,
+    separate_parts: bool = False,
+) -> bd.Shape[Any]:
+    """
+    Places the shapes next to each other and connects them with a sprue.
+
+    The shapes are placed one by one as they come in, so they can be
+    imported while the first ones are already being placed.
+
+    The layout leaves a gap between the shapes, so they only touch the
+    sprue. Instead of fusing every shape into the plate one by one, which
+    gets slower with every shape, the shapes are assembled as a compound
+    and only the shapes that touch the sprue are fused with it in a single
+    boolean operation.
+
+    `fuse_all` fuses every shape into the plate like before. By default
+    this is only done if the shapes overlap because of a negative distance.
+
+    With a `bed_size`, the shapes are packed into rows that fit on the
+    print bed instead of being placed in a single row. Every row gets its
+    own sprue and a spine connects the rows.
+
+    `separate_parts` doesn't fuse anything and keeps every shape and sprue
+    as a separate child of the compound, e.g. for 3MF files in which the
+    parts remain separate objects.
+    """
     if sprue_offset is None:
         sprue_offset = bd.Vector(0, -0.1, 0)
 
-    with bd.BuildPart() as sprued_shapes:
-        sprue_align = (bd.Align.MIN, bd.Align.MAX, bd.Align.MIN)
-        shapes_aligned = [align_shape(shape, sprue_align) for shape in shapes]
+    if fuse_all is None:
+        fuse_all = distance < 0
 
-        offset = 0.0
-        for shape in shapes_aligned:
-            with bd.Locations((offset, 0, 0)):
-                bd.add(shape)
+    layout = create_layout(
+        distance=distance,
+        bed_size=bed_size,
+        sprue_radius=sprue_radius if add_sprue is True else None,
+    )
 
-            shape_size = shape.bounding_box().size
-            offset += shape_size.X + distance
+    placed_shapes = []
+    for shape in shapes:
+        # The bounding box is only calculated once per shape
+        with profile_span('place_shape'):
+            offset = layout.place(get_bounds(get_bounding_box(shape)))
+            placed_shapes.append(shape.moved(bd.Location(offset)))
 
-        if add_sprue is True and len(shapes_aligned) > 1:
-            sprue_start_x = shapes_aligned[0].position.X
-            last_obj_width = shapes_aligned[-1].bounding_box().size.X
-            sprue_length = offset - sprue_start_x - last_obj_width / 2
+    sprue_solids = []
+    if add_sprue is True:
+        with profile_span('make_sprues'):
+            sprues = layout.add_sprues(
+                radius=sprue_radius,
+                offset=sprue_offset.to_tuple(),
+            )
+            sprue_solids = [make_sprue_solid(sprue) for sprue in sprues]
+            for sprue_solid in sprue_solids:
+                sprue_solid.label = 'sprue'
+
+    combined_shape: bd.Shape[Any]
+    if fuse_all is True:
+        with profile_span('fuse_all'), bd.BuildPart() as combined_part:
+            for placed_shape in placed_shapes:
+                bd.add(placed_shape)
+
+            for sprue_solid in sprue_solids:
+                bd.add(sprue_solid)
 
-            sprue_start_x += sprue_offset.X
-            with bd.BuildSketch(bd.Plane.ZY.offset(-sprue_start_x)):
-                with bd.Locations((sprue_offset.Z, sprue_offset.Y)):
-                    bd.Circle(
-                        radius=sprue_radius,
-                        align=(bd.Align.MIN, bd.Align.MIN),
-                    )
-            bd.extrude(amount=-sprue_length)
+        combined_shape = combined_part.part
+    elif separate_parts is True or not sprue_solids:
+        combined_shape = bd.Compound(children=[*placed_shapes, *sprue_solids])
+    else:
+        sprued_shapes = []
+        loose_shapes = []
+        for placed_shape, shape_bounds in zip(
+            placed_shapes, layout.placed_bounds
+        ):
+            if any(
+                bounds_intersect(shape_bounds, sprue.bounds)
+                for sprue in layout.sprues
+            ):
+                sprued_shapes.append(placed_shape)
+            else:
+                loose_shapes.append(placed_shape)
+
+        # The result is a list if the sprue didn't connect all solids
+        with profile_span('fuse_sprue'):
+            sprued_part = sprue_solids[0].fuse(
+                *sprue_solids[1:], *sprued_shapes
+            )
+        if isinstance(sprued_part, bd.ShapeList):
+            sprued_parts = list(sprued_part)
+        else:
+            sprued_parts = [sprued_part]
 
-    sprued_shapes = sprued_shapes.part
+        combined_shape = bd.Compound(children=[*sprued_parts, *loose_shapes])
 
-    sprued_shapes = align_shape(sprued_shapes, align)
+    bbox = None
+    if layout.bounds is not None:
+        bbox = make_bounding_box(*layout.bounds)
 
-    return cast(bd.Shape, sprued_shapes)
+    return align_shape(combined_shape, align, bbox=bbox)